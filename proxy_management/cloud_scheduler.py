@@ -139,23 +139,21 @@ class CloudProxyScheduler:
             
             tester = AdvancedProxyTester()
             
-            # 獲取多個國家的代理
+            # 一次批量獲取多個國家的代理（並發下載，歷史只寫一次）
             countries = ['US', 'CN', 'JP', 'DE', 'GB', 'FR', 'CA', 'AU']
-            total_fetched = 0
-            
-            for country in countries:
-                try:
-                    proxies = tester.fetch_proxies_by_country(country)
-                    if proxies:
-                        # 保存到數據目錄
-                        self.manager._save_proxies(proxies, ProxyStatus.UNTESTED)
-                        total_fetched += len(proxies)
-                        logger.info(f"從 {country} 獲取了 {len(proxies)} 個代理")
-                except Exception as e:
-                    logger.error(f"獲取 {country} 代理失敗: {str(e)}")
-                    continue
+            results = tester.fetch_multiple_countries(countries)
+            
+            all_proxies = []
+            for country, proxies in results.items():
+                if proxies:
+                    all_proxies.extend(proxies)
+                    logger.info(f"從 {country} 獲取了 {len(proxies)} 個代理")
+            
+            # 合併後一次保存到數據目錄；逐國保存會互相覆蓋同一個文件
+            if all_proxies:
+                self.manager._save_proxies(all_proxies, ProxyStatus.UNTESTED)
             
-            return total_fetched
+            return len(all_proxies)
             
         except Exception as e:
             logger.error(f"Proxifly 獲取失敗: {str(e)}")
@@ -9,6 +9,8 @@ import csv
 import time
 import random
 import logging
+import os
+import tempfile
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Set
@@ -18,12 +20,62 @@ import aiohttp
 import requests
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import hashlib
+import shutil
+
+try:
+    import orjson
+except ImportError:  # 可選依賴，未安裝時回退到 ujson 或標準庫 json
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # 可選依賴，無需編譯 Rust，作為 orjson 缺失時的次選
+    ujson = None
 
 # 配置日誌
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _json_default(obj):
+    """ujson / 標準庫 json 的回退序列化：枚舉取值、時間轉 ISO 字串，與 orjson 的輸出保持一致"""
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    return str(obj)
+
+
+def _dump_json(obj, file_path: Path):
+    """把對象寫成緊湊 JSON 文件（先寫臨時檔並 fsync 再替換，中途中斷不會留下半截檔案）"""
+    fd, tmp_path = tempfile.mkstemp(dir=file_path.parent, suffix='.tmp')
+    try:
+        with open(fd, 'wb') as f:
+            if orjson is not None:
+                f.write(orjson.dumps(obj, default=str))
+            elif ujson is not None:
+                f.write(ujson.dumps(obj, ensure_ascii=False, default=_json_default).encode('utf-8'))
+            else:
+                f.write(json.dumps(obj, ensure_ascii=False, separators=(',', ':'),
+                                   default=_json_default).encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _load_json(file_path: Path):
+    """讀取 JSON 文件"""
+    if orjson is not None:
+        return orjson.loads(file_path.read_bytes())
+    if ujson is not None:
+        return ujson.loads(file_path.read_bytes())
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
 class ProxyStatus(Enum):
     """代理狀態枚舉"""
     VALID = "valid"           # 有效代理
@@ -108,6 +160,9 @@ class ComprehensiveProxyManager:
             ]
         }
         
+        # 已解析的代理文件 {status: (mtime_ns, 字典列表)}；文件未被修改時不重新讀取與解析
+        self._proxy_file_cache = {}
+        
         # 初始化存儲
         self._initialize_storage()
         
@@ -130,9 +185,15 @@ class ComprehensiveProxyManager:
             return []
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return [ProxyInfo.from_dict(proxy) for proxy in data]
+            mtime_ns = file_path.stat().st_mtime_ns
+            cached = self._proxy_file_cache.get(status.value)
+            if cached is not None and cached[0] == mtime_ns:
+                data = cached[1]
+            else:
+                data = _load_json(file_path)
+                self._proxy_file_cache[status.value] = (mtime_ns, data)
+            # from_dict 會原地轉換字段，傳入副本以保持快取不變
+            return [ProxyInfo.from_dict(dict(proxy)) for proxy in data]
         except Exception as e:
             logger.error(f"加載代理文件失敗 {file_path}: {e}")
             return []
@@ -148,15 +209,18 @@ class ComprehensiveProxyManager:
                 status_groups[proxy.status.value].append(proxy.to_dict())
             
             for status_value, proxy_list in status_groups.items():
-                file_path = self.files[status_value]
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(proxy_list, f, ensure_ascii=False, indent=2, default=str)
+                self._write_proxy_file(status_value, proxy_list)
         else:
             # 保存到指定狀態文件
-            file_path = self.files[status.value]
             data = [proxy.to_dict() for proxy in proxies]
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+            self._write_proxy_file(status.value, data)
+    
+    def _write_proxy_file(self, status_value: str, data: List[Dict]):
+        """寫入代理文件，並讓記憶體快取直接持有剛寫入的內容"""
+        file_path = self.files[status_value]
+        _dump_json(data, file_path)
+        # to_dict 的結果中枚舉與時間仍是對象，from_dict 同樣能處理，可直接放入快取
+        self._proxy_file_cache[status_value] = (file_path.stat().st_mtime_ns, data)
     
     def _load_stats(self) -> Dict:
         """加載統計信息"""
@@ -165,17 +229,14 @@ class ComprehensiveProxyManager:
             return self._create_default_stats()
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return _load_json(file_path)
         except Exception as e:
             logger.error(f"加載統計信息失敗: {e}")
             return self._create_default_stats()
     
     def _save_stats(self, stats: Dict):
         """保存統計信息"""
-        file_path = self.files['stats']
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(stats, f, ensure_ascii=False, indent=2, default=str)
+        _dump_json(stats, self.files['stats'])
     
     def _create_default_stats(self) -> Dict:
         """創建默認統計信息"""
@@ -295,41 +356,40 @@ class ComprehensiveProxyManager:
         # 隨機選擇測試URL
         test_url = random.choice(self.config['test_urls'])
         
-        # 分批處理
-        for i in range(0, len(proxies), batch_size):
-            batch = proxies[i:i + batch_size]
-            logger.info(f"驗證第 {i//batch_size + 1} 批，共 {len(batch)} 個代理")
+        # 全部提交到線程池，由線程池大小限制並發；不再逐批等待，
+        # 一批中最慢的代理不會拖住下一批的開始
+        future_to_proxy = {
+            self.executor.submit(self._test_proxy_sync, proxy, test_url): proxy
+            for proxy in proxies
+        }
+        
+        # 按完成順序收集結果，每完成 batch_size 個報告一次進度
+        for done, future in enumerate(as_completed(future_to_proxy), 1):
+            proxy = future_to_proxy[future]
+            is_valid, response_time = future.result()
+            if done % batch_size == 0:
+                logger.info(f"已驗證 {done}/{len(proxies)} 個代理")
             
-            # 使用線程池驗證
-            futures = []
-            for proxy in batch:
-                future = self.executor.submit(self._test_proxy_sync, proxy, test_url)
-                futures.append((proxy, future))
+            # 更新代理信息
+            proxy.last_tested = datetime.now()
+            proxy.response_time = response_time
             
-            # 收集結果
-            for proxy, future in futures:
-                is_valid, response_time = future.result()
-                
-                # 更新代理信息
-                proxy.last_tested = datetime.now()
-                proxy.response_time = response_time
+            if is_valid:
+                # 代理有效
+                proxy.status = ProxyStatus.VALID
+                proxy.fail_count = 0
+                proxy.last_success = datetime.now()
+                logger.debug(f"代理 {proxy.ip}:{proxy.port} 有效，響應時間: {response_time:.2f}s")
+            else:
+                # 代理無效
+                proxy.fail_count += 1
                 
-                if is_valid:
-                    # 代理有效
-                    proxy.status = ProxyStatus.VALID
-                    proxy.fail_count = 0
-                    proxy.last_success = datetime.now()
-                    logger.debug(f"代理 {proxy.ip}:{proxy.port} 有效，響應時間: {response_time:.2f}s")
+                if proxy.fail_count >= self.config['max_fail_count']:
+                    proxy.status = ProxyStatus.INVALID
+                    logger.debug(f"代理 {proxy.ip}:{proxy.port} 永久失效（失敗次數: {proxy.fail_count}）")
                 else:
-                    # 代理無效
-                    proxy.fail_count += 1
-                    
-                    if proxy.fail_count >= self.config['max_fail_count']:
-                        proxy.status = ProxyStatus.INVALID
-                        logger.debug(f"代理 {proxy.ip}:{proxy.port} 永久失效（失敗次數: {proxy.fail_count}）")
-                    else:
-                        proxy.status = ProxyStatus.TEMP_INVALID
-                        logger.debug(f"代理 {proxy.ip}:{proxy.port} 暫時無效（失敗次數: {proxy.fail_count}）")
+                    proxy.status = ProxyStatus.TEMP_INVALID
+                    logger.debug(f"代理 {proxy.ip}:{proxy.port} 暫時無效（失敗次數: {proxy.fail_count}）")
         
         return proxies
     
@@ -406,7 +466,6 @@ class ComprehensiveProxyManager:
     
     def export_proxies(self, format_type: str = 'json', status: ProxyStatus = ProxyStatus.VALID) -> str:
         """導出代理"""
-        proxies = self._load_proxies(status)
         export_dir = self.data_dir / "exports"
         export_dir.mkdir(exist_ok=True)
         
@@ -415,11 +474,17 @@ class ComprehensiveProxyManager:
         file_path = export_dir / filename
         
         if format_type == 'json':
-            data = [proxy.to_dict() for proxy in proxies]
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+            # 狀態文件本身就是同一格式的 JSON，直接複製，省去逐個解析再序列化
+            source_file = self.files[status.value]
+            if source_file.exists():
+                shutil.copyfile(source_file, file_path)
+            else:
+                _dump_json([], file_path)
+            logger.info(f"導出 {status.value} 代理到 {file_path}")
+            return str(file_path)
         
-        elif format_type == 'txt':
+        proxies = self._load_proxies(status)
+        if format_type == 'txt':
             with open(file_path, 'w', encoding='utf-8') as f:
                 for proxy in proxies:
                     f.write(f"{proxy.ip}:{proxy.port}\n")
@@ -12,9 +12,10 @@ from pathlib import Path
 from typing import Dict, List, Optional
 import json
 import threading
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 
-from proxy_management.core.comprehensive_proxy_manager import ComprehensiveProxyManager
+from proxy_management.core.comprehensive_proxy_manager import ComprehensiveProxyManager, _dump_json
 from proxy_management.core.proxy_lifecycle_manager import ProxyLifecycleManager
 
 logger = logging.getLogger(__name__)
@@ -23,6 +24,9 @@ logger = logging.getLogger(__name__)
 class ProxyAutomationScheduler:
     """代理管理自動化調度器"""
     
+    # 保留的任務歷史記錄數
+    TASK_HISTORY_LIMIT = 1000
+    
     def __init__(self, config_file: str = None):
         # 初始化管理器
         self.proxy_manager = ComprehensiveProxyManager()
@@ -34,15 +38,19 @@ class ProxyAutomationScheduler:
         # 調度狀態
         self.is_running = False
         self.scheduler_thread = None
+        # 停止信號：調度循環用它代替 sleep 等待，stop_scheduler 設置後立即喚醒
+        self._stop_event = threading.Event()
         self.executor = ThreadPoolExecutor(max_workers=5)
         
-        # 任務狀態追蹤
+        # 任務狀態追蹤：由調度線程與手動任務寫入、get_status 讀取，
+        # 讀寫都經過 _status_lock，對外只提供快照
+        self._status_lock = threading.Lock()
         self.task_status = {
             'last_fetch_time': None,
             'last_validation_time': None,
             'last_cleanup_time': None,
             'last_report_time': None,
-            'task_history': []
+            'task_history': deque(maxlen=self.TASK_HISTORY_LIMIT)
         }
         
         # 設置日誌
@@ -138,21 +146,30 @@ class ProxyAutomationScheduler:
             'details': details or {}
         }
         
-        self.task_status['task_history'].append(task_record)
-        
-        # 限制歷史記錄數量
-        if len(self.task_status['task_history']) > 1000:
-            self.task_status['task_history'] = self.task_status['task_history'][-1000:]
+        # deque 自動丟棄超出上限的舊記錄
+        with self._status_lock:
+            self.task_status['task_history'].append(task_record)
         
         # 保存任務狀態
         self._save_task_status()
     
+    def _task_status_snapshot(self) -> Dict:
+        """在鎖內複製一份任務狀態（歷史轉為列表），避免與寫入線程交錯"""
+        with self._status_lock:
+            snapshot = dict(self.task_status)
+            snapshot['task_history'] = list(self.task_status['task_history'])
+        return snapshot
+    
+    def _set_task_time(self, key: str):
+        """記錄某類任務的最後完成時間"""
+        with self._status_lock:
+            self.task_status[key] = datetime.now().isoformat()
+    
     def _save_task_status(self):
         """保存任務狀態"""
         try:
             status_file = self.proxy_manager.data_dir / "scheduler_status.json"
-            with open(status_file, 'w', encoding='utf-8') as f:
-                json.dump(self.task_status, f, ensure_ascii=False, indent=2, default=str)
+            _dump_json(self._task_status_snapshot(), status_file)
         except Exception as e:
             logger.error(f"保存任務狀態失敗: {e}")
     
@@ -162,7 +179,11 @@ class ProxyAutomationScheduler:
             status_file = self.proxy_manager.data_dir / "scheduler_status.json"
             if status_file.exists():
                 with open(status_file, 'r', encoding='utf-8') as f:
-                    self.task_status = json.load(f)
+                    task_status = json.load(f)
+                task_status['task_history'] = deque(task_status.get('task_history', []),
+                                                    maxlen=self.TASK_HISTORY_LIMIT)
+                with self._status_lock:
+                    self.task_status = task_status
         except Exception as e:
             logger.error(f"加載任務狀態失敗: {e}")
     
@@ -191,7 +212,7 @@ class ProxyAutomationScheduler:
             self.proxy_manager._save_proxies(validated_proxies)
             
             # 更新任務狀態
-            self.task_status['last_fetch_time'] = datetime.now().isoformat()
+            self._set_task_time('last_fetch_time')
             
             # 記錄任務歷史
             self._add_task_history(
@@ -259,7 +280,7 @@ class ProxyAutomationScheduler:
                 logger.info("沒有需要驗證的代理")
             
             # 更新任務狀態
-            self.task_status['last_validation_time'] = datetime.now().isoformat()
+            self._set_task_time('last_validation_time')
             
             # 記錄任務歷史
             self._add_task_history(
@@ -296,7 +317,7 @@ class ProxyAutomationScheduler:
             cleaned_count = self.lifecycle_manager.cleanup_old_proxies()
             
             # 更新任務狀態
-            self.task_status['last_cleanup_time'] = datetime.now().isoformat()
+            self._set_task_time('last_cleanup_time')
             
             # 記錄任務歷史
             self._add_task_history(
@@ -327,7 +348,7 @@ class ProxyAutomationScheduler:
                 'timestamp': datetime.now().isoformat(),
                 'proxy_statistics': proxy_stats,
                 'lifecycle_analytics': lifecycle_analytics,
-                'task_status': self.task_status,
+                'task_status': self._task_status_snapshot(),
                 'system_status': {
                     'is_running': self.is_running,
                     'uptime_hours': self._get_uptime_hours(),
@@ -355,7 +376,7 @@ class ProxyAutomationScheduler:
             logger.info(f"生命週期報告已生成: {lifecycle_report}")
             
             # 更新任務狀態
-            self.task_status['last_report_time'] = datetime.now().isoformat()
+            self._set_task_time('last_report_time')
             
             # 記錄任務歷史
             self._add_task_history('generate_report', 'success', {'formats': self.config['report_schedule']['formats']})
@@ -373,7 +394,7 @@ class ProxyAutomationScheduler:
     
     def _get_last_error(self) -> Optional[str]:
         """獲取最後一個錯誤"""
-        for record in reversed(self.task_status['task_history']):
+        for record in reversed(self._task_status_snapshot()['task_history']):
             if record['status'] == 'failed':
                 return record['details'].get('error', 'Unknown error')
         return None
@@ -429,8 +450,13 @@ class ProxyAutomationScheduler:
             logger.info(f"設置生成報告任務：每 {hours} 小時執行一次")
     
     def run_scheduler(self):
-        """運行調度器"""
+        """運行調度器（阻塞當前線程直到停止）"""
         self.is_running = True
+        self._stop_event.clear()
+        self._run_loop()
+    
+    def _run_loop(self):
+        """調度循環；運行狀態由調用方在進入前設置，避免覆蓋已經發出的停止信號"""
         self._load_task_status()
         
         logger.info("代理管理自動化調度器開始運行")
@@ -438,14 +464,16 @@ class ProxyAutomationScheduler:
         while self.is_running:
             try:
                 schedule.run_pending()
-                time.sleep(60)  # 每分鐘檢查一次
+                if self._stop_event.wait(60):  # 每分鐘檢查一次，收到停止信號立即退出
+                    break
             except KeyboardInterrupt:
                 logger.info("接收到中斷信號，正在停止調度器...")
                 self.stop_scheduler()
                 break
             except Exception as e:
                 logger.error(f"調度器運行錯誤: {e}")
-                time.sleep(60)  # 出錯後等待一分鐘再繼續
+                if self._stop_event.wait(60):  # 出錯後等待一分鐘再繼續
+                    break
     
     def start_scheduler(self):
         """啟動調度器"""
@@ -455,8 +483,12 @@ class ProxyAutomationScheduler:
         
         self.setup_schedules()
         
+        # 在線程啟動前進入運行狀態，緊接著的 stop_scheduler 不會被線程覆蓋
+        self.is_running = True
+        self._stop_event.clear()
+        
         # 啟動調度器線程
-        self.scheduler_thread = threading.Thread(target=self.run_scheduler)
+        self.scheduler_thread = threading.Thread(target=self._run_loop)
         self.scheduler_thread.daemon = True
         self.scheduler_thread.start()
         
@@ -465,6 +497,7 @@ class ProxyAutomationScheduler:
     def stop_scheduler(self):
         """停止調度器"""
         self.is_running = False
+        self._stop_event.set()
         
         if self.scheduler_thread and self.scheduler_thread.is_alive():
             self.scheduler_thread.join(timeout=10)
@@ -480,7 +513,7 @@ class ProxyAutomationScheduler:
             'is_running': self.is_running,
             'uptime_hours': self._get_uptime_hours(),
             'next_tasks': self._get_next_tasks(),
-            'task_status': self.task_status,
+            'task_status': self._task_status_snapshot(),
             'config': self.config,
             'last_updated': datetime.now().isoformat()
         }
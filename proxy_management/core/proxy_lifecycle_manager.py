@@ -4,6 +4,7 @@
 """
 
 import asyncio
+import gzip
 import json
 import time
 from datetime import datetime, timedelta
@@ -47,8 +48,9 @@ class ProxyLifecycleManager:
         self.manager = manager
         self.data_dir = manager.data_dir
         
-        # 生命週期日誌文件
-        self.lifecycle_log_file = self.data_dir / "lifecycle_log.json"
+        # 生命週期日誌文件（緊湊 JSON + gzip，每個事件都會整體重寫）
+        self.lifecycle_log_file = self.data_dir / "lifecycle_log.json.gz"
+        self.legacy_lifecycle_log_file = self.data_dir / "lifecycle_log.json"
         self.lifecycle_stats_file = self.data_dir / "lifecycle_stats.json"
         
         # 配置參數
@@ -134,7 +136,11 @@ class ProxyLifecycleManager:
             # 讀取現有日誌
             logs = []
             if self.lifecycle_log_file.exists():
-                with open(self.lifecycle_log_file, 'r', encoding='utf-8') as f:
+                with gzip.open(self.lifecycle_log_file, 'rb') as f:
+                    logs = json.loads(f.read())
+            elif self.legacy_lifecycle_log_file.exists():
+                # 沿用舊版未壓縮的日誌，下次保存時寫入 .gz 文件
+                with open(self.legacy_lifecycle_log_file, 'r', encoding='utf-8') as f:
                     logs = json.load(f)
             
             # 添加新記錄
@@ -153,8 +159,8 @@ class ProxyLifecycleManager:
                 logs = logs[-self.config['max_log_entries']:]
             
             # 保存日誌
-            with open(self.lifecycle_log_file, 'w', encoding='utf-8') as f:
-                json.dump(logs, f, ensure_ascii=False, indent=2)
+            with gzip.open(self.lifecycle_log_file, 'wb', compresslevel=1) as f:
+                f.write(json.dumps(logs, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
                 
         except Exception as e:
             logger.error(f"追加生命週期日誌失敗: {e}")
@@ -5,9 +5,14 @@
 """
 
 import argparse
-import pandas as pd
+import csv
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+import atexit
+from http.cookiejar import DefaultCookiePolicy
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 import logging
@@ -17,9 +22,31 @@ import sys
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+
+def _create_speed_test_session() -> requests.Session:
+    """
+    建立測速用的連接池會話
+    
+    各測速線程共用同一個會話，因此不接受也不發送任何 cookie，避免不同代理的響應互相影響。
+    """
+    session = requests.Session()
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    for prefix in ('http://', 'https://'):
+        session.mount(prefix, HTTPAdapter(pool_connections=64, pool_maxsize=64))
+    return session
+
+
+# 測速共用的模組級會話，各實例、各線程與多次測試間複用連接，進程退出時關閉
+_speed_test_session = _create_speed_test_session()
+atexit.register(_speed_test_session.close)
+
+
 class ProxyManager:
     """代理管理器"""
     
+    # is_working 欄位中表示有效的取值
+    TRUE_VALUES = frozenset({'True', 'true', '1'})
+    
     def __init__(self):
         self.proxies = []
         self.working_proxies = []
@@ -27,15 +54,30 @@ class ProxyManager:
     def load_validation_results(self, csv_file: str):
         """載入驗證結果"""
         try:
-            df = pd.read_csv(csv_file)
-            self.proxies = df.to_dict('records')
+            # 逐行讀取並就地轉換型別，一次遍歷同時得到全部代理與有效代理
+            proxies = []
+            working_proxies = []
+            with open(csv_file, newline='', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                has_status = 'is_working' in (reader.fieldnames or ())
+                for row in reader:
+                    row['port'] = int(row['port'])
+                    # 沒有響應時間的代理去掉該鍵，讀取時按 99999 處理
+                    if row.get('response_time_ms'):
+                        row['response_time_ms'] = float(row['response_time_ms'])
+                    else:
+                        row.pop('response_time_ms', None)
+                    proxies.append(row)
+                    
+                    # 檢查是否有 is_working 欄位，如果沒有則假設所有代理都是有效的
+                    if has_status:
+                        row['is_working'] = row['is_working'] in self.TRUE_VALUES
+                        if row['is_working']:
+                            working_proxies.append(row)
             
-            # 檢查是否有 is_working 欄位，如果沒有則假設所有代理都是有效的
-            if 'is_working' in df.columns:
-                self.working_proxies = df[df['is_working'] == True].to_dict('records')
-            else:
-                # 如果沒有 is_working 欄位，則將所有代理視為有效
-                self.working_proxies = self.proxies.copy()
+            self.proxies = proxies
+            # 如果沒有 is_working 欄位，則將所有代理視為有效
+            self.working_proxies = working_proxies if has_status else proxies.copy()
                 
             logger.info(f"載入 {len(self.proxies)} 個代理，其中 {len(self.working_proxies)} 個有效")
         except Exception as e:
@@ -43,18 +85,37 @@ class ProxyManager:
     
     def get_working_proxies(self, max_response_time: int = None, limit: int = None):
         """獲取有效代理，可按響應時間過濾"""
-        proxies = self.working_proxies.copy()
+        response_times = self._working_response_times()
+        idx = np.arange(len(response_times))
         
         if max_response_time:
-            proxies = [p for p in proxies if p.get('response_time_ms', 99999) <= max_response_time]
+            idx = idx[response_times <= max_response_time]
         
-        # 按響應時間排序
-        proxies.sort(key=lambda x: x.get('response_time_ms', 99999))
+        # 按響應時間排序（穩定排序，響應時間相同時保持原順序）；
+        # 只取前 limit 個時先用 partition 找出第 limit 小的值，只排序入選的部分
+        if limit and limit < len(idx):
+            selected = response_times[idx]
+            kth = np.partition(selected, limit - 1)[limit - 1]
+            keep = selected < kth
+            # 與第 limit 小的值相等的代理按原順序補足名額
+            ties = np.flatnonzero(selected == kth)[:limit - np.count_nonzero(keep)]
+            keep[ties] = True
+            idx = idx[keep]
+        idx = idx[np.argsort(response_times[idx], kind='stable')]
         
-        if limit:
-            proxies = proxies[:limit]
-            
-        return proxies
+        working = self.working_proxies
+        return [working[i] for i in idx]
+    
+    def _working_response_times(self) -> np.ndarray:
+        """
+        與 working_proxies 對齊的響應時間陣列（缺失按 99999 處理）
+        
+        每次調用時重新建立：只是一次線性遍歷，且 working_proxies 被重新賦值或就地修改後不會返回過期結果。
+        """
+        return np.fromiter(
+            (p.get('response_time_ms', 99999) for p in self.working_proxies),
+            dtype=np.float64, count=len(self.working_proxies)
+        )
     
     def save_working_proxies(self, output_file: str, max_response_time: int = None, limit: int = None):
         """儲存有效代理到檔案"""
@@ -64,23 +125,19 @@ class ProxyManager:
             logger.error("沒有找到有效的代理")
             return
         
-        # 準備資料
-        proxy_list = []
-        for proxy in working:
-            proxy_list.append({
-                'ip': proxy['ip'],
-                'port': proxy['port'],
-                'type': proxy['type'],
-                'response_time_ms': proxy.get('response_time_ms', 0),
-                'country': proxy.get('country', 'Unknown'),
-                'proxy_url': f"{proxy['type']}://{proxy['ip']}:{proxy['port']}"
-            })
-        
-        # 儲存為CSV
-        df = pd.DataFrame(proxy_list)
-        df.to_csv(output_file, index=False, encoding='utf-8')
-        
-        logger.info(f"已儲存 {len(proxy_list)} 個有效代理到: {output_file}")
+        # 逐行直接寫出CSV，無需先組裝成字典列表再交給 DataFrame；
+        # 未測得響應時間的代理留空，不能寫成 0 冒充最快的代理
+        with open(output_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(['ip', 'port', 'type', 'response_time_ms', 'country', 'proxy_url'])
+            writer.writerows(
+                (proxy['ip'], proxy['port'], proxy['type'],
+                 proxy.get('response_time_ms', ''), proxy.get('country', 'Unknown'),
+                 f"{proxy['type']}://{proxy['ip']}:{proxy['port']}")
+                for proxy in working
+            )
+        
+        logger.info(f"已儲存 {len(working)} 個有效代理到: {output_file}")
         return output_file
     
     def test_proxy_speed(self, proxy: dict, test_url: str = 'http://httpbin.org/ip') -> float:
@@ -89,7 +146,7 @@ class ProxyManager:
         
         try:
             start_time = time.time()
-            response = requests.get(
+            response = _speed_test_session.get(
                 test_url,
                 proxies={'http': proxy_url, 'https': proxy_url},
                 timeout=10
@@ -111,27 +168,28 @@ class ProxyManager:
         
         results = []
         
-        for i, proxy in enumerate(working):
-            print(f"測試 {i+1}/{len(working)}: {proxy['ip']}:{proxy['port']}", end=" ")
-            
-            speeds = []
-            for j in range(test_count):
-                speed = self.test_proxy_speed(proxy)
-                if speed:
-                    speeds.append(speed)
-                print(".", end="")
-            
-            if speeds:
-                avg_speed = sum(speeds) / len(speeds)
-                results.append({
-                    'ip': proxy['ip'],
-                    'port': proxy['port'],
-                    'avg_speed_ms': round(avg_speed, 2),
-                    'success_rate': len(speeds) / test_count * 100
-                })
-                print(f" {avg_speed:.0f}ms ({len(speeds)}/{test_count})")
-            else:
-                print(" 失敗")
+        # 各代理並發測試，按完成順序輸出
+        with ThreadPoolExecutor(max_workers=max(1, min(32, len(working)))) as executor:
+            future_to_proxy = {
+                executor.submit(self._benchmark_proxy, proxy, test_count): proxy
+                for proxy in working
+            }
+            for i, future in enumerate(as_completed(future_to_proxy)):
+                proxy = future_to_proxy[future]
+                speeds = future.result()
+                print(f"測試 {i+1}/{len(working)}: {proxy['ip']}:{proxy['port']}", end=" ")
+                print("." * len(speeds), end="")  # 每次成功的測試一個點
+                if speeds:
+                    avg_speed = sum(speeds) / len(speeds)
+                    results.append({
+                        'ip': proxy['ip'],
+                        'port': proxy['port'],
+                        'avg_speed_ms': round(avg_speed, 2),
+                        'success_rate': len(speeds) / test_count * 100
+                    })
+                    print(f" {avg_speed:.0f}ms ({len(speeds)}/{test_count})")
+                else:
+                    print(" 失敗")
         
         # 按速度排序
         results.sort(key=lambda x: x['avg_speed_ms'])
@@ -143,6 +201,15 @@ class ProxyManager:
                   f"- {result['avg_speed_ms']:6.0f}ms "
                   f"({result['success_rate']:3.0f}% 成功率)")
     
+    def _benchmark_proxy(self, proxy: dict, test_count: int) -> list:
+        """對單個代理連續測速 test_count 次"""
+        speeds = []
+        for _ in range(test_count):
+            speed = self.test_proxy_speed(proxy)
+            if speed:
+                speeds.append(speed)
+        return speeds
+    
     def export_for_tools(self, output_format: str, filename: str, max_response_time: int = 5000):
         """匯出代理供其他工具使用"""
         working = self.get_working_proxies(max_response_time=max_response_time)
@@ -202,21 +269,23 @@ def main():
     if args.show_stats:
         working = manager.get_working_proxies()
         if working:
-            response_times = [p.get('response_time_ms', 0) for p in working]
+            response_times = np.fromiter(
+                (p.get('response_time_ms', 0) for p in working),
+                dtype=np.float64, count=len(working)
+            )
             
             print(f"\n代理統計資訊:")
             print("="*50)
             print(f"總代理數: {len(manager.proxies)}")
             print(f"有效代理: {len(working)}")
             print(f"成功率: {len(working)/len(manager.proxies)*100:.2f}%")
-            print(f"平均響應時間: {sum(response_times)/len(response_times):.0f}ms")
-            print(f"最快響應時間: {min(response_times):.0f}ms")
-            print(f"最慢響應時間: {max(response_times):.0f}ms")
+            print(f"平均響應時間: {response_times.mean():.0f}ms")
+            print(f"最快響應時間: {response_times.min():.0f}ms")
+            print(f"最慢響應時間: {response_times.max():.0f}ms")
             
-            # 響應時間分布
-            fast = len([t for t in response_times if t < 1000])
-            medium = len([t for t in response_times if 1000 <= t < 3000])
-            slow = len([t for t in response_times if t >= 3000])
+            # 響應時間分布：[<1秒, 1-3秒, >=3秒]
+            counts, _ = np.histogram(response_times, bins=[-np.inf, 1000, 3000, np.inf])
+            fast, medium, slow = counts.tolist()
             
             print(f"\n響應時間分布:")
             print(f"  快速 (<1秒): {fast} 個 ({fast/len(working)*100:.1f}%)")
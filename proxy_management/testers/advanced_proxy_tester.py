@@ -12,21 +12,44 @@ SEEK 爬蟲專案 - 進階代理 IP 測試工具 (支援所有國家)
 - 提供統計和分析功能
 """
 
+import asyncio
+import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
+import atexit
 import pandas as pd
 import time
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional, Union
+from typing import List, Dict, Optional, Tuple, Union
 import json
+import gzip
+import os
+import tempfile
+import hashlib
 import argparse
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 from ..countries import COUNTRIES
-from flask import Flask, jsonify, request, render_template_string, send_from_directory
+from flask import Flask, Response, request, render_template_string, send_from_directory
 import threading
 
+try:
+    import orjson
+except ImportError:  # 可選依賴，未安裝時回退到 ujson 或標準庫 json
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # 可選依賴，無需編譯 Rust，作為 orjson 缺失時的次選
+    ujson = None
+
+try:
+    from waitress import serve as waitress_serve
+except ImportError:  # 可選依賴，未安裝時使用 Flask 內建的開發伺服器
+    waitress_serve = None
+
 # 設定日誌
 logging.basicConfig(
     level=logging.INFO,
@@ -40,36 +63,42 @@ logger = logging.getLogger(__name__)
 
 class AdvancedProxyTester:
     def validate_proxies(self, proxies: List[Dict], max_workers: int = 20) -> Dict[str, List[Dict]]:
-        """多線程驗證代理，分為有效與無效"""
-        import requests
-        from concurrent.futures import ThreadPoolExecutor, as_completed
-        valid, invalid = [], []
+        """並發驗證代理，分為有效與無效"""
+        results = asyncio.run(self._validate_proxies_async(proxies, max_workers))
+        valid = [proxy for proxy, is_valid in results if is_valid]
+        invalid = [proxy for proxy, is_valid in results if not is_valid]
+        return {'valid': valid, 'invalid': invalid}
 
-        def check(proxy):
-            proxy_url = f"{proxy.get('type','http')}://{proxy['ip']}:{proxy['port']}"
+    async def _check_proxy_async(self, session: aiohttp.ClientSession,
+                                 semaphore: asyncio.Semaphore, proxy: Dict):
+        """異步檢查單個代理，並寫回 is_working 標記"""
+        proxy_url = f"{proxy.get('type','http')}://{proxy['ip']}:{proxy['port']}"
+        async with semaphore:
             try:
-                resp = requests.get('http://httpbin.org/ip', proxies={'http': proxy_url, 'https': proxy_url}, timeout=5)
-                if resp.status_code == 200:
-                    proxy['is_working'] = True
-                    return proxy, True
-                else:
-                    proxy['is_working'] = False
-                    return proxy, False
+                async with session.get('http://httpbin.org/ip', proxy=proxy_url) as resp:
+                    proxy['is_working'] = resp.status == 200
             except Exception:
                 proxy['is_working'] = False
-                return proxy, False
-
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_proxy = {executor.submit(check, p): p for p in proxies}
-            for future in as_completed(future_to_proxy):
-                proxy, is_valid = future.result()
-                if is_valid:
-                    valid.append(proxy)
-                else:
-                    invalid.append(proxy)
-        return {'valid': valid, 'invalid': invalid}
+        return proxy, proxy['is_working']
+
+    async def _validate_proxies_async(self, proxies: List[Dict], max_workers: int):
+        """在單個事件循環中同時發出所有驗證請求，總耗時接近最慢的一個"""
+        semaphore = asyncio.Semaphore(max_workers * self.ASYNC_CONCURRENCY_FACTOR)
+        async with aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=5),
+            connector=aiohttp.TCPConnector(limit=0)  # 併發由信號量控制
+        ) as session:
+            return await asyncio.gather(
+                *(self._check_proxy_async(session, semaphore, proxy) for proxy in proxies)
+            )
     """進階代理 IP 測試器類別"""
     
+    # 異步驗證時每個 "worker" 對應的併發請求數
+    ASYNC_CONCURRENCY_FACTOR = 20
+    
+    # 代理列表在記憶體中的有效期（秒），上游約每 5 分鐘更新一次
+    PROXY_CACHE_TTL = 300
+    
     def __init__(self):
         """初始化代理測試器"""
         self.base_urls = {
@@ -85,41 +114,152 @@ class AdvancedProxyTester:
         self.data_dir = Path("data/proxies")
         self.data_dir.mkdir(parents=True, exist_ok=True)
         
+        # 所有請求都打到同一個 CDN 主機，共用連線池以複用 keep-alive 連線；
+        # 連線池大小足以應付 Web 伺服器的多線程請求
+        self._session = requests.Session()
+        self._session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=10))
+        atexit.register(self._session.close)
+        
+        # 最近獲取的代理列表 {source_type: (獲取時間, 代理快照)}，
+        # 重複請求同一來源時直接返回副本，不再下載與解析；
+        # 快照是代理字典副本組成的元組，外部不持有，可安全地按對象身份複用序列化結果
+        self._proxy_cache = {}
+        self._cache_lock = threading.Lock()
+        # 正在下載中的來源 {source_type: threading.Event}，用於合併並發請求
+        self._inflight = {}
+        
         # 儲存歷史數據
         self.history_file = self.data_dir / "advanced_proxy_history.json"
+        # 唯一代理只增不減，逐行追加到日誌，不隨歷史 JSON 整份重寫
+        self.unique_log_file = self.data_dir / "advanced_unique_proxies.log"
+        # 單線程寫檔器：請求處理中的歷史寫入交給它，按提交順序落盤
+        self._io_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='history-writer')
         self.load_history()
     
     def load_history(self):
         """載入歷史記錄"""
+        history_data = {}
         if self.history_file.exists():
-            with open(self.history_file, 'r', encoding='utf-8') as f:
-                history_data = json.load(f)
-                self.history = {
-                    'fetch_times': history_data.get('fetch_times', []),
-                    'proxy_counts': history_data.get('proxy_counts', []),
-                    'country_stats': history_data.get('country_stats', {}),
-                    'unique_proxies_seen': set(history_data.get('unique_proxies_seen', []))
-                }
-        else:
-            self.history = {
-                'fetch_times': [],
-                'proxy_counts': [],
-                'country_stats': {},
-                'unique_proxies_seen': set()
-            }
+            if orjson is not None:
+                history_data = orjson.loads(self.history_file.read_bytes())
+            elif ujson is not None:
+                history_data = ujson.loads(self.history_file.read_bytes())
+            else:
+                with open(self.history_file, 'r', encoding='utf-8') as f:
+                    history_data = json.load(f)
+        
+        unique_proxies_seen = set()
+        if self.unique_log_file.exists():
+            with open(self.unique_log_file, 'r', encoding='utf-8') as f:
+                unique_proxies_seen = {line for line in f.read().splitlines() if line}
+        
+        # 舊版歷史把唯一代理存在 JSON 中，遷移到追加日誌
+        legacy_ids = set(history_data.get('unique_proxies_seen', [])) - unique_proxies_seen
+        if legacy_ids:
+            self._append_unique_proxies(legacy_ids)
+            unique_proxies_seen |= legacy_ids
+        
+        self.history = {
+            'fetch_times': history_data.get('fetch_times', []),
+            'proxy_counts': history_data.get('proxy_counts', []),
+            'country_stats': history_data.get('country_stats', {}),
+            'unique_proxies_seen': unique_proxies_seen
+        }
     
     def save_history(self):
-        """儲存歷史記錄"""
-        history_to_save = self.history.copy()
-        history_to_save['unique_proxies_seen'] = list(self.history['unique_proxies_seen'])
-        
-        with open(self.history_file, 'w', encoding='utf-8') as f:
-            json.dump(history_to_save, f, indent=2, ensure_ascii=False)
+        """儲存歷史記錄（唯一代理見 unique_log_file）"""
+        self._write_history(self._history_snapshot())
+    
+    def save_history_in_background(self):
+        """在寫檔線程中儲存歷史記錄，調用方不等待磁碟 I/O"""
+        self._io_executor.submit(self._write_history, self._history_snapshot())
+    
+    def _history_snapshot(self) -> Dict:
+        """複製一份待寫出的歷史，之後的修改不影響已提交的寫入"""
+        return {
+            'fetch_times': list(self.history['fetch_times']),
+            'proxy_counts': list(self.history['proxy_counts']),
+            'country_stats': {code: dict(stats) for code, stats in self.history['country_stats'].items()}
+        }
+    
+    def _write_history(self, history_to_save: Dict):
+        """把歷史快照寫入 history_file（先寫臨時檔再替換，中途中斷不會留下半截檔案）"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.data_dir, suffix='.tmp')
+        try:
+            if orjson is not None:
+                with open(fd, 'wb') as f:
+                    f.write(orjson.dumps(history_to_save, option=orjson.OPT_INDENT_2))
+            else:
+                with open(fd, 'w', encoding='utf-8') as f:
+                    json.dump(history_to_save, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.history_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    
+    def _append_unique_proxies(self, proxy_ids):
+        """把新見到的代理追加到唯一代理日誌"""
+        with open(self.unique_log_file, 'a', encoding='utf-8', buffering=1 << 16) as f:
+            f.write('\n'.join(proxy_ids) + '\n')
     
     def get_available_countries(self) -> Dict[str, str]:
         """獲取可用國家列表"""
         return self.countries.copy()
     
+    def _get_cached(self, source_type: str) -> Optional[Tuple[Dict, ...]]:
+        """返回未過期的快取快照（只讀，交給調用方前需用 _copy_proxies 複製）"""
+        with self._cache_lock:
+            return self._fresh_locked(source_type)
+    
+    def get_cached_snapshot(self, source_type: str) -> Optional[Tuple[Dict, ...]]:
+        """返回未過期的快取快照，供只讀的序列化使用（如 API 回應），不得修改"""
+        return self._get_cached(source_type)
+    
+    @staticmethod
+    def _copy_proxies(snapshot: Tuple[Dict, ...]) -> List[Dict]:
+        """把快取快照複製為調用方可自由修改的代理列表"""
+        return [dict(proxy) for proxy in snapshot]
+    
+    def _fresh_locked(self, source_type: str) -> Optional[Tuple[Dict, ...]]:
+        """同 _get_cached，調用方需已持有 _cache_lock"""
+        entry = self._proxy_cache.get(source_type)
+        if entry and time.monotonic() - entry[0] < self.PROXY_CACHE_TTL:
+            return entry[1]
+        return None
+    
+    def _fetch_once(self, source_type: str, fetch) -> Optional[List[Dict]]:
+        """
+        合併對同一來源的並發請求：只有第一個請求真正下載，
+        其餘請求等待它完成後直接讀取快取
+        """
+        with self._cache_lock:
+            cached = self._fresh_locked(source_type)
+            if cached is not None:
+                return self._copy_proxies(cached)
+            event = self._inflight.get(source_type)
+            is_leader = event is None
+            if is_leader:
+                event = self._inflight[source_type] = threading.Event()
+        
+        if not is_leader:
+            event.wait()
+            # 下載失敗時快取中沒有結果，與直接請求失敗一樣返回 None
+            cached = self._get_cached(source_type)
+            return self._copy_proxies(cached) if cached is not None else None
+        
+        try:
+            return fetch()
+        finally:
+            with self._cache_lock:
+                del self._inflight[source_type]
+            event.set()
+    
+    def _set_cached(self, source_type: str, proxies: List[Dict]):
+        """記錄最新獲取的代理列表（存入副本快照，調用方之後修改原列表不影響快取）"""
+        snapshot = tuple(dict(proxy) for proxy in proxies)
+        with self._cache_lock:
+            self._proxy_cache[source_type] = (time.monotonic(), snapshot)
+    
     def fetch_proxies_by_type(self, proxy_type: str = 'all') -> Optional[List[Dict]]:
         """
         根據類型獲取代理列表
@@ -135,7 +275,7 @@ class AdvancedProxyTester:
             return None
             
         url = self.base_urls[proxy_type]
-        return self._fetch_from_url(url, proxy_type)
+        return self._fetch_once(proxy_type, lambda: self._fetch_from_url(url, proxy_type))
     
     def fetch_proxies_by_country(self, country_code: str) -> Optional[List[Dict]]:
         """
@@ -154,52 +294,43 @@ class AdvancedProxyTester:
         country_code = country_code.upper()
         url = f"{self.country_base_url}/{country_code}/data.txt"
         
-        proxies = self._fetch_from_url(url, f"country-{country_code}")
-        
-        # 更新國家統計
-        if proxies:
-            if country_code not in self.history['country_stats']:
-                self.history['country_stats'][country_code] = {
-                    'total_fetches': 0,
-                    'total_proxies': 0,
-                    'last_fetch': None
-                }
+        def fetch():
+            proxies = self._fetch_from_url(url, f"country-{country_code}")
             
-            self.history['country_stats'][country_code]['total_fetches'] += 1
-            self.history['country_stats'][country_code]['total_proxies'] += len(proxies)
-            self.history['country_stats'][country_code]['last_fetch'] = datetime.now().isoformat()
+            # 更新國家統計
+            if proxies:
+                self._update_country_stats(country_code, proxies)
+                self.save_history_in_background()
             
-            self.save_history()
+            return proxies
         
-        return proxies
+        return self._fetch_once(f"country-{country_code}", fetch)
+    
+    def _update_country_stats(self, country_code: str, proxies: List[Dict]):
+        """累加某個國家的獲取統計"""
+        if country_code not in self.history['country_stats']:
+            self.history['country_stats'][country_code] = {
+                'total_fetches': 0,
+                'total_proxies': 0,
+                'last_fetch': None
+            }
+        
+        self.history['country_stats'][country_code]['total_fetches'] += 1
+        self.history['country_stats'][country_code]['total_proxies'] += len(proxies)
+        self.history['country_stats'][country_code]['last_fetch'] = datetime.now().isoformat()
     
     def _fetch_from_url(self, url: str, source_type: str) -> Optional[List[Dict]]:
         """從指定 URL 獲取代理"""
         try:
             logger.info(f"正在從 {source_type} 獲取代理列表...")
-            response = requests.get(url, timeout=30)
+            response = self._session.get(url, timeout=30)
             response.raise_for_status()
             
-            proxies = []
-            for line in response.text.strip().split('\n'):
-                if line.strip():
-                    proxy_info = self._parse_proxy_line(line.strip())
-                    if proxy_info:
-                        proxy_info['source'] = source_type
-                        proxies.append(proxy_info)
-            
+            proxies = self._parse_proxy_text(response.text, source_type)
             logger.info(f"成功獲取 {len(proxies)} 個來自 {source_type} 的代理")
             
-            # 記錄歷史
-            fetch_time = datetime.now().isoformat()
-            self.history['fetch_times'].append(fetch_time)
-            self.history['proxy_counts'].append(len(proxies))
-            
-            # 追蹤唯一代理
-            for proxy in proxies:
-                proxy_id = f"{proxy.get('ip')}:{proxy.get('port')}"
-                self.history['unique_proxies_seen'].add(proxy_id)
-            
+            self._record_fetch(proxies)
+            self._set_cached(source_type, proxies)
             return proxies
             
         except requests.exceptions.RequestException as e:
@@ -209,6 +340,30 @@ class AdvancedProxyTester:
             logger.error(f"未預期的錯誤: {e}")
             return None
     
+    def _parse_proxy_text(self, text: str, source_type: str) -> List[Dict]:
+        """把 data.txt 的內容解析為代理列表"""
+        proxies = []
+        for line in text.strip().split('\n'):
+            if line.strip():
+                proxy_info = self._parse_proxy_line(line.strip())
+                if proxy_info:
+                    proxy_info['source'] = source_type
+                    proxies.append(proxy_info)
+        return proxies
+    
+    def _record_fetch(self, proxies: List[Dict]):
+        """記錄一次獲取的歷史與唯一代理"""
+        fetch_time = datetime.now().isoformat()
+        self.history['fetch_times'].append(fetch_time)
+        self.history['proxy_counts'].append(len(proxies))
+        
+        # 追蹤唯一代理，只把新出現的追加到日誌
+        new_ids = {f"{proxy.get('ip')}:{proxy.get('port')}" for proxy in proxies}
+        new_ids -= self.history['unique_proxies_seen']
+        if new_ids:
+            self._append_unique_proxies(new_ids)
+            self.history['unique_proxies_seen'] |= new_ids
+    
     def _parse_proxy_line(self, line: str) -> Optional[Dict]:
         """解析代理行"""
         try:
@@ -251,26 +406,78 @@ class AdvancedProxyTester:
         Returns:
             國家代碼對應代理列表的字典
         """
-        results = {}
+        fetched = asyncio.run(self._fetch_countries_async(country_codes))
         
-        def fetch_country(country_code):
-            proxies = self.fetch_proxies_by_country(country_code)
-            return country_code, proxies
+        # 在同一個線程裡彙總統計，全部國家處理完後只寫一次歷史檔
+        results = {}
+        for country_code, proxies, downloaded in fetched:
+            # 快取命中的國家不重複計入獲取統計（與 fetch_proxies_by_country 一致）
+            if proxies and downloaded:
+                self._record_fetch(proxies)
+                self._update_country_stats(country_code.upper(), proxies)
+            results[country_code] = proxies or []
         
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            # 提交所有任務
-            future_to_country = {
-                executor.submit(fetch_country, country): country 
-                for country in country_codes
-            }
-            
-            # 收集結果
-            for future in as_completed(future_to_country):
-                country_code, proxies = future.result()
-                results[country_code] = proxies or []
+        if any(results.values()):
+            self.save_history_in_background()
         
         return results
     
+    async def _fetch_countries_async(self, country_codes: List[str]):
+        """
+        在單個事件循環中並發下載多個國家的代理列表
+        
+        未過期的快取直接返回副本；其他線程正在下載的國家等待其完成後讀取快取，
+        只有兩者都未命中的國家才真正發出請求。返回 (國家代碼, 代理列表, 是否本次下載) 的列表。
+        """
+        semaphore = asyncio.Semaphore(10)
+        
+        async def fetch_country(session: aiohttp.ClientSession, country_code: str):
+            code = country_code.upper()
+            if code not in self.countries:
+                logger.error(f"不支援的國家代碼: {country_code}")
+                return country_code, None, False
+            
+            source_type = f"country-{code}"
+            with self._cache_lock:
+                cached = self._fresh_locked(source_type)
+                if cached is None:
+                    event = self._inflight.get(source_type)
+                    is_leader = event is None
+                    if is_leader:
+                        event = self._inflight[source_type] = threading.Event()
+            
+            if cached is not None:
+                return country_code, self._copy_proxies(cached), False
+            
+            if not is_leader:
+                # 在線程中等待，不阻塞事件循環上其他國家的下載
+                await asyncio.to_thread(event.wait)
+                cached = self._get_cached(source_type)
+                return country_code, self._copy_proxies(cached) if cached is not None else None, False
+            
+            try:
+                async with semaphore:
+                    try:
+                        logger.info(f"正在從 {source_type} 獲取代理列表...")
+                        async with session.get(f"{self.country_base_url}/{code}/data.txt") as response:
+                            response.raise_for_status()
+                            text = await response.text()
+                    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                        logger.error(f"請求失敗: {e}")
+                        return country_code, None, False
+                
+                proxies = self._parse_proxy_text(text, source_type)
+                logger.info(f"成功獲取 {len(proxies)} 個來自 {source_type} 的代理")
+                self._set_cached(source_type, proxies)
+                return country_code, proxies, True
+            finally:
+                with self._cache_lock:
+                    del self._inflight[source_type]
+                event.set()
+        
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as session:
+            return await asyncio.gather(*(fetch_country(session, c) for c in country_codes))
+    
     def get_statistics(self) -> Dict:
         """獲取詳細統計資訊"""
         stats = {
@@ -282,38 +489,130 @@ class AdvancedProxyTester:
         }
         
         # 計算平均代理數量
-        if self.history['proxy_counts']:
-            stats['avg_proxies_per_fetch'] = sum(self.history['proxy_counts']) / len(self.history['proxy_counts'])
-            stats['max_proxies_in_fetch'] = max(self.history['proxy_counts'])
-            stats['min_proxies_in_fetch'] = min(self.history['proxy_counts'])
-        
-        # 計算時間統計
-        if len(self.history['fetch_times']) >= 2:
-            times = [datetime.fromisoformat(t) for t in self.history['fetch_times']]
-            intervals = [(times[i] - times[i-1]).total_seconds() / 60 for i in range(1, len(times))]
-            stats['avg_fetch_interval_minutes'] = sum(intervals) / len(intervals)
+        counts = self.history['proxy_counts']
+        if counts:
+            stats['avg_proxies_per_fetch'] = sum(counts) / len(counts)
+            stats['max_proxies_in_fetch'] = max(counts)
+            stats['min_proxies_in_fetch'] = min(counts)
+        
+        # 計算時間統計：相鄰間隔之和等於首尾時間差，只需解析兩個時間戳
+        fetch_times = self.history['fetch_times']
+        if len(fetch_times) >= 2:
+            span = datetime.fromisoformat(fetch_times[-1]) - datetime.fromisoformat(fetch_times[0])
+            stats['avg_fetch_interval_minutes'] = span.total_seconds() / 60 / (len(fetch_times) - 1)
         
         return stats
 
 # Flask Web API
 app = Flask(__name__)
-import tempfile
+
+def _json_default(obj):
+    """ujson / 標準庫 json 的回退序列化：時間轉 ISO 字串（與 orjson 一致），其餘對象轉字串"""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    return str(obj)
+
+def _dumps(obj) -> bytes:
+    """把 API 回應序列化為緊湊的 UTF-8 JSON；依次使用 orjson、ujson、標準庫 json，三者輸出相同"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default)
+    if ujson is not None:
+        return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False,
+                           default=_json_default).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'),
+                      default=_json_default).encode('utf-8')
+
+def json_response(payload, status: int = 200):
+    """序列化 API 回應；代理列表可能有上萬筆，用 _dumps 代替 jsonify"""
+    return Response(_dumps(payload), status=status, mimetype='application/json')
+
+# 小於此大小（bytes）的回應不壓縮，gzip 頭部開銷不划算
+GZIP_MIN_SIZE = 500
+
+def _accepts_gzip() -> bool:
+    """客戶端是否接受 gzip 編碼"""
+    return 'gzip' in request.headers.get('Accept-Encoding', '')
+
+@app.after_request
+def compress_response(response):
+    """按 Accept-Encoding 壓縮較大的 JSON 回應（cacheable_json_response 已自行處理）"""
+    if (response.status_code != 200 or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype != 'application/json'):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    if not _accepts_gzip():
+        return response
+    body = response.get_data()
+    if len(body) >= GZIP_MIN_SIZE:
+        response.set_data(gzip.compress(body, compresslevel=5))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+# 已序列化的回應 {key: [來源對象, body, etag, gzip 後的 body, gzip body 的 etag]}；
+# 來源對象未更換時直接複用，不重新編碼或壓縮。來源必須是不可變的快照（如快取中的元組），
+# 否則就地修改後會以舊 ETag 返回過期內容
+_serialized_responses = {}
+
+def _body_etag(body: bytes) -> str:
+    """由回應字節計算 ETag"""
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+def cacheable_json_response(key, source, build_payload, max_age: int = 0):
+    """
+    帶 ETag 的 JSON 回應：瀏覽器重新驗證時自動帶上 If-None-Match，
+    內容未變則返回不含 body 的 304
+    
+    Args:
+        key: 回應快取鍵
+        source: 回應所依據的不可變數據對象（如快取中的代理快照），換了新對象才重新序列化
+        build_payload: 生成回應內容的函數，只在需要重新序列化時調用
+        max_age: 允許瀏覽器直接使用快取的秒數，0 表示每次都重新驗證
+    """
+    entry = _serialized_responses.get(key)
+    if entry is None or entry[0] is not source:
+        body = _dumps(build_payload())
+        entry = [source, body, _body_etag(body), None, None]
+        _serialized_responses[key] = entry
+    
+    body = entry[1]
+    if len(body) >= GZIP_MIN_SIZE and _accepts_gzip():
+        if entry[3] is None:
+            # mtime=0 使相同內容壓縮出相同字節
+            entry[3] = gzip.compress(body, compresslevel=5, mtime=0)
+            entry[4] = _body_etag(entry[3])
+        response = Response(entry[3], mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+        # ETag 由實際發送的壓縮字節計算，與未壓縮表示自然不同
+        response.set_etag(entry[4])
+    else:
+        response = Response(body, mimetype='application/json')
+        response.set_etag(entry[2])
+    response.vary.add('Accept-Encoding')
+    if max_age:
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
 import csv
 def save_proxies_to_csv(proxies: List[Dict]) -> str:
     """將代理列表存成臨時CSV檔，回傳檔案路徑"""
     fd, path = tempfile.mkstemp(suffix='.csv')
-    with open(path, 'w', encoding='utf-8', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=['ip','port','type','source','is_working'])
+    # 直接使用 mkstemp 返回的描述符並加大緩衝區，整份檔案一次性寫出
+    with open(fd, 'w', encoding='utf-8', newline='', buffering=1 << 20) as f:
+        writer = csv.DictWriter(f, fieldnames=['ip','port','type','source','is_working'],
+                                restval='', extrasaction='ignore')
         writer.writeheader()
-        for p in proxies:
-            writer.writerow({k: p.get(k, '') for k in ['ip','port','type','source','is_working']})
+        writer.writerows(proxies)
     return path
 @app.route('/api/validate', methods=['POST'])
 def api_validate():
     """驗證代理，分有效/無效，回傳統計"""
     proxies = request.json.get('proxies', [])
     result = proxy_tester.validate_proxies(proxies)
-    return jsonify({
+    return json_response({
         'success': True,
         'valid_count': len(result['valid']),
         'invalid_count': len(result['invalid']),
@@ -661,31 +960,43 @@ HTML_TEMPLATE = """
                 resultsDiv.innerHTML = '<div class="error">沒有找到代理</div>';
                 return;
             }
-            let html = `
+            resultsDiv.innerHTML = `
                 <div class="card">
                     <h3>🎯 獲取結果 (共 ${count} 個代理)</h3>
                     <div class="success">成功獲取 ${count} 個代理！</div>
-                    <div class="proxy-list">
+                    <div class="proxy-list"></div>
+                    <button onclick="validateProxies()" style="margin-top: 15px;">🧪 驗證代理有效性</button>
+                </div>
             `;
+            // 逐個建立節點放進 DocumentFragment，最後一次性掛到頁面上，
+            // 避免把上萬個代理拼成一個巨大的 HTML 字串再整段解析
+            const fragment = document.createDocumentFragment();
             proxies.forEach(proxy => {
+                const item = document.createElement('div');
+                item.className = 'proxy-item';
+                const address = document.createElement('strong');
                 const protocol = proxy.type !== 'unknown' ? proxy.type + '://' : '';
-                html += `
-                    <div class="proxy-item">
-                        <strong>${protocol}${proxy.ip}:${proxy.port}</strong>
-                        ${proxy.type !== 'unknown' ? `<span style="margin-left: 15px; color: #666;">類型: ${proxy.type}</span>` : ''}
-                        ${proxy.source ? `<span style="margin-left: 15px; color: #666;">來源: ${proxy.source}</span>` : ''}
-                    </div>
-                `;
+                address.textContent = `${protocol}${proxy.ip}:${proxy.port}`;
+                item.appendChild(address);
+                if (proxy.type !== 'unknown') {
+                    item.appendChild(createDetail(`類型: ${proxy.type}`));
+                }
+                if (proxy.source) {
+                    item.appendChild(createDetail(`來源: ${proxy.source}`));
+                }
+                fragment.appendChild(item);
             });
-            html += `
-                    </div>
-                    <button onclick="validateProxies()" style="margin-top: 15px;">🧪 驗證代理有效性</button>
-                </div>
-            `;
-            resultsDiv.innerHTML = html;
+            resultsDiv.querySelector('.proxy-list').appendChild(fragment);
             window.currentProxies = proxies;
         }
 
+        function createDetail(text) {
+            const span = document.createElement('span');
+            span.style.cssText = 'margin-left: 15px; color: #666;';
+            span.textContent = text;
+            return span;
+        }
+
         async function validateProxies() {
             if (!window.currentProxies) {
                 alert('請先獲取代理列表');
@@ -857,7 +1168,9 @@ def index():
 @app.route('/api/countries')
 def api_countries():
     """獲取可用國家列表"""
-    return jsonify(proxy_tester.get_available_countries())
+    # 國家列表在進程生命週期內不變，允許瀏覽器快取一小時
+    return cacheable_json_response('countries', proxy_tester.countries,
+                                   proxy_tester.get_available_countries, max_age=3600)
 
 @app.route('/api/proxies')
 def api_proxies():
@@ -867,46 +1180,57 @@ def api_proxies():
         country = request.args.get('country', '').upper()
         
         if country and country in proxy_tester.countries:
-            # 獲取特定國家的代理
+            # 獲取特定國家的代理（國家列表包含所有類型，type 參數不生效）
+            source_type = f"country-{country}"
+            served_type, served_country = None, country
             proxies = proxy_tester.fetch_proxies_by_country(country)
         else:
             # 獲取指定類型的代理
+            source_type = proxy_type
+            served_type, served_country = proxy_type, None
             proxies = proxy_tester.fetch_proxies_by_type(proxy_type)
         
         if proxies is None:
-            return jsonify({
+            return json_response({
                 'success': False,
                 'error': '獲取代理失敗',
                 'data': [],
                 'count': 0
             })
         
-        return jsonify({
+        # 按快取中的不可變快照序列化，同一快照只序列化一次；
+        # 快照剛好過期時改用這次結果的元組（新對象，必定重新序列化）
+        snapshot = proxy_tester.get_cached_snapshot(source_type)
+        if snapshot is None:
+            snapshot = tuple(proxies)
+        # 回應快取以已驗證的來源為鍵，回應內容也只回顯驗證過的參數，
+        # 任意 type / country 參數不會產生新的快取條目
+        return cacheable_json_response(('proxies', source_type), snapshot, lambda: {
             'success': True,
-            'data': proxies,
-            'count': len(proxies),
-            'type': proxy_type,
-            'country': country if country else None
+            'data': snapshot,
+            'count': len(snapshot),
+            'type': served_type,
+            'country': served_country
         })
     
     except Exception as e:
         logger.error(f"API 錯誤: {e}")
-        return jsonify({
+        return json_response({
             'success': False,
             'error': str(e),
             'data': [],
             'count': 0
-        }), 500
+        }, 500)
 
 @app.route('/api/stats')
 def api_stats():
     """獲取統計資訊"""
     try:
         stats = proxy_tester.get_statistics()
-        return jsonify(stats)
+        return json_response(stats)
     except Exception as e:
         logger.error(f"統計 API 錯誤: {e}")
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 @app.route('/api/multiple-countries')
 def api_multiple_countries():
@@ -914,7 +1238,7 @@ def api_multiple_countries():
     try:
         countries_param = request.args.get('countries', '')
         if not countries_param:
-            return jsonify({
+            return json_response({
                 'success': False,
                 'error': '請提供國家代碼列表（用逗號分隔）',
                 'data': {}
@@ -925,7 +1249,7 @@ def api_multiple_countries():
         
         total_count = sum(len(proxies) for proxies in results.values())
         
-        return jsonify({
+        return json_response({
             'success': True,
             'data': results,
             'total_count': total_count,
@@ -934,15 +1258,18 @@ def api_multiple_countries():
     
     except Exception as e:
         logger.error(f"多國家 API 錯誤: {e}")
-        return jsonify({
+        return json_response({
             'success': False,
             'error': str(e),
             'data': {}
-        }), 500
+        }, 500)
 
-def run_web_server(host='0.0.0.0', port=5000, debug=False):
-    """運行 Web 伺服器"""
+def run_web_server(host='0.0.0.0', port=5000, debug=False, threads=16):
+    """運行 Web 伺服器（非調試模式下優先使用 waitress 生產級 WSGI 伺服器）"""
     logger.info(f"啟動 Web 伺服器: http://{host}:{port}")
+    if waitress_serve is not None and not debug:
+        waitress_serve(app, host=host, port=port, threads=threads)
+        return
     app.run(host=host, port=port, debug=debug, threaded=True)
 
 def main():
@@ -951,6 +1278,7 @@ def main():
     parser.add_argument('--web', action='store_true', help='啟動 Web 介面')
     parser.add_argument('--port', type=int, default=5000, help='Web 伺服器端口')
     parser.add_argument('--host', default='127.0.0.1', help='Web 伺服器主機')
+    parser.add_argument('--threads', type=int, default=16, help='Web 伺服器工作線程數（使用 waitress 時）')
     
     # 現有的命令行參數
     parser.add_argument('--test-type', choices=['all', 'http', 'socks4', 'socks5'], 
@@ -963,7 +1291,7 @@ def main():
     
     if args.web:
         # 啟動 Web 介面
-        run_web_server(host=args.host, port=args.port)
+        run_web_server(host=args.host, port=args.port, threads=args.threads)
     elif args.stats:
         # 顯示統計資訊
         stats = proxy_tester.get_statistics()
@@ -7,22 +7,69 @@ Proxifly 綜合代理 IP 有效性驗證器
 
 import asyncio
 import aiohttp
+import gzip
+import os
 import requests
 import json
 import time
 import logging
-import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Any
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field, asdict
+from collections import Counter
 from concurrent.futures import ThreadPoolExecutor
 import statistics
+from math import fsum, isfinite
 from pathlib import Path
 import csv
 
+try:
+    import orjson
+except ImportError:  # 可選依賴，未安裝時回退到標準庫 json
+    orjson = None
 
-@dataclass
+
+# CSV 導出欄位（順序與 _result_to_row 一致）
+CSV_FIELDNAMES = (
+    'proxy', 'ip', 'port', 'country', 'anonymity', 'type',
+    'overall_score', 'grade', 'recommendation', 'test_duration', 'timestamp',
+    # 連接性結果
+    'connectivity_score', 'http_success', 'https_success',
+    'http_response_time', 'https_response_time',
+    # 性能結果
+    'performance_score', 'small_file_speed', 'medium_file_speed',
+    'large_file_speed', 'consistency_score',
+    # 地理位置結果
+    'geolocation_score', 'country_consistency', 'city_consistency', 'services_tested',
+    # 匿名性結果
+    'anonymity_score', 'anonymity_level', 'leak_count', 'headers_leaked',
+    # 可靠性結果
+    'reliability_score', 'connection_success_rate', 'load_test_success_rate',
+    'uptime_percentage', 'average_response_time',
+)
+
+# 需要按 CSV 規則轉義的文本欄位，其餘欄位均為數值或布爾值
+_CSV_TEXT_FIELDS = (
+    'proxy', 'ip', 'country', 'anonymity', 'type', 'grade', 'recommendation',
+    'timestamp', 'anonymity_level', 'headers_leaked',
+)
+
+# 預先生成的表頭和行模板，每行只需一次 str.format 調用
+CSV_HEADER = ','.join(CSV_FIELDNAMES) + '\n'
+CSV_ROW_FMT = ','.join('{%s}' % name for name in CSV_FIELDNAMES) + '\n'
+
+
+def _csv_escape(value: Optional[str]) -> str:
+    """按 csv.QUOTE_MINIMAL 規則轉義單個文本欄位"""
+    if value is None:
+        return ''
+    if ',' in value or '"' in value or '\n' in value or '\r' in value:
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+@dataclass(slots=True)
 class ProxyInfo:
     """代理基本信息數據類"""
     ip: str
@@ -31,12 +78,16 @@ class ProxyInfo:
     anonymity: Optional[str] = None
     type: Optional[str] = 'http'
     source: Optional[str] = 'proxifly'
+    _str: str = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self._str = f"{self.ip}:{self.port}"
     
     def __str__(self) -> str:
-        return f"{self.ip}:{self.port}"
+        return self._str
 
 
-@dataclass
+@dataclass(slots=True)
 class ConnectivityResult:
     """連接性測試結果"""
     proxy_str: str
@@ -49,7 +100,7 @@ class ConnectivityResult:
     score: float
 
 
-@dataclass
+@dataclass(slots=True)
 class PerformanceResult:
     """性能測試結果"""
     proxy_str: str
@@ -64,7 +115,7 @@ class PerformanceResult:
     score: float
 
 
-@dataclass
+@dataclass(slots=True)
 class GeolocationResult:
     """地理位置驗證結果"""
     proxy_str: str
@@ -77,7 +128,7 @@ class GeolocationResult:
     score: float
 
 
-@dataclass
+@dataclass(slots=True)
 class AnonymityResult:
     """匿名性測試結果"""
     proxy_str: str
@@ -89,9 +140,17 @@ class AnonymityResult:
     anonymity_level: str
     leak_count: int
     score: float
+    _headers_leaked_str: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    
+    @property
+    def headers_leaked_str(self) -> str:
+        """洩露頭部的分號分隔字符串（首次訪問時計算並緩存）"""
+        if self._headers_leaked_str is None:
+            self._headers_leaked_str = ';'.join(self.headers_leaked)
+        return self._headers_leaked_str
 
 
-@dataclass
+@dataclass(slots=True)
 class ReliabilityResult:
     """可靠性測試結果"""
     proxy_str: str
@@ -104,7 +163,7 @@ class ReliabilityResult:
     score: float
 
 
-@dataclass
+@dataclass(slots=True)
 class ComprehensiveResult:
     """綜合驗證結果"""
     proxy_info: ProxyInfo
@@ -118,6 +177,7 @@ class ComprehensiveResult:
     recommendation: str
     test_duration: float
     timestamp: datetime
+    timestamp_iso: str
 
 
 class ComprehensiveProxyValidator:
@@ -133,6 +193,9 @@ class ComprehensiveProxyValidator:
     - 智能評分與分類
     """
     
+    # 可靠性測試中連續探測之間的間隔（秒），設為 0 可在 CI/基準測試中全速運行
+    RELIABILITY_PROBE_INTERVAL = float(os.getenv('PROXY_RELIABILITY_INTERVAL', '0.5'))
+    
     def __init__(self, max_concurrent: int = 50, timeout: int = 30):
         """
         初始化驗證器
@@ -194,7 +257,7 @@ class ComprehensiveProxyValidator:
             }
         }
         
-        self.logger.info(f"ComprehensiveProxyValidator initialized with max_concurrent={max_concurrent}")
+        self.logger.info("ComprehensiveProxyValidator initialized with max_concurrent=%d", max_concurrent)
     
     def _setup_logger(self) -> logging.Logger:
         """設置日誌記錄器"""
@@ -263,7 +326,7 @@ class ComprehensiveProxyValidator:
                     
         except Exception as e:
             errors.append(f"HTTP test failed: {str(e)}")
-            self.logger.warning(f"HTTP connectivity test failed for {proxy_str}: {e}")
+            self.logger.warning("HTTP connectivity test failed for %s: %s", proxy_str, e)
         
         # 測試 HTTPS 連接
         https_start = time.time()
@@ -279,7 +342,7 @@ class ComprehensiveProxyValidator:
                     
         except Exception as e:
             errors.append(f"HTTPS test failed: {str(e)}")
-            self.logger.warning(f"HTTPS connectivity test failed for {proxy_str}: {e}")
+            self.logger.warning("HTTPS connectivity test failed for %s: %s", proxy_str, e)
         
         # 計算分數
         score = self._calculate_connectivity_score(http_time, https_time, http_success, https_success)
@@ -375,7 +438,7 @@ class ComprehensiveProxyValidator:
                             download_speeds.append(0)
                             
                 except Exception as e:
-                    self.logger.warning(f"Performance test failed for {proxy_str} ({size}): {e}")
+                    self.logger.warning("Performance test failed for %s (%s): %s", proxy_str, size, e)
                     download_times.append(float('inf'))
                     download_speeds.append(0)
             
@@ -385,8 +448,8 @@ class ComprehensiveProxyValidator:
             
             if valid_times:
                 results[size] = {
-                    'avg_time': statistics.mean(valid_times),
-                    'avg_speed': statistics.mean(valid_speeds) if valid_speeds else 0
+                    'avg_time': fsum(valid_times) / len(valid_times),
+                    'avg_speed': fsum(valid_speeds) / len(valid_speeds) if valid_speeds else 0
                 }
             else:
                 results[size] = {
@@ -436,7 +499,7 @@ class ComprehensiveProxyValidator:
                 # 計算與期望比例的差異
                 differences = [abs(actual - expected) / expected 
                              for actual, expected in zip(actual_ratio, expected_ratio)]
-                consistency_score = max(0, 1 - statistics.mean(differences))
+                consistency_score = max(0, 1 - fsum(differences) / len(differences))
             else:
                 consistency_score = 0.0
         else:
@@ -444,7 +507,7 @@ class ComprehensiveProxyValidator:
         
         # 抖動率（時間變化的標準差）
         if len(valid_times) > 1:
-            jitter_rate = statistics.stdev(valid_times) / statistics.mean(valid_times)
+            jitter_rate = statistics.stdev(valid_times) / (fsum(valid_times) / len(valid_times))
         else:
             jitter_rate = 1.0
         
@@ -468,7 +531,7 @@ class ComprehensiveProxyValidator:
                 else:
                     scores.append(20)
         
-        return statistics.mean(scores) if scores else 0.0
+        return fsum(scores) / len(scores) if scores else 0.0
     
     async def test_geolocation(self, proxy_info: ProxyInfo) -> GeolocationResult:
         """
@@ -499,7 +562,7 @@ class ComprehensiveProxyValidator:
                             geo_results.append(geo_info)
                             
             except Exception as e:
-                self.logger.warning(f"Geolocation test failed for {proxy_str} ({service_url}): {e}")
+                self.logger.warning("Geolocation test failed for %s (%s): %s", proxy_str, service_url, e)
         
         # 計算一致性指標
         country_consistency, city_consistency, coordinate_variance, avg_coords = \
@@ -557,7 +620,7 @@ class ComprehensiveProxyValidator:
                     'isp': data.get('isp')
                 }
         except Exception as e:
-            self.logger.warning(f"Failed to parse geolocation response: {e}")
+            self.logger.warning("Failed to parse geolocation response: %s", e)
             return None
     
     def _calculate_geolocation_consistency(self, results: List[Dict]) -> Tuple[float, float, float, Tuple[float, float]]:
@@ -580,17 +643,17 @@ class ComprehensiveProxyValidator:
         lats = [r.get('lat') for r in results if r.get('lat') is not None]
         lons = [r.get('lon') for r in results if r.get('lon') is not None]
         
+        # 平均坐標
+        avg_lat = fsum(lats) / len(lats) if lats else 0.0
+        avg_lon = fsum(lons) / len(lons) if lons else 0.0
+        
         if len(lats) > 1 and len(lons) > 1:
-            lat_variance = statistics.stdev(lats) / statistics.mean(lats) if statistics.mean(lats) != 0 else 0
-            lon_variance = statistics.stdev(lons) / statistics.mean(lons) if statistics.mean(lons) != 0 else 0
+            lat_variance = statistics.stdev(lats) / avg_lat if avg_lat != 0 else 0
+            lon_variance = statistics.stdev(lons) / avg_lon if avg_lon != 0 else 0
             coordinate_variance = (lat_variance + lon_variance) / 2
         else:
             coordinate_variance = 0.0
         
-        # 平均坐標
-        avg_lat = statistics.mean(lats) if lats else 0.0
-        avg_lon = statistics.mean(lons) if lons else 0.0
-        
         return float(country_consistency), city_consistency, coordinate_variance, (avg_lat, avg_lon)
     
     def _calculate_location_accuracy(self, results: List[Dict]) -> float:
@@ -605,7 +668,7 @@ class ComprehensiveProxyValidator:
             completeness = sum(1 for field in required_fields if result.get(field)) / len(required_fields)
             completeness_scores.append(completeness)
         
-        return statistics.mean(completeness_scores) * 100 if completeness_scores else 0.0
+        return fsum(completeness_scores) / len(completeness_scores) * 100 if completeness_scores else 0.0
     
     def _calculate_geolocation_score(self, country_consistency: float, city_consistency: float,
                                    coordinate_variance: float, location_accuracy: float) -> float:
@@ -674,7 +737,7 @@ class ComprehensiveProxyValidator:
                     # 這裡可以添加更複雜的 IP 洩露檢測邏輯
                     
         except Exception as e:
-            self.logger.warning(f"Anonymity test failed for {proxy_str}: {e}")
+            self.logger.warning("Anonymity test failed for %s: %s", proxy_str, e)
         
         # 確定匿名等級
         leak_count = len(headers_leaked) + int(dns_leak) + int(webrtc_leak) + int(timezone_mismatch) + int(language_mismatch)
@@ -736,7 +799,8 @@ class ComprehensiveProxyValidator:
         connection_successes = 0
         response_times = []
         
-        for i in range(10):
+        probe_count = 10
+        for i in range(probe_count):
             try:
                 start_time = time.time()
                 async with self.session.get(
@@ -751,7 +815,9 @@ class ComprehensiveProxyValidator:
             except Exception:
                 pass
             
-            await asyncio.sleep(0.5)  # 短暫間隔
+            # 短暫間隔；最後一次探測之後不需要再等
+            if self.RELIABILITY_PROBE_INTERVAL and i < probe_count - 1:
+                await asyncio.sleep(self.RELIABILITY_PROBE_INTERVAL)
         
         # 負載測試（簡化版）
         load_test_successes = 0
@@ -774,11 +840,11 @@ class ComprehensiveProxyValidator:
         load_test_successes = sum(load_results)
         
         # 計算各項指標
-        connection_success_rate = connection_successes / 10
+        connection_success_rate = connection_successes / probe_count
         load_test_success_rate = load_test_successes / concurrent_tests
         error_recovery_rate = 1.0  # 簡化處理
         uptime_percentage = connection_success_rate * 100
-        average_response_time = statistics.mean(response_times) if response_times else float('inf')
+        average_response_time = fsum(response_times) / len(response_times) if response_times else float('inf')
         stability_score = self._calculate_stability_score(response_times)
         
         # 計算總體可靠性分數
@@ -806,7 +872,7 @@ class ComprehensiveProxyValidator:
             return 0.0
         
         # 計算變異係數（標準差/平均值）
-        mean_time = statistics.mean(response_times)
+        mean_time = fsum(response_times) / len(response_times)
         if mean_time == 0:
             return 0.0
         
@@ -844,7 +910,7 @@ class ComprehensiveProxyValidator:
             ComprehensiveResult: 綜合驗證結果
         """
         start_time = time.time()
-        self.logger.info(f"Starting comprehensive validation for {proxy_info}")
+        self.logger.info("Starting comprehensive validation for %s", proxy_info)
         
         try:
             # 並行執行所有測試
@@ -877,6 +943,7 @@ class ComprehensiveProxyValidator:
             recommendation = self._get_recommendation(overall_score)
             
             test_duration = time.time() - start_time
+            timestamp = datetime.now()
             
             result = ComprehensiveResult(
                 proxy_info=proxy_info,
@@ -889,14 +956,15 @@ class ComprehensiveProxyValidator:
                 grade=grade,
                 recommendation=recommendation,
                 test_duration=test_duration,
-                timestamp=datetime.now()
+                timestamp=timestamp,
+                timestamp_iso=timestamp.isoformat()
             )
             
-            self.logger.info(f"Completed validation for {proxy_info} - Score: {overall_score:.1f}, Grade: {grade}")
+            self.logger.info("Completed validation for %s - Score: %.1f, Grade: %s", proxy_info, overall_score, grade)
             return result
             
         except Exception as e:
-            self.logger.error(f"Comprehensive validation failed for {proxy_info}: {e}")
+            self.logger.error("Comprehensive validation failed for %s: %s", proxy_info, e)
             raise
     
     def _calculate_overall_score(self, scores: Dict[str, float]) -> float:
@@ -946,17 +1014,19 @@ class ComprehensiveProxyValidator:
         else:
             return "品質不合格，不建議使用"
     
-    async def validate_proxies_batch(self, proxy_list: List[ProxyInfo]) -> List[ComprehensiveResult]:
+    async def validate_proxies_batch(self, proxy_list: List[ProxyInfo],
+                                     quiet: bool = False) -> List[ComprehensiveResult]:
         """
         批量驗證代理
         
         Args:
             proxy_list: 代理列表
+            quiet: 為 True 時在驗證期間將日誌級別提升到 WARNING，跳過逐個代理的 INFO 日誌
             
         Returns:
             List[ComprehensiveResult]: 綜合驗證結果列表
         """
-        self.logger.info(f"Starting batch validation for {len(proxy_list)} proxies")
+        self.logger.info("Starting batch validation for %d proxies", len(proxy_list))
         
         # 使用信號量控制並發數
         semaphore = asyncio.Semaphore(self.max_concurrent)
@@ -966,19 +1036,25 @@ class ComprehensiveProxyValidator:
                 try:
                     return await self.validate_proxy(proxy_info)
                 except Exception as e:
-                    self.logger.error(f"Batch validation failed for {proxy_info}: {e}")
+                    self.logger.error("Batch validation failed for %s: %s", proxy_info, e)
                     return None
         
         # 創建所有驗證任務
         tasks = [validate_with_semaphore(proxy) for proxy in proxy_list]
         
-        # 執行所有任務
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # 執行所有任務（validate_with_semaphore 已捕獲異常並返回 None）
+        previous_level = self.logger.level
+        if quiet:
+            self.logger.setLevel(logging.WARNING)
+        try:
+            results = await asyncio.gather(*tasks)
+        finally:
+            self.logger.setLevel(previous_level)
         
         # 過濾掉失敗的結果
-        valid_results = [result for result in results if result is not None and not isinstance(result, Exception)]
+        valid_results = [result for result in results if result is not None]
         
-        self.logger.info(f"Completed batch validation - Success: {len(valid_results)}/{len(proxy_list)}")
+        self.logger.info("Completed batch validation - Success: %d/%d", len(valid_results), len(proxy_list))
         return valid_results
     
     def save_results_to_csv(self, results: List[ComprehensiveResult], filename: str):
@@ -987,61 +1063,174 @@ class ComprehensiveProxyValidator:
         
         Args:
             results: 驗證結果列表
-            filename: 輸出文件名
+            filename: 輸出文件名（以 .gz 結尾時寫入 gzip 壓縮文件）
         """
-        rows = []
+        if not results:
+            self.logger.warning("No results to save")
+            return
         
-        for result in results:
-            row = {
-                'proxy': str(result.proxy_info),
-                'ip': result.proxy_info.ip,
-                'port': result.proxy_info.port,
-                'country': result.proxy_info.country,
-                'anonymity': result.proxy_info.anonymity,
-                'type': result.proxy_info.type,
-                'overall_score': result.overall_score,
-                'grade': result.grade,
-                'recommendation': result.recommendation,
-                'test_duration': result.test_duration,
-                'timestamp': result.timestamp.isoformat(),
-                # 連接性結果
-                'connectivity_score': result.connectivity.score,
-                'http_success': result.connectivity.http_success,
-                'https_success': result.connectivity.https_success,
-                'http_response_time': result.connectivity.http_response_time,
-                'https_response_time': result.connectivity.https_response_time,
-                # 性能結果
-                'performance_score': result.performance.score,
-                'small_file_speed': result.performance.small_file_speed,
-                'medium_file_speed': result.performance.medium_file_speed,
-                'large_file_speed': result.performance.large_file_speed,
-                'consistency_score': result.performance.consistency_score,
-                # 地理位置結果
-                'geolocation_score': result.geolocation.score,
-                'country_consistency': result.geolocation.country_consistency,
-                'city_consistency': result.geolocation.city_consistency,
-                'services_tested': result.geolocation.services_tested,
-                # 匿名性結果
-                'anonymity_score': result.anonymity.score,
-                'anonymity_level': result.anonymity.anonymity_level,
-                'leak_count': result.anonymity.leak_count,
-                'headers_leaked': ';'.join(result.anonymity.headers_leaked),
-                # 可靠性結果
-                'reliability_score': result.reliability.score,
-                'connection_success_rate': result.reliability.connection_success_rate,
-                'load_test_success_rate': result.reliability.load_test_success_rate,
-                'uptime_percentage': result.reliability.uptime_percentage,
-                'average_response_time': result.reliability.average_response_time
-            }
-            rows.append(row)
+        row_fmt = CSV_ROW_FMT.format
         
-        # 寫入 CSV 文件
-        if rows:
-            df = pd.DataFrame(rows)
-            df.to_csv(filename, index=False, encoding='utf-8')
-            self.logger.info(f"Results saved to {filename}")
+        # .gz 文件使用最低壓縮級別，速度遠快於默認級別 9
+        if filename.endswith('.gz'):
+            f = gzip.open(filename, 'wt', encoding='utf-8', newline='', compresslevel=1)
         else:
+            f = open(filename, 'w', encoding='utf-8', newline='', buffering=1 << 20)
+        with f:
+            f.write(CSV_HEADER)
+            for result in results:
+                row = self._result_to_row(result)
+                for name in _CSV_TEXT_FIELDS:
+                    row[name] = _csv_escape(row[name])
+                f.write(row_fmt(**row))
+        
+        self.logger.info("Results saved to %s", filename)
+    
+    def save_results_to_jsonl(self, results: List[ComprehensiveResult], filename: str):
+        """
+        將驗證結果保存為 JSON Lines 文件（每行一個結果）
+        
+        安裝了 orjson 時使用其 C 級編碼，否則回退到標準庫 json；
+        失敗測試留下的 inf / nan 寫成 null，兩種後端輸出相同的合法 JSON。
+        
+        Args:
+            results: 驗證結果列表
+            filename: 輸出文件名
+        """
+        if not results:
             self.logger.warning("No results to save")
+            return
+        
+        with open(filename, 'wb', buffering=1 << 20) as f:
+            if orjson is not None:
+                for result in results:
+                    f.write(orjson.dumps(self._result_to_json_row(result), option=orjson.OPT_APPEND_NEWLINE))
+            else:
+                for result in results:
+                    f.write(json.dumps(self._result_to_json_row(result), ensure_ascii=False,
+                                       separators=(',', ':'), allow_nan=False).encode('utf-8'))
+                    f.write(b'\n')
+        
+        self.logger.info("Results saved to %s", filename)
+    
+    def _result_to_row(self, result: ComprehensiveResult) -> Dict[str, Any]:
+        """將單個結果轉換為與 CSV 欄位一致的扁平字典"""
+        info = result.proxy_info
+        conn = result.connectivity
+        perf = result.performance
+        geo = result.geolocation
+        anon = result.anonymity
+        rel = result.reliability
+        return {
+            'proxy': str(info),
+            'ip': info.ip,
+            'port': info.port,
+            'country': info.country,
+            'anonymity': info.anonymity,
+            'type': info.type,
+            'overall_score': result.overall_score,
+            'grade': result.grade,
+            'recommendation': result.recommendation,
+            'test_duration': result.test_duration,
+            'timestamp': result.timestamp_iso,
+            # 連接性結果
+            'connectivity_score': conn.score,
+            'http_success': conn.http_success,
+            'https_success': conn.https_success,
+            'http_response_time': conn.http_response_time,
+            'https_response_time': conn.https_response_time,
+            # 性能結果
+            'performance_score': perf.score,
+            'small_file_speed': perf.small_file_speed,
+            'medium_file_speed': perf.medium_file_speed,
+            'large_file_speed': perf.large_file_speed,
+            'consistency_score': perf.consistency_score,
+            # 地理位置結果
+            'geolocation_score': geo.score,
+            'country_consistency': geo.country_consistency,
+            'city_consistency': geo.city_consistency,
+            'services_tested': geo.services_tested,
+            # 匿名性結果
+            'anonymity_score': anon.score,
+            'anonymity_level': anon.anonymity_level,
+            'leak_count': anon.leak_count,
+            'headers_leaked': anon.headers_leaked_str,
+            # 可靠性結果
+            'reliability_score': rel.score,
+            'connection_success_rate': rel.connection_success_rate,
+            'load_test_success_rate': rel.load_test_success_rate,
+            'uptime_percentage': rel.uptime_percentage,
+            'average_response_time': rel.average_response_time
+        }
+    
+    def _result_to_json_row(self, result: ComprehensiveResult) -> Dict[str, Any]:
+        """JSON 導出用的扁平字典：非有限浮點數（如失敗測試的 inf）換成 None"""
+        row = self._result_to_row(result)
+        for name, value in row.items():
+            if isinstance(value, float) and not isfinite(value):
+                row[name] = None
+        return row
+    
+    def _to_columns(self, results: List[ComprehensiveResult]) -> Dict[str, np.ndarray]:
+        """
+        將結果列表一次性轉換為按列存儲的數組（SoA）
+        
+        只遍歷一次對象圖，匯總報告的各項統計都基於這些列數組計算。
+        
+        Args:
+            results: 驗證結果列表
+            
+        Returns:
+            Dict[str, np.ndarray]: 列名到數組的映射
+        """
+        n = len(results)
+        
+        overall_score = np.empty(n)
+        grade = np.empty(n, dtype=object)
+        connectivity_score = np.empty(n)
+        http_success = np.empty(n, dtype=bool)
+        http_response_time = np.empty(n)
+        performance_score = np.empty(n)
+        small_file_speed = np.empty(n)
+        geolocation_score = np.empty(n)
+        anonymity_score = np.empty(n)
+        anonymity_level = np.empty(n, dtype=object)
+        reliability_score = np.empty(n)
+        
+        for i, result in enumerate(results):
+            overall_score[i] = result.overall_score
+            grade[i] = result.grade
+            # 連接性結果
+            conn = result.connectivity
+            connectivity_score[i] = conn.score
+            http_success[i] = conn.http_success
+            http_response_time[i] = conn.http_response_time
+            # 性能結果
+            perf = result.performance
+            performance_score[i] = perf.score
+            small_file_speed[i] = perf.small_file_speed
+            # 地理位置結果
+            geolocation_score[i] = result.geolocation.score
+            # 匿名性結果
+            anon = result.anonymity
+            anonymity_score[i] = anon.score
+            anonymity_level[i] = anon.anonymity_level
+            # 可靠性結果
+            reliability_score[i] = result.reliability.score
+        
+        return {
+            'overall_score': overall_score,
+            'grade': grade,
+            'connectivity_score': connectivity_score,
+            'http_success': http_success,
+            'http_response_time': http_response_time,
+            'performance_score': performance_score,
+            'small_file_speed': small_file_speed,
+            'geolocation_score': geolocation_score,
+            'anonymity_score': anonymity_score,
+            'anonymity_level': anonymity_level,
+            'reliability_score': reliability_score
+        }
     
     def generate_summary_report(self, results: List[ComprehensiveResult]) -> Dict[str, Any]:
         """
@@ -1057,35 +1246,34 @@ class ComprehensiveProxyValidator:
             return {}
         
         total_proxies = len(results)
+        columns = self._to_columns(results)
         
         # 統計各等級數量
-        grade_counts = {}
-        for result in results:
-            grade = result.grade
-            grade_counts[grade] = grade_counts.get(grade, 0) + 1
+        grade_counts = dict(Counter(columns['grade']))
         
         # 計算平均得分
+        overall = columns['overall_score']
         avg_scores = {
-            'overall': statistics.mean([r.overall_score for r in results]),
-            'connectivity': statistics.mean([r.connectivity.score for r in results]),
-            'performance': statistics.mean([r.performance.score for r in results]),
-            'geolocation': statistics.mean([r.geolocation.score for r in results]),
-            'anonymity': statistics.mean([r.anonymity.score for r in results]),
-            'reliability': statistics.mean([r.reliability.score for r in results])
+            'overall': float(overall.mean()),
+            'connectivity': float(columns['connectivity_score'].mean()),
+            'performance': float(columns['performance_score'].mean()),
+            'geolocation': float(columns['geolocation_score'].mean()),
+            'anonymity': float(columns['anonymity_score'].mean()),
+            'reliability': float(columns['reliability_score'].mean())
         }
         
         # 統計匿名等級
-        anonymity_levels = {}
-        for result in results:
-            level = result.anonymity.anonymity_level
-            anonymity_levels[level] = anonymity_levels.get(level, 0) + 1
+        anonymity_levels = dict(Counter(columns['anonymity_level']))
         
         # 性能統計
-        response_times = [r.connectivity.http_response_time for r in results if r.connectivity.http_success]
-        avg_response_time = statistics.mean(response_times) if response_times else 0
+        http_success = columns['http_success']
+        successful_connections = int(http_success.sum())
+        response_times = columns['http_response_time'][http_success]
+        avg_response_time = float(response_times.mean()) if response_times.size else 0
         
-        speeds = [r.performance.small_file_speed for r in results if r.performance.small_file_speed > 0]
-        avg_speed = statistics.mean(speeds) if speeds else 0
+        speeds = columns['small_file_speed']
+        speeds = speeds[speeds > 0]
+        avg_speed = float(speeds.mean()) if speeds.size else 0
         
         report = {
             'summary': {
@@ -1098,14 +1286,14 @@ class ComprehensiveProxyValidator:
             'performance_metrics': {
                 'average_response_time': avg_response_time,
                 'average_speed_kbps': avg_speed,
-                'successful_connections': sum(1 for r in results if r.connectivity.http_success),
-                'success_rate': sum(1 for r in results if r.connectivity.http_success) / total_proxies
+                'successful_connections': successful_connections,
+                'success_rate': successful_connections / total_proxies
             },
             'quality_analysis': {
-                'high_quality_count': sum(1 for r in results if r.overall_score >= 80),
-                'medium_quality_count': sum(1 for r in results if 60 <= r.overall_score < 80),
-                'low_quality_count': sum(1 for r in results if r.overall_score < 60),
-                'recommended_count': sum(1 for r in results if r.overall_score >= 70)
+                'high_quality_count': int((overall >= 80).sum()),
+                'medium_quality_count': int(((overall >= 60) & (overall < 80)).sum()),
+                'low_quality_count': int((overall < 60).sum()),
+                'recommended_count': int((overall >= 70).sum())
             }
         }
         
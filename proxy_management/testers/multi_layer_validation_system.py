@@ -17,18 +17,120 @@ import aiohttp
 import json
 import time
 import logging
-import statistics
+import math
+import random
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from math import fsum
 from typing import Dict, List, Optional, Tuple, Any, Union
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 import numpy as np
 from abc import ABC, abstractmethod
 
+try:
+    from numba import njit
+except ImportError:  # 可選依賴，未安裝時內核以普通 Python 函數運行
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+try:
+    import orjson
+except ImportError:  # 可選依賴，未安裝時回退到標準庫 json
+    orjson = None
+
+
+# 重試也無法恢復的錯誤（URL 無效、代理拒絕連接或返回代理錯誤），遇到時直接放棄
+_NON_RETRYABLE = (
+    aiohttp.InvalidURL,
+    aiohttp.ClientProxyConnectionError,
+    aiohttp.ClientHttpProxyError,
+)
+
+
+# 除 nnan/ninf 外的 fastmath 標誌：內核需要正確處理 inf（失敗的測試）
+_FASTMATH = {'nsz', 'arcp', 'contract', 'afn', 'reassoc'}
+
+
+@njit(cache=True, fastmath=_FASTMATH)
+def _coefficient_of_variation(values: np.ndarray) -> float:
+    """樣本變異係數（標準差 / 平均值），調用方保證至少兩個元素且平均值非零"""
+    n = values.size
+    mean = values.sum() / n
+    squares = 0.0
+    for value in values:
+        squares += (value - mean) * (value - mean)
+    return np.sqrt(squares / (n - 1)) / mean
+
+
+@njit(cache=True, fastmath=_FASTMATH)
+def _consistency_kernel(speeds: np.ndarray) -> float:
+    """按文件大小順序的速度數組 -> 一致性分數（0-100）"""
+    valid_speeds = speeds[speeds > 0]
+    if valid_speeds.size < 2 or valid_speeds.sum() == 0:
+        return 0.0
+    return max(0.0, 1 - _coefficient_of_variation(valid_speeds)) * 100
+
+
+@njit(cache=True, fastmath=_FASTMATH)
+def _jitter_kernel(times: np.ndarray) -> float:
+    """響應時間數組 -> 抖動係數，有效樣本不足時返回 1.0"""
+    valid_times = times[np.isfinite(times)]
+    if valid_times.size < 2 or valid_times.sum() == 0:
+        return 1.0
+    return _coefficient_of_variation(valid_times)
+
+
+@njit(cache=True, fastmath=_FASTMATH)
+def _stability_kernel(speeds: np.ndarray) -> float:
+    """速度數組 -> 吞吐量穩定性分數（最近三次均值與整體均值的偏差）"""
+    valid_speeds = speeds[speeds > 0]
+    if valid_speeds.size < 2:
+        return 0.0
+    
+    if valid_speeds.size >= 3:
+        recent_avg = valid_speeds[-3:].sum() / 3
+        overall_avg = valid_speeds.sum() / valid_speeds.size
+        
+        if overall_avg > 0:
+            stability = 1 - abs(recent_avg - overall_avg) / overall_avg
+            return max(0.0, stability) * 100
+    
+    return 50.0  # 默認中等穩定性
+
+
+# 導入時預先編譯內核，避免首個代理的驗證被 JIT 編譯阻塞（cache=True 時後續進程直接讀取緩存）
+try:
+    _consistency_kernel(np.array([1.0, 2.0, 3.0]))
+    _jitter_kernel(np.array([0.1, 0.2, 0.3]))
+    _stability_kernel(np.array([1.0, 2.0, 3.0]))
+except Exception:  # 預熱失敗不影響導入，首次調用時再編譯
+    pass
+
+
+@lru_cache(maxsize=8192)
+def _proxy_url(proxy_type: str, ip: str, port: int) -> str:
+    """生成代理 URL（按代理緩存，避免每次請求重複格式化）"""
+    return f"{proxy_type}://{ip}:{port}"
+
+
+def _finite_or_none(value):
+    """把 inf / nan 換成 None（JSON 的 null），遞歸處理字典與列表，使 orjson 與標準庫輸出一致"""
+    if isinstance(value, (float, np.floating)):
+        return float(value) if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite_or_none(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite_or_none(item) for item in value]
+    return value
+
 
 # ==================== 基礎數據結構 ====================
 
-@dataclass
+@dataclass(slots=True)
 class ValidationConfig:
     """驗證配置類"""
     timeout: int = 30
@@ -39,7 +141,7 @@ class ValidationConfig:
     cache_ttl: int = 3600  # 秒
 
 
-@dataclass
+@dataclass(slots=True)
 class ValidationResult:
     """基礎驗證結果"""
     layer_name: str
@@ -49,10 +151,15 @@ class ValidationResult:
     details: Dict[str, Any]
     errors: List[str]
     execution_time: float
-    timestamp: datetime
+    timestamp: int = 0  # time.time_ns()，僅在展示時格式化
+    
+    @property
+    def timestamp_iso(self) -> str:
+        """ISO 格式的時間戳"""
+        return datetime.fromtimestamp(self.timestamp / 1e9).isoformat()
 
 
-@dataclass
+@dataclass(slots=True)
 class Layer1ConnectivityResult(ValidationResult):
     """第一層：連接性驗證結果"""
     http_success: bool = False
@@ -63,7 +170,7 @@ class Layer1ConnectivityResult(ValidationResult):
     tcp_connection_time: float = float('inf')
 
 
-@dataclass
+@dataclass(slots=True)
 class Layer2PerformanceResult(ValidationResult):
     """第二層：性能分析結果"""
     download_speeds: Dict[str, float] = None  # kbps
@@ -79,7 +186,7 @@ class Layer2PerformanceResult(ValidationResult):
             self.response_times = {}
 
 
-@dataclass
+@dataclass(slots=True)
 class Layer3GeolocationResult(ValidationResult):
     """第三層：地理位置驗證結果"""
     country_consensus: Optional[str] = None
@@ -93,7 +200,7 @@ class Layer3GeolocationResult(ValidationResult):
     location_accuracy_score: float = 0.0
 
 
-@dataclass
+@dataclass(slots=True)
 class Layer4AnonymityResult(ValidationResult):
     """第四層：匿名性測試結果"""
     anonymity_level: str = "unknown"
@@ -111,7 +218,7 @@ class Layer4AnonymityResult(ValidationResult):
             self.headers_leaked = []
 
 
-@dataclass
+@dataclass(slots=True)
 class Layer5ReliabilityResult(ValidationResult):
     """第五層：可靠性評估結果"""
     connection_stability: float = 0.0
@@ -124,7 +231,7 @@ class Layer5ReliabilityResult(ValidationResult):
     endurance_test_passed: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class Layer6ClassificationResult(ValidationResult):
     """第六層：智能分類結果"""
     final_grade: str = "F"
@@ -139,15 +246,38 @@ class Layer6ClassificationResult(ValidationResult):
             self.use_case_suitability = {}
 
 
+@dataclass(slots=True)
+class BatchReport:
+    """批量驗證報告：按列存放的數組，行對應代理，層次列按 layer_order 排列"""
+    proxies: List['ProxyInfo']
+    layer_order: Tuple[str, ...]
+    scores: np.ndarray           # (N, 層數) 各層分數
+    success: np.ndarray          # (N, 層數) 各層是否成功
+    present: np.ndarray          # (N, 層數) 該層是否產出結果
+    execution_times: np.ndarray  # (N, 層數) 各層耗時（秒）
+    weighted_scores: np.ndarray  # (N,) 加權總分
+    grades: np.ndarray           # (N,) 等級
+    
+    def grade_counts(self) -> Dict[str, int]:
+        """各等級的代理數量"""
+        labels, counts = np.unique(self.grades, return_counts=True)
+        return dict(zip(labels.tolist(), counts.tolist()))
+
+
 # ==================== 抽象驗證器基類 ====================
 
 class BaseValidator(ABC):
     """驗證器基類"""
     
-    def __init__(self, config: ValidationConfig, logger: logging.Logger = None):
+    def __init__(self, config: ValidationConfig, logger: logging.Logger = None,
+                 session: Optional[aiohttp.ClientSession] = None):
         self.config = config
         self.logger = logger or self._setup_logger()
-        self.session = None
+        # 外部注入的會話由調用方管理生命週期
+        self.session = session
+        self._owns_session = False
+        # 限制同時在途請求數的信號量，由多層驗證系統替換為各層共享的實例
+        self.shared_sem = asyncio.Semaphore(config.concurrent_limit)
         
     def _setup_logger(self) -> logging.Logger:
         """設置日誌記錄器"""
@@ -164,23 +294,74 @@ class BaseValidator(ABC):
         
         return logger
     
+    def _retry_delay(self, attempt: int) -> float:
+        """指數退避加隨機抖動的重試等待時間"""
+        return self.config.retry_delay * (2 ** attempt) * (0.5 + random.random())
+    
+    @asynccontextmanager
+    async def _guarded_get(self, url: str, **kwargs):
+        """
+        在共享信號量限制下發起 GET 請求
+        
+        產出 (響應, 請求開始時間)；計時從取得信號量之後開始，排隊時間不計入響應時間。
+        響應處理完畢後才釋放名額。
+        """
+        async with self.shared_sem:
+            start_time = time.time()
+            async with self.session.get(url, **kwargs) as response:
+                yield response, start_time
+    
+    async def _probe(self, url: str, proxy: str, expected: int,
+                     timeout: aiohttp.ClientTimeout, attempts: Optional[int] = None) -> Tuple[bool, float]:
+        """
+        只看狀態碼的探測請求，返回 (是否成功, 響應時間)
+        
+        最多嘗試 attempts 次（默認 config.max_retries），異常後按指數退避等待；
+        不可重試的錯誤立即放棄。失敗時響應時間為 inf。
+        """
+        attempts = attempts or self.config.max_retries
+        
+        for attempt in range(attempts):
+            try:
+                async with self._guarded_get(url, proxy=proxy, timeout=timeout) as (response, start_time):
+                    response_time = time.time() - start_time
+                    response.release()  # 只需狀態碼，不讀取響應體
+                    
+                    if response.status == expected:
+                        return True, response_time
+                    
+            except _NON_RETRYABLE as e:
+                self.logger.warning("Probe %s failed without retry: %s", url, e)
+                break
+            
+            except Exception as e:
+                self.logger.warning("Probe %s attempt %d failed: %s", url, attempt + 1, e)
+                if attempt < attempts - 1:
+                    await asyncio.sleep(self._retry_delay(attempt))
+        
+        return False, float('inf')
+    
     @abstractmethod
     async def validate(self, proxy_info: 'ProxyInfo') -> ValidationResult:
         """執行驗證"""
         pass
     
     async def __aenter__(self):
-        """異步上下文管理器進入"""
-        self.session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=self.config.timeout),
-            connector=aiohttp.TCPConnector(limit=self.config.concurrent_limit)
-        )
+        """異步上下文管理器進入（已注入外部會話時直接復用）"""
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.config.timeout),
+                connector=aiohttp.TCPConnector(limit=0)  # 併發由 shared_sem 控制
+            )
+            self._owns_session = True
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """異步上下文管理器退出"""
-        if self.session:
+        """異步上下文管理器退出（只關閉自己創建的會話）"""
+        if self._owns_session and self.session:
             await self.session.close()
+            self.session = None
+            self._owns_session = False
 
 
 # ==================== 第一層：基礎連接性驗證 ====================
@@ -188,8 +369,20 @@ class BaseValidator(ABC):
 class ConnectivityValidator(BaseValidator):
     """基礎連接性驗證器"""
     
-    def __init__(self, config: ValidationConfig):
-        super().__init__(config)
+    # 響應時間分檔（秒）：時間 <= 第 i 個邊界時得到第 i 檔分數，超出所有邊界得最後一檔
+    _HTTP_BUCKETS = np.array([1.0, 3.0, 5.0])
+    _HTTP_POINTS = np.array([30.0, 25.0, 20.0, 15.0])
+    _DNS_BUCKETS = np.array([0.5, 1.0])
+    _DNS_POINTS = np.array([20.0, 15.0, 10.0])
+    _TCP_BUCKETS = np.array([0.3, 0.5])
+    _TCP_POINTS = np.array([20.0, 15.0, 10.0])
+    
+    # 請求超時配置（共享實例，避免每次請求重新創建）
+    _PROBE_TIMEOUT = aiohttp.ClientTimeout(total=10)
+    _QUICK_PROBE_TIMEOUT = aiohttp.ClientTimeout(total=5)
+    
+    def __init__(self, config: ValidationConfig, session: Optional[aiohttp.ClientSession] = None):
+        super().__init__(config, session=session)
         self.test_endpoints = {
             'http': 'http://httpbin.org/ip',
             'https': 'https://www.google.com/generate_204',
@@ -213,26 +406,21 @@ class ConnectivityValidator(BaseValidator):
         
         errors = []
         
-        try:
-            # HTTP 連接測試
-            http_result = await self._test_http_connectivity(proxy_info)
-            results.update(http_result)
-            
-            # HTTPS 連接測試
-            https_result = await self._test_https_connectivity(proxy_info)
-            results.update(https_result)
-            
-            # DNS 解析測試
-            dns_result = await self._test_dns_resolution(proxy_info)
-            results.update(dns_result)
-            
-            # TCP 連接測試
-            tcp_result = await self._test_tcp_connection(proxy_info)
-            results.update(tcp_result)
-            
-        except Exception as e:
-            errors.append(f"Connectivity validation error: {str(e)}")
-            self.logger.error(f"Connectivity validation failed for {proxy_str}: {e}")
+        # HTTP / HTTPS / DNS / TCP 測試互不依賴，並行執行
+        probe_results = await asyncio.gather(
+            self._test_http_connectivity(proxy_info),
+            self._test_https_connectivity(proxy_info),
+            self._test_dns_resolution(proxy_info),
+            self._test_tcp_connection(proxy_info),
+            return_exceptions=True
+        )
+        
+        for probe_result in probe_results:
+            if isinstance(probe_result, Exception):
+                errors.append(f"Connectivity validation error: {str(probe_result)}")
+                self.logger.error("Connectivity validation failed for %s: %s", proxy_str, probe_result)
+            else:
+                results.update(probe_result)
         
         # 計算分數
         score = self._calculate_connectivity_score(results)
@@ -248,163 +436,67 @@ class ConnectivityValidator(BaseValidator):
             details=results,
             errors=errors,
             execution_time=execution_time,
-            timestamp=datetime.now(),
+            timestamp=time.time_ns(),
             **results
         )
     
     async def _test_http_connectivity(self, proxy_info: 'ProxyInfo') -> Dict[str, Any]:
         """測試 HTTP 連接"""
-        proxy_dict = self._get_proxy_dict(proxy_info)
-        
-        for attempt in range(self.config.max_retries):
-            try:
-                start_time = time.time()
-                async with self.session.get(
-                    self.test_endpoints['http'],
-                    proxy=proxy_dict['http'],
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as response:
-                    response_time = time.time() - start_time
-                    
-                    if response.status == 200:
-                        return {
-                            'http_success': True,
-                            'http_response_time': response_time
-                        }
-                    
-            except Exception as e:
-                self.logger.warning(f"HTTP connectivity test attempt {attempt + 1} failed: {e}")
-                if attempt < self.config.max_retries - 1:
-                    await asyncio.sleep(self.config.retry_delay)
-        
-        return {'http_success': False, 'http_response_time': float('inf')}
+        proxy_url = _proxy_url(proxy_info.type, proxy_info.ip, proxy_info.port)
+        ok, response_time = await self._probe(self.test_endpoints['http'], proxy_url, 200, self._PROBE_TIMEOUT)
+        return {'http_success': ok, 'http_response_time': response_time}
     
     async def _test_https_connectivity(self, proxy_info: 'ProxyInfo') -> Dict[str, Any]:
         """測試 HTTPS 連接"""
-        proxy_dict = self._get_proxy_dict(proxy_info)
-        
-        for attempt in range(self.config.max_retries):
-            try:
-                start_time = time.time()
-                async with self.session.get(
-                    self.test_endpoints['https'],
-                    proxy=proxy_dict['https'],
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as response:
-                    response_time = time.time() - start_time
-                    
-                    if response.status == 204:  # Google generate_204 returns 204
-                        return {
-                            'https_success': True,
-                            'https_response_time': response_time
-                        }
-                    
-            except Exception as e:
-                self.logger.warning(f"HTTPS connectivity test attempt {attempt + 1} failed: {e}")
-                if attempt < self.config.max_retries - 1:
-                    await asyncio.sleep(self.config.retry_delay)
-        
-        return {'https_success': False, 'https_response_time': float('inf')}
+        proxy_url = _proxy_url(proxy_info.type, proxy_info.ip, proxy_info.port)
+        # Google generate_204 returns 204
+        ok, response_time = await self._probe(self.test_endpoints['https'], proxy_url, 204, self._PROBE_TIMEOUT)
+        return {'https_success': ok, 'https_response_time': response_time}
     
     async def _test_dns_resolution(self, proxy_info: 'ProxyInfo') -> Dict[str, Any]:
         """測試 DNS 解析"""
-        proxy_dict = self._get_proxy_dict(proxy_info)
-        
-        try:
-            start_time = time.time()
-            async with self.session.get(
-                self.test_endpoints['dns'],
-                proxy=proxy_dict['http'],
-                timeout=aiohttp.ClientTimeout(total=5)
-            ) as response:
-                response_time = time.time() - start_time
-                
-                if response.status == 200:
-                    return {'dns_resolution_time': response_time}
-                    
-        except Exception as e:
-            self.logger.warning(f"DNS resolution test failed: {e}")
-        
-        return {'dns_resolution_time': float('inf')}
+        proxy_url = _proxy_url(proxy_info.type, proxy_info.ip, proxy_info.port)
+        _, response_time = await self._probe(self.test_endpoints['dns'], proxy_url, 200,
+                                             self._QUICK_PROBE_TIMEOUT, attempts=1)
+        return {'dns_resolution_time': response_time}
     
     async def _test_tcp_connection(self, proxy_info: 'ProxyInfo') -> Dict[str, Any]:
         """測試 TCP 連接"""
-        proxy_dict = self._get_proxy_dict(proxy_info)
-        
-        try:
-            start_time = time.time()
-            async with self.session.get(
-                self.test_endpoints['tcp'],
-                proxy=proxy_dict['http'],
-                timeout=aiohttp.ClientTimeout(total=5)
-            ) as response:
-                response_time = time.time() - start_time
-                
-                if response.status == 200:
-                    return {'tcp_connection_time': response_time}
-                    
-        except Exception as e:
-            self.logger.warning(f"TCP connection test failed: {e}")
-        
-        return {'tcp_connection_time': float('inf')}
-    
-    def _get_proxy_dict(self, proxy_info: 'ProxyInfo') -> Dict[str, str]:
-        """生成代理字典"""
-        proxy_url = f"{proxy_info.type}://{proxy_info.ip}:{proxy_info.port}"
-        return {
-            'http': proxy_url,
-            'https': proxy_url
-        }
+        proxy_url = _proxy_url(proxy_info.type, proxy_info.ip, proxy_info.port)
+        _, response_time = await self._probe(self.test_endpoints['tcp'], proxy_url, 200,
+                                             self._QUICK_PROBE_TIMEOUT, attempts=1)
+        return {'tcp_connection_time': response_time}
     
     def _calculate_connectivity_score(self, results: Dict[str, Any]) -> float:
         """計算連接性分數"""
-        score = 0.0
-        
-        # HTTP 連接分數 (30%)
-        if results['http_success']:
-            http_time = results['http_response_time']
-            if http_time <= 1.0:
-                score += 30.0
-            elif http_time <= 3.0:
-                score += 25.0
-            elif http_time <= 5.0:
-                score += 20.0
-            else:
-                score += 15.0
-        
-        # HTTPS 連接分數 (30%)
-        if results['https_success']:
-            https_time = results['https_response_time']
-            if https_time <= 1.0:
-                score += 30.0
-            elif https_time <= 3.0:
-                score += 25.0
-            elif https_time <= 5.0:
-                score += 20.0
-            else:
-                score += 15.0
-        
-        # DNS 解析分數 (20%)
-        dns_time = results['dns_resolution_time']
-        if dns_time != float('inf'):
-            if dns_time <= 0.5:
-                score += 20.0
-            elif dns_time <= 1.0:
-                score += 15.0
-            else:
-                score += 10.0
-        
-        # TCP 連接分數 (20%)
-        tcp_time = results['tcp_connection_time']
-        if tcp_time != float('inf'):
-            if tcp_time <= 0.3:
-                score += 20.0
-            elif tcp_time <= 0.5:
-                score += 15.0
-            else:
-                score += 10.0
+        http_time = results['http_response_time'] if results['http_success'] else float('inf')
+        https_time = results['https_response_time'] if results['https_success'] else float('inf')
         
-        return min(100.0, score)
+        return float(self.score_batch(
+            [http_time], [https_time],
+            [results['dns_resolution_time']], [results['tcp_connection_time']]
+        )[0])
+    
+    @classmethod
+    def score_batch(cls, http_times, https_times, dns_times, tcp_times) -> np.ndarray:
+        """
+        批量計算連接性分數
+        
+        各參數為等長的響應時間數組（秒），非有限值表示該項測試失敗、不得分。
+        HTTP / HTTPS 各佔 30%，DNS / TCP 各佔 20%。
+        """
+        score = np.zeros(len(http_times))
+        
+        for times, buckets, points in (
+            (http_times, cls._HTTP_BUCKETS, cls._HTTP_POINTS),
+            (https_times, cls._HTTP_BUCKETS, cls._HTTP_POINTS),
+            (dns_times, cls._DNS_BUCKETS, cls._DNS_POINTS),
+            (tcp_times, cls._TCP_BUCKETS, cls._TCP_POINTS),
+        ):
+            times = np.asarray(times, dtype=np.float64)
+            score += np.where(np.isfinite(times), points[np.searchsorted(buckets, times)], 0.0)
+        
+        return np.minimum(score, 100.0)
 
 
 # ==================== 第二層：響應性能分析 ====================
@@ -412,28 +504,34 @@ class ConnectivityValidator(BaseValidator):
 class PerformanceValidator(BaseValidator):
     """性能分析驗證器"""
     
-    def __init__(self, config: ValidationConfig):
-        super().__init__(config)
-        self.file_sizes = {
-            'tiny': 1024,      # 1KB
-            'small': 10240,    # 10KB
-            'medium': 102400,  # 100KB
-            'large': 512000,   # 500KB
-            'xlarge': 1048576  # 1MB
-        }
-        
-        self.performance_endpoints = {
-            size: f'http://httpbin.org/bytes/{byte_size}'
-            for size, byte_size in self.file_sizes.items()
-        }
+    # 平均速度分檔（kbps）：速度 >= 第 i 個邊界時得到第 i+1 檔分數
+    _SPEED_BUCKETS = np.array([50.0, 100.0, 500.0, 1000.0])
+    _SPEED_POINTS = np.array([8.0, 16.0, 24.0, 32.0, 40.0])
+    # 平均響應時間分檔（秒）：時間 <= 第 i 個邊界時得到第 i 檔分數
+    _TIME_BUCKETS = np.array([1.0, 3.0, 5.0])
+    _TIME_POINTS = np.array([30.0, 24.0, 18.0, 12.0])
+    
+    # 下載測試每次讀取的塊大小（字節）及超時配置
+    DOWNLOAD_CHUNK_SIZE = 65536
+    _DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=30)
+    
+    # 測試文件按大小固定排序，速度與時間數組按同一下標存放
+    SIZE_LABELS = ('tiny', 'small', 'medium', 'large', 'xlarge')
+    SIZE_BYTES = np.array([1024, 10240, 102400, 512000, 1048576], dtype=np.int64)  # 1KB ~ 1MB
+    
+    def __init__(self, config: ValidationConfig, session: Optional[aiohttp.ClientSession] = None):
+        super().__init__(config, session=session)
+        self.performance_endpoints = tuple(
+            f'http://httpbin.org/bytes/{byte_size}' for byte_size in self.SIZE_BYTES.tolist()
+        )
     
     async def validate(self, proxy_info: 'ProxyInfo') -> Layer2PerformanceResult:
         """執行性能分析"""
         start_time = time.time()
         proxy_str = str(proxy_info)
         
-        download_speeds = {}
-        response_times = {}
+        speeds = np.zeros(len(self.SIZE_LABELS))
+        times = np.full(len(self.SIZE_LABELS), np.inf)
         consistency_score = 0.0
         jitter_coefficient = 1.0
         throughput_stability = 0.0
@@ -441,28 +539,34 @@ class PerformanceValidator(BaseValidator):
         errors = []
         
         try:
-            # 逐級文件下載測試
-            for size, endpoint in self.performance_endpoints.items():
-                speed, response_time = await self._test_file_download(proxy_info, endpoint, size)
-                download_speeds[size] = speed
-                response_times[size] = response_time
+            # 各級文件下載測試並行執行
+            measurements = await asyncio.gather(*(
+                self._test_file_download(proxy_info, endpoint, size)
+                for size, endpoint in zip(self.SIZE_LABELS, self.performance_endpoints)
+            ))
+            for i, (speed, response_time) in enumerate(measurements):
+                speeds[i] = speed
+                times[i] = response_time
             
             # 計算性能指標
-            consistency_score = self._calculate_consistency(download_speeds)
-            jitter_coefficient = self._calculate_jitter(response_times)
-            throughput_stability = self._calculate_throughput_stability(download_speeds)
+            consistency_score = self._calculate_consistency(speeds)
+            jitter_coefficient = self._calculate_jitter(times)
+            throughput_stability = self._calculate_throughput_stability(speeds)
             
         except Exception as e:
             errors.append(f"Performance validation error: {str(e)}")
-            self.logger.error(f"Performance validation failed for {proxy_str}: {e}")
+            self.logger.error("Performance validation failed for %s: %s", proxy_str, e)
         
         # 計算分數
-        score = self._calculate_performance_score(download_speeds, response_times, 
+        score = self._calculate_performance_score(speeds, times,
                                                consistency_score, jitter_coefficient)
-        success = any(speed > 0 for speed in download_speeds.values())
+        success = bool((speeds > 0).any())
         
         execution_time = time.time() - start_time
         
+        # 字典形式僅用於輸出
+        download_speeds = dict(zip(self.SIZE_LABELS, speeds.tolist()))
+        response_times = dict(zip(self.SIZE_LABELS, times.tolist()))
         details = {
             'download_speeds': download_speeds,
             'response_times': response_times,
@@ -479,7 +583,7 @@ class PerformanceValidator(BaseValidator):
             details=details,
             errors=errors,
             execution_time=execution_time,
-            timestamp=datetime.now(),
+            timestamp=time.time_ns(),
             download_speeds=download_speeds,
             response_times=response_times,
             consistency_score=consistency_score,
@@ -489,158 +593,104 @@ class PerformanceValidator(BaseValidator):
     
     async def _test_file_download(self, proxy_info: 'ProxyInfo', endpoint: str, size: str) -> Tuple[float, float]:
         """測試文件下載"""
-        proxy_dict = self._get_proxy_dict(proxy_info)
+        proxy_url = _proxy_url(proxy_info.type, proxy_info.ip, proxy_info.port)
         download_speeds = []
         response_times = []
         
-        # 進行多次測試取平均值
+        # 並行進行多次測試取平均值
         test_runs = 3
         
-        for attempt in range(test_runs):
-            try:
-                start_time = time.time()
-                async with self.session.get(
-                    endpoint,
-                    proxy=proxy_dict['http'],
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as response:
-                    if response.status == 200:
-                        content = await response.read()
-                        download_time = time.time() - start_time
-                        
-                        # 計算下載速度 (kbps)
-                        file_size_kb = len(content) / 1024
-                        speed_kbps = (file_size_kb * 8) / download_time if download_time > 0 else 0
-                        
-                        download_speeds.append(speed_kbps)
-                        response_times.append(download_time)
-                        
-            except Exception as e:
-                self.logger.warning(f"File download test failed for {size} (attempt {attempt + 1}): {e}")
+        samples = await asyncio.gather(
+            *(self._single_download(endpoint, proxy_url) for _ in range(test_runs)),
+            return_exceptions=True
+        )
+        
+        for attempt, sample in enumerate(samples):
+            if isinstance(sample, Exception):
+                self.logger.warning("File download test failed for %s (attempt %d): %s", size, attempt + 1, sample)
+            elif sample is not None:
+                speed_kbps, download_time = sample
+                download_speeds.append(speed_kbps)
+                response_times.append(download_time)
         
         # 返回平均值
-        avg_speed = statistics.mean(download_speeds) if download_speeds else 0
-        avg_time = statistics.mean(response_times) if response_times else float('inf')
+        avg_speed = fsum(download_speeds) / len(download_speeds) if download_speeds else 0.0
+        avg_time = fsum(response_times) / len(response_times) if response_times else float('inf')
         
         return avg_speed, avg_time
     
-    def _calculate_consistency(self, speeds: Dict[str, float]) -> float:
-        """計算一致性分數"""
-        valid_speeds = [speed for speed in speeds.values() if speed > 0]
-        
-        if len(valid_speeds) < 2:
-            return 0.0
-        
-        # 理想情況下，速度應該與文件大小成正比
-        expected_ratios = [1, 10, 100, 500, 1000]  # 對應文件大小比例
-        actual_speeds = []
-        
-        for size in ['tiny', 'small', 'medium', 'large', 'xlarge']:
-            if size in speeds and speeds[size] > 0:
-                actual_speeds.append(speeds[size])
-        
-        if len(actual_speeds) < 2:
-            return 0.5
-        
-        # 計算速度的一致性（基於變異係數）
-        mean_speed = statistics.mean(actual_speeds)
-        if mean_speed == 0:
-            return 0.0
-        
-        std_dev = statistics.stdev(actual_speeds)
-        coefficient_of_variation = std_dev / mean_speed
-        
-        # 一致性分數 = 1 - 變異係數
-        consistency = max(0, 1 - coefficient_of_variation)
-        return consistency * 100
+    async def _single_download(self, endpoint: str, proxy_url: str) -> Optional[Tuple[float, float]]:
+        """執行一次下載，返回 (速度 kbps, 耗時秒)，非 200 響應返回 None"""
+        async with self._guarded_get(
+            endpoint,
+            proxy=proxy_url,
+            timeout=self._DOWNLOAD_TIMEOUT
+        ) as (response, start_time):
+            if response.status != 200:
+                return None
+            
+            # 分塊讀取，只統計字節數而不保留響應內容
+            received_bytes = 0
+            async for chunk in response.content.iter_chunked(self.DOWNLOAD_CHUNK_SIZE):
+                received_bytes += len(chunk)
+            download_time = time.time() - start_time
+            
+            # 計算下載速度 (kbps)
+            file_size_kb = received_bytes / 1024
+            speed_kbps = (file_size_kb * 8) / download_time if download_time > 0 else 0
+            
+            return speed_kbps, download_time
+    
+    def _calculate_consistency(self, speeds: np.ndarray) -> float:
+        """計算一致性分數（speeds 按 SIZE_LABELS 順序排列）"""
+        return float(_consistency_kernel(speeds))
     
-    def _calculate_jitter(self, response_times: Dict[str, float]) -> float:
+    def _calculate_jitter(self, response_times: np.ndarray) -> float:
         """計算抖動係數"""
-        valid_times = [time for time in response_times.values() if time != float('inf')]
-        
-        if len(valid_times) < 2:
-            return 1.0
-        
-        # 計算變異係數
-        mean_time = statistics.mean(valid_times)
-        if mean_time == 0:
-            return 1.0
-        
-        std_dev = statistics.stdev(valid_times)
-        coefficient_of_variation = std_dev / mean_time
-        
-        return coefficient_of_variation
+        return float(_jitter_kernel(response_times))
     
-    def _calculate_throughput_stability(self, speeds: Dict[str, float]) -> float:
+    def _calculate_throughput_stability(self, speeds: np.ndarray) -> float:
         """計算吞吐量穩定性"""
-        valid_speeds = [speed for speed in speeds.values() if speed > 0]
-        
-        if len(valid_speeds) < 2:
-            return 0.0
-        
-        # 計算速度的穩定性（基於移動平均）
-        if len(valid_speeds) >= 3:
-            # 簡單的移動平均比較
-            recent_avg = statistics.mean(valid_speeds[-3:])
-            overall_avg = statistics.mean(valid_speeds)
-            
-            if overall_avg > 0:
-                stability = 1 - abs(recent_avg - overall_avg) / overall_avg
-                return max(0, stability) * 100
-        
-        return 50.0  # 默認中等穩定性
+        return float(_stability_kernel(speeds))
     
-    def _calculate_performance_score(self, speeds: Dict[str, float], 
-                                     response_times: Dict[str, float],
+    def _calculate_performance_score(self, speeds: np.ndarray, 
+                                     response_times: np.ndarray,
                                      consistency: float, 
                                      jitter: float) -> float:
         """計算性能分數"""
-        score = 0.0
-        
-        # 速度分數 (40%)
-        valid_speeds = [speed for speed in speeds.values() if speed > 0]
-        if valid_speeds:
-            avg_speed = statistics.mean(valid_speeds)
-            if avg_speed >= 1000:  # Excellent
-                score += 40.0
-            elif avg_speed >= 500:  # Good
-                score += 32.0
-            elif avg_speed >= 100:  # Fair
-                score += 24.0
-            elif avg_speed >= 50:  # Poor
-                score += 16.0
-            else:
-                score += 8.0
-        
-        # 響應時間分數 (30%)
-        valid_times = [time for time in response_times.values() if time != float('inf')]
-        if valid_times:
-            avg_time = statistics.mean(valid_times)
-            if avg_time <= 1.0:
-                score += 30.0
-            elif avg_time <= 3.0:
-                score += 24.0
-            elif avg_time <= 5.0:
-                score += 18.0
-            else:
-                score += 12.0
-        
-        # 一致性分數 (20%)
-        score += (consistency / 100) * 20.0
+        valid_speeds = speeds[speeds > 0]
+        avg_speed = fsum(valid_speeds.tolist()) / valid_speeds.size if valid_speeds.size else 0.0
         
-        # 穩定性分數 (10%)
-        stability_score = max(0, 1 - jitter) * 10.0
-        score += stability_score
+        valid_times = response_times[np.isfinite(response_times)]
+        avg_time = fsum(valid_times.tolist()) / valid_times.size if valid_times.size else float('inf')
         
-        return min(100.0, score)
+        return float(self.score_batch([avg_speed], [avg_time], [consistency], [jitter])[0])
     
-    def _get_proxy_dict(self, proxy_info: 'ProxyInfo') -> Dict[str, str]:
-        """生成代理字典"""
-        proxy_url = f"{proxy_info.type}://{proxy_info.ip}:{proxy_info.port}"
-        return {
-            'http': proxy_url,
-            'https': proxy_url
-        }
+    @classmethod
+    def score_batch(cls, avg_speeds, avg_times, consistency, jitter) -> np.ndarray:
+        """
+        批量計算性能分數
+        
+        各參數為等長數組：平均速度 <= 0 或平均時間非有限值時該項不得分。
+        速度 40%、響應時間 30%、一致性 20%、穩定性（1 - 抖動）10%。
+        """
+        avg_speeds = np.asarray(avg_speeds, dtype=np.float64)
+        avg_times = np.asarray(avg_times, dtype=np.float64)
+        
+        speed_score = np.where(
+            avg_speeds > 0,
+            cls._SPEED_POINTS[np.searchsorted(cls._SPEED_BUCKETS, avg_speeds, side='right')],
+            0.0
+        )
+        time_score = np.where(
+            np.isfinite(avg_times),
+            cls._TIME_POINTS[np.searchsorted(cls._TIME_BUCKETS, avg_times)],
+            0.0
+        )
+        consistency_score = np.asarray(consistency, dtype=np.float64) / 100 * 20.0
+        stability_score = np.maximum(0.0, 1 - np.asarray(jitter, dtype=np.float64)) * 10.0
+        
+        return np.minimum(speed_score + time_score + consistency_score + stability_score, 100.0)
 
 
 # ==================== 多層次驗證管理器 ====================
@@ -648,16 +698,30 @@ class PerformanceValidator(BaseValidator):
 class MultiLayerValidationSystem:
     """多層次驗證系統管理器"""
     
+    # 加權總分分檔：分數 >= 第 i 個邊界時得到第 i+1 個等級
+    GRADE_BUCKETS = np.array([50.0, 60.0, 70.0, 80.0, 90.0])
+    GRADE_LABELS = np.array(['F', 'C', 'B', 'B+', 'A', 'A+'])
+    
     def __init__(self, config: ValidationConfig = None):
         self.config = config or ValidationConfig()
         self.logger = self._setup_logger()
         
+        # 所有層次、所有代理共用的 HTTP 會話（在 async with 中創建，或由 _session_scope 臨時創建）
+        self.session = None
+        # 會話是否由 _session_scope 臨時創建（而非 async with），以及臨時會話的並發使用者數，歸零時關閉
+        self._owns_session = False
+        self._temp_session_users = 0
+        # 所有層次共用的在途請求上限
+        self.sem = asyncio.Semaphore(self.config.concurrent_limit)
+        
         # 初始化各層驗證器
         self.validators = {
             'connectivity': ConnectivityValidator(self.config),
             'performance': PerformanceValidator(self.config),
             # 其他驗證器將在後續實現
         }
+        for validator in self.validators.values():
+            validator.shared_sem = self.sem
         
         # 層次權重配置
         self.layer_weights = {
@@ -667,9 +731,69 @@ class MultiLayerValidationSystem:
             'anonymity': 0.20,
             'reliability': 0.20
         }
+        # 固定層次順序的權重向量，供批量加權計算使用
+        self._layer_order = tuple(self.layer_weights)
+        self._weight_vec = np.array([self.layer_weights[k] for k in self._layer_order], dtype=np.float64)
         
         self.logger.info("MultiLayerValidationSystem initialized")
     
+    async def __aenter__(self):
+        """異步上下文管理器進入：創建共享會話並注入各層驗證器"""
+        if self.session is None:
+            self._open_session()
+        # 正在使用的臨時會話改由 async with 管理，不再在臨時調用結束時關閉
+        self._owns_session = False
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """異步上下文管理器退出：關閉共享會話"""
+        await self._close_session()
+    
+    def _open_session(self):
+        """創建共享會話並注入各層驗證器"""
+        self.session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=self.config.timeout),
+            connector=aiohttp.TCPConnector(
+                limit=0,  # 併發由共享信號量控制
+                limit_per_host=0,
+                ttl_dns_cache=300,
+                keepalive_timeout=60
+            )
+        )
+        for validator in self.validators.values():
+            validator.session = self.session
+    
+    async def _close_session(self):
+        """先解除會話引用再關閉，關閉期間到來的調用會創建新會話而不是復用正在關閉的會話"""
+        session, self.session = self.session, None
+        self._owns_session = False
+        for validator in self.validators.values():
+            validator.session = None
+        if session is not None:
+            await session.close()
+    
+    @asynccontextmanager
+    async def _session_scope(self):
+        """
+        保證調用期間有可用的共享會話
+        
+        已在 async with 中使用時直接復用；否則臨時創建，並在最後一個並發調用結束後關閉。
+        """
+        if self.session is not None and not self._owns_session:
+            yield
+            return
+        
+        if self.session is None:
+            self._open_session()
+            self._owns_session = True
+        self._temp_session_users += 1
+        try:
+            yield
+        finally:
+            self._temp_session_users -= 1
+            if self._temp_session_users == 0 and self._owns_session:
+                await self._close_session()
+    
     def _setup_logger(self) -> logging.Logger:
         """設置日誌記錄器"""
         logger = logging.getLogger('MultiLayerValidationSystem')
@@ -690,39 +814,93 @@ class MultiLayerValidationSystem:
         if layer not in self.validators:
             raise ValueError(f"Unknown validation layer: {layer}")
         
-        validator = self.validators[layer]
-        
-        async with validator:
-            return await validator.validate(proxy_info)
+        async with self._session_scope():
+            return await self.validators[layer].validate(proxy_info)
     
     async def validate_all_layers(self, proxy_info: 'ProxyInfo') -> Dict[str, ValidationResult]:
-        """驗證所有層次"""
+        """驗證所有層次（各層互不依賴，並行執行）"""
         results = {}
         
-        for layer_name, validator in self.validators.items():
-            try:
-                async with validator:
-                    result = await validator.validate(proxy_info)
-                    results[layer_name] = result
-                    
-            except Exception as e:
-                self.logger.error(f"Layer {layer_name} validation failed for {proxy_info}: {e}")
+        layer_names = list(self.validators.keys())
+        async with self._session_scope():
+            layer_results = await asyncio.gather(
+                *(validator.validate(proxy_info) for validator in self.validators.values()),
+                return_exceptions=True
+            )
+        
+        for layer_name, result in zip(layer_names, layer_results):
+            if isinstance(result, Exception):
+                self.logger.error("Layer %s validation failed for %s: %s", layer_name, proxy_info, result)
                 results[layer_name] = None
+            else:
+                results[layer_name] = result
         
         return results
     
     def calculate_weighted_score(self, layer_results: Dict[str, ValidationResult]) -> float:
         """計算加權總分"""
-        total_score = 0.0
-        total_weight = 0.0
+        scores = np.zeros((1, len(self._layer_order)))
+        mask = np.zeros((1, len(self._layer_order)), dtype=bool)
         
-        for layer, result in layer_results.items():
-            if result and layer in self.layer_weights:
-                weight = self.layer_weights[layer]
-                total_score += result.score * weight
-                total_weight += weight
+        for i, layer in enumerate(self._layer_order):
+            result = layer_results.get(layer)
+            if result:
+                scores[0, i] = result.score
+                mask[0, i] = True
         
-        return total_score / total_weight if total_weight > 0 else 0.0
+        return float(self.calculate_weighted_scores_batch(scores, mask)[0])
+    
+    def calculate_weighted_scores_batch(self, scores_matrix: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """
+        批量計算加權總分
+        
+        scores_matrix 與 mask 形狀為 (代理數, 層數)，列按 _layer_order 排列；
+        mask 為 False 的層不參與加權，全部缺失時得 0 分。
+        """
+        weights = self._weight_vec * np.asarray(mask, dtype=np.float64)
+        total = (np.asarray(scores_matrix, dtype=np.float64) * weights).sum(axis=1)
+        denom = weights.sum(axis=1)
+        return np.divide(total, denom, out=np.zeros_like(total), where=denom > 0)
+    
+    async def validate_batch(self, proxies: List['ProxyInfo']) -> BatchReport:
+        """
+        批量驗證代理，結果按列匯總為數組
+        
+        並發由共享信號量限制；加權總分與等級在整個批次上一次性計算。
+        """
+        async with self._session_scope():
+            all_results = await asyncio.gather(*(self.validate_all_layers(proxy) for proxy in proxies))
+        
+        n, k = len(proxies), len(self._layer_order)
+        scores = np.zeros((n, k))
+        success = np.zeros((n, k), dtype=bool)
+        present = np.zeros((n, k), dtype=bool)
+        execution_times = np.zeros((n, k))
+        columns = {layer: j for j, layer in enumerate(self._layer_order)}
+        
+        for i, layer_results in enumerate(all_results):
+            for layer, result in layer_results.items():
+                j = columns.get(layer)
+                if result is None or j is None:
+                    continue
+                scores[i, j] = result.score
+                success[i, j] = result.success
+                present[i, j] = True
+                execution_times[i, j] = result.execution_time
+        
+        weighted_scores = self.calculate_weighted_scores_batch(scores, present)
+        grades = self.GRADE_LABELS[np.searchsorted(self.GRADE_BUCKETS, weighted_scores, side='right')]
+        
+        return BatchReport(
+            proxies=list(proxies),
+            layer_order=self._layer_order,
+            scores=scores,
+            success=success,
+            present=present,
+            execution_times=execution_times,
+            weighted_scores=weighted_scores,
+            grades=grades
+        )
     
     def generate_layer_summary(self, layer_results: Dict[str, ValidationResult]) -> Dict[str, Any]:
         """生成層次匯總報告"""
@@ -742,6 +920,7 @@ class MultiLayerValidationSystem:
         first_result = next(iter(layer_results.values()))
         if first_result:
             summary['proxy_info'] = first_result.proxy_str
+            summary['timestamp'] = first_result.timestamp_iso
         
         # 統計各層得分
         for layer, result in layer_results.items():
@@ -771,6 +950,18 @@ class MultiLayerValidationSystem:
         
         return summary
     
+    def summary_json(self, layer_results: Dict[str, ValidationResult]) -> bytes:
+        """
+        層次匯總報告的 JSON 序列化（UTF-8 字節）
+        
+        失敗測試留下的 inf / nan 寫成 null；兩種後端都輸出緊湊格式。
+        """
+        summary = _finite_or_none(self.generate_layer_summary(layer_results))
+        if orjson is not None:
+            return orjson.dumps(summary, option=orjson.OPT_SERIALIZE_NUMPY)
+        return json.dumps(summary, ensure_ascii=False, separators=(',', ':'),
+                          allow_nan=False).encode('utf-8')
+    
     def _generate_recommendations(self, layer_results: Dict[str, ValidationResult]) -> List[str]:
         """生成推薦建議"""
         recommendations = []
@@ -817,8 +1008,6 @@ async def demo_multi_layer_validation():
         concurrent_limit=10
     )
     
-    validation_system = MultiLayerValidationSystem(config)
-    
     # 測試代理
     test_proxies = [
         ProxyInfo("185.199.229.228", 8080),
@@ -828,30 +1017,31 @@ async def demo_multi_layer_validation():
     
     print("=== 多層次代理驗證系統演示 ===\n")
     
-    for proxy in test_proxies:
-        print(f"正在驗證代理: {proxy}")
-        
-        # 執行所有層次驗證
-        results = await validation_system.validate_all_layers(proxy)
-        
-        # 生成匯總報告
-        summary = validation_system.generate_layer_summary(results)
-        
-        print(f"加權總分: {summary['weighted_total_score']:.1f}")
-        print(f"驗證狀態: {summary['validation_status']}")
-        
-        # 打印各層得分
-        print("各層得分:")
-        for layer, score_info in summary['layer_scores'].items():
-            print(f"  {layer}: {score_info['score']:.1f} (成功: {score_info['success']})")
-        
-        # 打印推薦
-        if summary['recommendations']:
-            print("推薦建議:")
-            for rec in summary['recommendations']:
-                print(f"  - {rec}")
-        
-        print("-" * 50)
+    async with MultiLayerValidationSystem(config) as validation_system:
+        for proxy in test_proxies:
+            print(f"正在驗證代理: {proxy}")
+            
+            # 執行所有層次驗證
+            results = await validation_system.validate_all_layers(proxy)
+            
+            # 生成匯總報告
+            summary = validation_system.generate_layer_summary(results)
+            
+            print(f"加權總分: {summary['weighted_total_score']:.1f}")
+            print(f"驗證狀態: {summary['validation_status']}")
+            
+            # 打印各層得分
+            print("各層得分:")
+            for layer, score_info in summary['layer_scores'].items():
+                print(f"  {layer}: {score_info['score']:.1f} (成功: {score_info['success']})")
+            
+            # 打印推薦
+            if summary['recommendations']:
+                print("推薦建議:")
+                for rec in summary['recommendations']:
+                    print(f"  - {rec}")
+            
+            print("-" * 50)
 
 
 if __name__ == "__main__":
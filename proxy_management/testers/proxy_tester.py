@@ -14,19 +14,29 @@ API 限制:
     python proxy_tester.py --validate-proxies # 驗證代理有效性
 """
 
+import asyncio
+import aiohttp
+import atexit
 import requests
-import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
-import schedule
 import logging
+from collections import deque
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Dict, Optional
 import csv
 import argparse
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
 import json
+import re
+
+try:
+    import orjson
+except ImportError:  # 可選依賴，未安裝時回退到標準庫 json
+    orjson = None
 
 # 設定日誌
 logging.basicConfig(
@@ -38,10 +48,45 @@ logging.basicConfig(
     ]
 )
 logger = logging.getLogger(__name__)
+# requests 底層連接池的調試輸出不需要
+logging.getLogger('urllib3').setLevel(logging.WARNING)
+
+# 純文字代理列表中的 ip:port（可帶 http:// 等協議前綴）
+_IP_PORT_RE = re.compile(rb'(\d+\.\d+\.\d+\.\d+):(\d+)')
+
+# httpbin /ip 響應中的出口 IP，常見格式直接在原始字節上匹配而不做完整 JSON 解析
+# （值中含轉義字符時交給 JSON 解析）
+_ORIGIN_RE = re.compile(rb'"origin"\s*:\s*"([^"\\]+)"')
+
+
+def _parse_origin(body: bytes) -> str:
+    """
+    從 httpbin 響應取出 origin
+    
+    正則未匹配時回退到完整 JSON 解析；仍取不到 origin（如代理劫持頁面）時拋出 ValueError。
+    """
+    match = _ORIGIN_RE.search(body)
+    if match is not None:
+        return match.group(1).decode()
+    
+    data = json.loads(body)
+    origin = data.get('origin') if isinstance(data, dict) else None
+    if origin is None:
+        raise ValueError("Unexpected response body")
+    return str(origin)
+
+# 代理列表 CSV 的欄位順序
+PROXY_CSV_FIELDS = ('ip', 'port', 'country', 'anonymity', 'type', 'speed', 'uptime', 'fetched_at')
 
 class ProxyTester:
     """代理 IP 測試器類別"""
     
+    # 歷史記錄中保留的最近獲取次數（環形緩衝區長度）
+    HISTORY_MAX_ENTRIES = 1000
+    
+    # 批量驗證時的同時在途請求數 = max_workers * 此倍數（協程遠比線程輕量）
+    ASYNC_CONCURRENCY_FACTOR = 20
+    
     def __init__(self):
         """
         初始化代理測試器
@@ -57,36 +102,120 @@ class ProxyTester:
         self.data_dir = Path("data/proxies")
         self.data_dir.mkdir(parents=True, exist_ok=True)
         
+        # 從 CDN 獲取代理列表的長連接會話，監控模式下每次獲取都複用
+        self._cdn_session = requests.Session()
+        self._cdn_session.mount('https://', HTTPAdapter(
+            pool_connections=2,
+            pool_maxsize=2,
+            max_retries=Retry(total=2, backoff_factor=0.5)
+        ))
+        atexit.register(self._cdn_session.close)
+        # 上次成功獲取的代理列表（按類型），配合條件請求在 304 時直接複用
+        self._cdn_cache = {}
+        # 最近一次 fetch_proxies 是否拿到了新內容
+        self.last_fetch_changed = True
+        
         # 儲存歷史數據以追蹤更新
         self.history_file = self.data_dir / "proxy_history.json"
+        # 見過的唯一代理以追加方式記錄，每行一個 ip:port
+        self.unique_log_file = self.data_dir / "unique_proxies.log"
         self.load_history()
+        
+        # 驗證代理時每個工作線程持有自己的 requests 會話
+        self._local = threading.local()
+    
+    def _get_session(self) -> requests.Session:
+        """獲取當前線程的驗證會話（首次調用時創建，之後複用連接池）"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(max_retries=0)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._local.session = session
+        return session
     
     def load_history(self):
         """載入歷史記錄"""
+        history_data = {}
         if self.history_file.exists():
-            with open(self.history_file, 'r', encoding='utf-8') as f:
-                history_data = json.load(f)
-                # 確保 unique_proxies_seen 是 set 類型
-                self.history = {
-                    'fetch_times': history_data.get('fetch_times', []),
-                    'proxy_counts': history_data.get('proxy_counts', []),
-                    'unique_proxies_seen': set(history_data.get('unique_proxies_seen', []))
-                }
-        else:
-            self.history = {
-                'fetch_times': [],
-                'proxy_counts': [],
-                'unique_proxies_seen': set()
-            }
+            if orjson is not None:
+                history_data = orjson.loads(self.history_file.read_bytes())
+            else:
+                with open(self.history_file, 'r', encoding='utf-8') as f:
+                    history_data = json.load(f)
+        
+        unique_proxies_seen = set()
+        if self.unique_log_file.exists():
+            with open(self.unique_log_file, 'r', encoding='utf-8') as f:
+                unique_proxies_seen = {line for line in f.read().splitlines() if line}
+        
+        # 舊版歷史把唯一代理存在 JSON 中，遷移到追加日誌
+        legacy_ids = set(history_data.get('unique_proxies_seen', [])) - unique_proxies_seen
+        if legacy_ids:
+            self._append_unique_proxies(legacy_ids)
+            unique_proxies_seen |= legacy_ids
+        
+        # 獲取時間以 epoch 秒存放；舊版記錄為 ISO 字串，載入時一次性轉換
+        fetch_times = (
+            datetime.fromisoformat(t).timestamp() if isinstance(t, str) else float(t)
+            for t in history_data.get('fetch_times', [])
+        )
+        self.history = {
+            'fetch_times': deque(fetch_times, maxlen=self.HISTORY_MAX_ENTRIES),
+            'proxy_counts': deque(history_data.get('proxy_counts', []), maxlen=self.HISTORY_MAX_ENTRIES),
+            'unique_proxies_seen': unique_proxies_seen,
+            # 各代理類型上次響應的 ETag / Last-Modified
+            'cdn_validators': history_data.get('cdn_validators', {})
+        }
     
     def save_history(self):
-        """儲存歷史記錄"""
-        # 將 set 轉換為 list 以便 JSON 序列化
-        history_to_save = self.history.copy()
-        history_to_save['unique_proxies_seen'] = list(self.history['unique_proxies_seen'])
+        """儲存歷史記錄（只寫入最近的獲取時間與數量，唯一代理見 unique_log_file）"""
+        history_to_save = {
+            'fetch_times': list(self.history['fetch_times']),
+            'proxy_counts': list(self.history['proxy_counts']),
+            'cdn_validators': self.history['cdn_validators']
+        }
         
-        with open(self.history_file, 'w', encoding='utf-8') as f:
-            json.dump(history_to_save, f, indent=2, ensure_ascii=False)
+        if orjson is not None:
+            self.history_file.write_bytes(orjson.dumps(history_to_save, option=orjson.OPT_INDENT_2))
+        else:
+            with open(self.history_file, 'w', encoding='utf-8') as f:
+                json.dump(history_to_save, f, indent=2, ensure_ascii=False)
+    
+    def _append_unique_proxies(self, proxy_ids):
+        """把新見到的代理追加到唯一代理日誌"""
+        with open(self.unique_log_file, 'a', encoding='utf-8', buffering=1 << 16) as f:
+            f.write('\n'.join(proxy_ids) + '\n')
+    
+    def _cdn_cache_file(self, proxy_type: str) -> Path:
+        """CDN 響應快照的路徑"""
+        return self.data_dir / f"cdn_cache_{proxy_type}.json"
+    
+    @staticmethod
+    def _extract_proxy_list(data) -> Optional[List]:
+        """從 CDN JSON 中取出代理列表，格式未知時返回 None"""
+        if isinstance(data, list):
+            return data
+        if isinstance(data, dict) and 'proxies' in data:
+            return data['proxies']
+        return None
+    
+    def _load_cdn_cache(self, proxy_type: str) -> Optional[List]:
+        """讀取上次獲取的代理列表（先查記憶體，再查磁碟快照）"""
+        if proxy_type in self._cdn_cache:
+            return self._cdn_cache[proxy_type]
+        
+        cache_file = self._cdn_cache_file(proxy_type)
+        if not cache_file.exists():
+            return None
+        try:
+            proxies = self._extract_proxy_list(json.loads(cache_file.read_bytes()))
+        except ValueError:
+            return None
+        if proxies is not None:
+            self._cdn_cache[proxy_type] = proxies
+        return proxies
     
     def fetch_proxies(self, proxy_type: str = 'all') -> Optional[List[Dict]]:
         """
@@ -96,7 +225,8 @@ class ProxyTester:
             proxy_type: 代理類型 ('all', 'http', 'socks4', 'socks5')
         
         Returns:
-            代理列表或 None（如果失敗）
+            代理列表或 None（如果失敗）；上游未更新（304）時返回上次的列表，
+            並把 last_fetch_changed 設為 False
         """
         if proxy_type not in self.base_urls:
             logger.error(f"不支援的代理類型: {proxy_type}")
@@ -106,8 +236,27 @@ class ProxyTester:
         
         try:
             logger.info(f"正在從 {proxy_type} 類型獲取代理列表...")
-            response = requests.get(url, timeout=30)
+            
+            # 有本地快取時發送條件請求，上游未更新則只需一次 304 往返
+            headers = {}
+            validators = self.history['cdn_validators'].get(proxy_type, {})
+            if validators and (proxy_type in self._cdn_cache or self._cdn_cache_file(proxy_type).exists()):
+                if validators.get('etag'):
+                    headers['If-None-Match'] = validators['etag']
+                if validators.get('last_modified'):
+                    headers['If-Modified-Since'] = validators['last_modified']
+            
+            response = self._cdn_session.get(url, timeout=30, headers=headers)
+            if response.status_code == 304:
+                cached = self._load_cdn_cache(proxy_type)
+                if cached is not None:
+                    logger.info(f"{proxy_type} 代理列表未更新，沿用上次的 {len(cached)} 個代理")
+                    self.last_fetch_changed = False
+                    return cached
+                # 快取已失效，重新完整下載
+                response = self._cdn_session.get(url, timeout=30)
             response.raise_for_status()
+            self.last_fetch_changed = True
             
             try:
                 data = response.json()
@@ -115,49 +264,50 @@ class ProxyTester:
                 # 如果 JSON 解析失敗，嘗試解析為純文字格式
                 logger.warning("JSON 解析失敗，嘗試解析為純文字格式...")
                 text_url = url.replace('.json', '.txt')
-                response = requests.get(text_url, timeout=30)
+                response = self._cdn_session.get(text_url, timeout=30)
                 response.raise_for_status()
                 
-                # 解析純文字格式 (ip:port 每行一個)
-                proxies = []
-                for line in response.text.strip().split('\n'):
-                    if ':' in line:
-                        ip, port = line.strip().split(':', 1)
-                        proxy = {
-                            'ip': ip,
-                            'port': int(port) if port.isdigit() else port,
-                            'type': proxy_type,
-                            'country': 'Unknown',
-                            'anonymity': 'Unknown'
-                        }
-                        proxies.append(proxy)
-                return proxies
+                # 解析純文字格式 (ip:port 每行一個)，對原始字節做一次正則匹配
+                return [
+                    {
+                        'ip': ip.decode('ascii'),
+                        'port': int(port),
+                        'type': proxy_type,
+                        'country': 'Unknown',
+                        'anonymity': 'Unknown'
+                    }
+                    for ip, port in _IP_PORT_RE.findall(response.content)
+                ]
             
             # 如果是 JSON 格式，處理數據結構
-            if isinstance(data, list):
-                proxies = data
-            elif isinstance(data, dict) and 'proxies' in data:
-                proxies = data['proxies']
-            else:
+            proxies = self._extract_proxy_list(data)
+            if proxies is None:
                 logger.error(f"未知的資料格式: {type(data)}")
                 return None
             
             logger.info(f"成功獲取 {len(proxies)} 個 {proxy_type} 代理")
             
+            # 保存快照與驗證器，供下次條件請求使用
+            self._cdn_cache[proxy_type] = proxies
+            self._cdn_cache_file(proxy_type).write_bytes(response.content)
+            self.history['cdn_validators'][proxy_type] = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified')
+            }
+            
             # 記錄歷史
-            fetch_time = datetime.now().isoformat()
-            self.history['fetch_times'].append(fetch_time)
+            self.history['fetch_times'].append(time.time())
             self.history['proxy_counts'].append(len(proxies))
             
-            # 追蹤唯一代理
-            for proxy in proxies:
-                if isinstance(proxy, dict):
-                    proxy_id = f"{proxy.get('ip')}:{proxy.get('port')}"
-                else:
-                    # 處理純字串格式 "ip:port"
-                    proxy_id = str(proxy)
-                    
-                self.history['unique_proxies_seen'].add(proxy_id)
+            # 追蹤唯一代理（純字串格式 "ip:port" 直接使用）
+            proxy_ids = {
+                f"{proxy.get('ip')}:{proxy.get('port')}" if isinstance(proxy, dict) else str(proxy)
+                for proxy in proxies
+            }
+            new_ids = proxy_ids - self.history['unique_proxies_seen']
+            if new_ids:
+                self._append_unique_proxies(new_ids)
+                self.history['unique_proxies_seen'] |= new_ids
             
             self.save_history()
             return proxies
@@ -186,42 +336,27 @@ class ProxyTester:
         
         filepath = self.data_dir / filename
         
-        # 準備資料
+        # 準備資料：按 PROXY_CSV_FIELDS 順序組成元組，整批共用同一個獲取時間
+        fetched_at = datetime.now().isoformat()
         rows = []
         for proxy in proxies:
             if isinstance(proxy, dict):
-                row = {
-                    'ip': proxy.get('ip'),
-                    'port': proxy.get('port'),
-                    'country': proxy.get('country', 'Unknown'),
-                    'anonymity': proxy.get('anonymity', 'Unknown'),
-                    'type': proxy.get('type', 'Unknown'),
-                    'speed': proxy.get('speed', 'Unknown'),
-                    'uptime': proxy.get('uptime', 'Unknown'),
-                    'fetched_at': datetime.now().isoformat()
-                }
-            else:
+                get = proxy.get
+                rows.append((
+                    get('ip'), get('port'), get('country', 'Unknown'), get('anonymity', 'Unknown'),
+                    get('type', 'Unknown'), get('speed', 'Unknown'), get('uptime', 'Unknown'), fetched_at
+                ))
+            elif isinstance(proxy, str) and ':' in proxy:
                 # 處理純字串格式 "ip:port"
-                if isinstance(proxy, str) and ':' in proxy:
-                    ip, port = proxy.split(':', 1)
-                    row = {
-                        'ip': ip,
-                        'port': port,
-                        'country': 'Unknown',
-                        'anonymity': 'Unknown',
-                        'type': 'Unknown',
-                        'speed': 'Unknown',
-                        'uptime': 'Unknown',
-                        'fetched_at': datetime.now().isoformat()
-                    }
-                else:
-                    continue  # 跳過無效格式
-            
-            rows.append(row)
+                ip, port = proxy.split(':', 1)
+                rows.append((ip, port, 'Unknown', 'Unknown', 'Unknown', 'Unknown', 'Unknown', fetched_at))
+            # 其他格式直接跳過
         
         # 儲存到 CSV
-        df = pd.DataFrame(rows)
-        df.to_csv(filepath, index=False, encoding='utf-8-sig')
+        with open(filepath, 'w', newline='', encoding='utf-8-sig', buffering=1 << 20) as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(PROXY_CSV_FIELDS)
+            writer.writerows(rows)
         
         logger.info(f"代理列表已儲存至: {filepath}")
         return str(filepath)
@@ -248,7 +383,7 @@ class ProxyTester:
         
         try:
             start_time = time.time()
-            response = requests.get(test_url, proxies=proxies, timeout=timeout)
+            response = self._get_session().get(test_url, proxies=proxies, timeout=timeout)
             response_time = time.time() - start_time
             
             if response.status_code == 200:
@@ -257,7 +392,7 @@ class ProxyTester:
                     'port': port,
                     'status': 'valid',
                     'response_time': round(response_time, 2),
-                    'proxy_ip': response.json().get('origin', 'unknown')
+                    'proxy_ip': _parse_origin(response.content)
                 }
             else:
                 return {
@@ -276,43 +411,117 @@ class ProxyTester:
                 'error': str(e)
             }
     
+    async def _validate_proxy_async(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                                    ip: str, port: int) -> Dict:
+        """異步驗證單個代理，結果格式與 validate_proxy 相同"""
+        proxy_url = f"http://{ip}:{port}"
+        test_url = "http://httpbin.org/ip"
+        
+        async with semaphore:
+            try:
+                start_time = time.time()
+                async with session.get(test_url, proxy=proxy_url) as response:
+                    response_time = time.time() - start_time
+                    
+                    if response.status == 200:
+                        origin = _parse_origin(await response.read())
+                        return {
+                            'ip': ip,
+                            'port': port,
+                            'status': 'valid',
+                            'response_time': round(response_time, 2),
+                            'proxy_ip': origin
+                        }
+                    else:
+                        return {
+                            'ip': ip,
+                            'port': port,
+                            'status': 'invalid',
+                            'response_time': round(response_time, 2),
+                            'error': f"HTTP {response.status}"
+                        }
+            except Exception as e:
+                return {
+                    'ip': ip,
+                    'port': port,
+                    'status': 'failed',
+                    'response_time': 0,
+                    'error': str(e) or type(e).__name__
+                }
+    
+    async def _validate_proxies_batch_async(self, proxies: List[Dict], max_workers: int,
+                                            timeout: int = 10) -> List[Dict]:
+        """在單個事件循環中並發驗證所有代理"""
+        semaphore = asyncio.Semaphore(max_workers * self.ASYNC_CONCURRENCY_FACTOR)
+        
+        async with aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=timeout),
+            connector=aiohttp.TCPConnector(limit=0)  # 併發由信號量控制
+        ) as session:
+            tasks = [
+                self._validate_proxy_async(session, semaphore, proxy['ip'], proxy['port'])
+                for proxy in proxies
+            ]
+            
+            # 收集結果，約每完成 5% 報告一次進度
+            results = []
+            report_every = max(25, len(proxies) // 20)
+            for i, task in enumerate(asyncio.as_completed(tasks), 1):
+                results.append(await task)
+                
+                if i % report_every == 0:
+                    logger.info(f"已驗證 {i}/{len(proxies)} 個代理")
+        
+        return results
+    
+    @staticmethod
+    def _dedupe_proxies(proxies: List[Dict]) -> List[Dict]:
+        """去除重複的 ip:port（同一代理可能出現在多個協議列表中）及端口無效的條目"""
+        seen = set()
+        unique = []
+        for proxy in proxies:
+            try:
+                key = (proxy['ip'], int(proxy['port']))
+            except (KeyError, ValueError, TypeError):
+                continue
+            if key in seen:
+                continue
+            seen.add(key)
+            unique.append(proxy)
+        return unique
+    
+    @staticmethod
+    def _subnet_key(proxy: Dict) -> tuple:
+        """按 IPv4 /16 網段排序的鍵，無法解析的地址排在最後"""
+        try:
+            first, second = proxy['ip'].split('.', 2)[:2]
+            return (int(first), int(second))
+        except (ValueError, AttributeError):
+            return (256, 0)
+    
     def validate_proxies_batch(self, proxies: List[Dict], max_workers: int = 50) -> List[Dict]:
         """
         批量驗證代理有效性
         
         Args:
             proxies: 代理列表
-            max_workers: 最大線程數
+            max_workers: 併發基數，同時在途請求數為 max_workers * ASYNC_CONCURRENCY_FACTOR
             
         Returns:
             驗證結果列表
         """
-        logger.info(f"開始驗證 {len(proxies)} 個代理...")
-        
-        results = []
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # 提交所有驗證任務
-            future_to_proxy = {
-                executor.submit(
-                    self.validate_proxy, 
-                    proxy['ip'], 
-                    proxy['port']
-                ): proxy 
-                for proxy in proxies
-            }
-            
-            # 收集結果
-            for i, future in enumerate(as_completed(future_to_proxy), 1):
-                result = future.result()
-                results.append(result)
-                
-                # 每驗證完 10 個代理就報告一次進度
-                if i % 10 == 0:
-                    logger.info(f"已驗證 {i}/{len(proxies)} 個代理")
+        # 去重後按網段排序，相鄰的請求發往相鄰的網絡
+        unique = sorted(self._dedupe_proxies(proxies), key=self._subnet_key)
+        if len(unique) < len(proxies):
+            logger.info(f"已略過 {len(proxies) - len(unique)} 個重複或無效的代理")
+        logger.info(f"開始驗證 {len(unique)} 個代理...")
+        
+        results = asyncio.run(self._validate_proxies_batch_async(unique, max_workers))
         
         # 統計結果
         valid_count = sum(1 for r in results if r['status'] == 'valid')
-        logger.info(f"驗證完成！有效代理: {valid_count}/{len(proxies)} ({valid_count/len(proxies)*100:.1f}%)")
+        valid_rate = valid_count / len(unique) * 100 if unique else 0.0
+        logger.info(f"驗證完成！有效代理: {valid_count}/{len(unique)} ({valid_rate:.1f}%)")
         
         return results
     
@@ -329,31 +538,33 @@ class ProxyTester:
         
         def job():
             proxies = self.fetch_proxies(proxy_type)
-            if proxies:
+            # 上游未更新時不重複寫出相同的 CSV
+            if proxies and self.last_fetch_changed:
                 filename = self.save_proxies_to_csv(proxies)
                 self.print_statistics()
         
+        interval_s = interval_minutes * 60
+        
         # 立即運行一次
         job()
         
-        # 設定定時任務
-        schedule.every(interval_minutes).minutes.do(job)
-        
+        # 按固定節拍睡眠到下一次運行時間（monotonic 不受系統時間調整影響）
         run_count = 1
+        next_run = time.monotonic() + interval_s
         while run_count < max_runs:
             try:
-                schedule.run_pending()
-                time.sleep(30)  # 每30秒檢查一次
-                
-                if schedule.jobs and schedule.jobs[0].should_run:
-                    run_count += 1
-                    
+                time.sleep(max(0, next_run - time.monotonic()))
+                job()
+            
             except KeyboardInterrupt:
                 logger.info("監控被用戶中斷")
                 break
             except Exception as e:
                 logger.error(f"監控過程中發生錯誤: {e}")
                 time.sleep(60)  # 發生錯誤時等待1分鐘
+            
+            next_run += interval_s
+            run_count += 1
         
         logger.info("監控結束")
     
@@ -363,10 +574,9 @@ class ProxyTester:
             logger.info("資料不足，無法計算統計資訊")
             return
         
-        # 計算更新間隔
-        times = [datetime.fromisoformat(t) for t in self.history['fetch_times']]
-        intervals = [(times[i] - times[i-1]).total_seconds() / 60 for i in range(1, len(times))]
-        avg_interval = sum(intervals) / len(intervals)
+        # 計算更新間隔：相鄰間隔之和等於首尾時間差
+        times = self.history['fetch_times']
+        avg_interval = (times[-1] - times[0]) / (len(times) - 1) / 60
         
         logger.info("=== 代理更新統計 ===")
         logger.info(f"總共獲取次數: {len(self.history['fetch_times'])}")
@@ -414,7 +624,12 @@ def main():
             results_file = f"proxy_validation_{timestamp}.csv"
             filepath = tester.data_dir / results_file
             
-            pd.DataFrame(results).to_csv(filepath, index=False, encoding='utf-8-sig')
+            # 有效與失敗結果的欄位不同，取所有欄位的並集（按首次出現順序）
+            fieldnames = list(dict.fromkeys(key for result in results for key in result))
+            with open(filepath, 'w', newline='', encoding='utf-8-sig', buffering=1 << 20) as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames, lineterminator='\n')
+                writer.writeheader()
+                writer.writerows(results)
             logger.info(f"驗證結果已儲存至: {filepath}")
     
     else:
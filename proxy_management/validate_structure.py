@@ -7,6 +7,14 @@ import os
 import sys
 from pathlib import Path
 
+def _children(path):
+    """列出目錄下的項目名稱（一次 scandir），目錄不存在時返回 None"""
+    try:
+        with os.scandir(path) as entries:
+            return {entry.name for entry in entries}
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
 def check_directory_structure():
     """檢查目錄結構"""
     print("🔍 檢查專案結構完整性...")
@@ -39,30 +47,35 @@ def check_directory_structure():
     missing_files = []
     missing_dirs = []
     
+    # 每個目錄只列舉一次，之後用集合成員判斷代替逐個 os.path.exists
+    top_level = _children('.') or set()
+    
     # 檢查根目錄
     for root_dir, subdirs in expected_structure.items():
-        if not os.path.exists(root_dir):
+        if root_dir not in top_level:
             missing_dirs.append(root_dir)
             print(f"❌ 缺少目錄: {root_dir}")
             continue
             
         print(f"✅ 找到目錄: {root_dir}")
+        root_children = _children(root_dir) or set()
         
         if isinstance(subdirs, dict):
             # 檢查子目錄
             for subdir, files in subdirs.items():
                 subdir_path = os.path.join(root_dir, subdir)
-                if not os.path.exists(subdir_path):
+                if subdir not in root_children:
                     missing_dirs.append(f"{root_dir}/{subdir}")
                     print(f"❌ 缺少子目錄: {subdir_path}")
                     continue
                     
                 print(f"  ✅ 找到子目錄: {subdir_path}")
+                subdir_children = _children(subdir_path) or set()
                 
                 # 檢查檔案
                 for file in files:
                     file_path = os.path.join(subdir_path, file)
-                    if not os.path.exists(file_path):
+                    if file not in subdir_children:
                         missing_files.append(f"{subdir_path}/{file}")
                         print(f"    ❌ 缺少檔案: {file_path}")
                     else:
@@ -71,7 +84,7 @@ def check_directory_structure():
             # 檢查檔案列表
             for item in subdirs:
                 item_path = os.path.join(root_dir, item)
-                if not os.path.exists(item_path):
+                if item not in root_children:
                     missing_files.append(f"{root_dir}/{item}")
                     print(f"  ❌ 缺少: {item_path}")
                 else:
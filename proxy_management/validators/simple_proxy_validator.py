@@ -5,16 +5,18 @@
 """
 
 import argparse
-import pandas as pd
+import asyncio
+import aiohttp
+import itertools
 import csv
 from datetime import datetime
 import logging
 from pathlib import Path
 import time
-import concurrent.futures
-from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
 import sys
+import threading
 
 # 設置控制台輸出編碼
 sys.stdout.reconfigure(encoding='utf-8')
@@ -29,31 +31,62 @@ logging.basicConfig(
     ]
 )
 logger = logging.getLogger(__name__)
+# requests 底層連接池的調試輸出不需要
+logging.getLogger('urllib3').setLevel(logging.WARNING)
 
 class SimpleProxyValidator:
     """簡化版代理IP驗證器"""
     
+    # 批量驗證時的同時在途請求數 = max_workers * 此倍數（協程遠比線程輕量）
+    ASYNC_CONCURRENCY_FACTOR = 20
+    # 建立連接的超時（秒）：失效代理大多卡在 TCP 握手，不必等滿整個 timeout
+    CONNECT_TIMEOUT = 2
+    
     def __init__(self, timeout: int = 5, max_workers: int = 20):
         self.timeout = timeout
         self.max_workers = max_workers
         self.test_url = 'http://httpbin.org/ip'
         self.results = []
+        # 每個工作線程持有自己的 requests 會話
+        self._local = threading.local()
+        # 批量驗證期間所有結果共用的測試時間
+        self._batch_ts = None
+    
+    def _get_session(self) -> requests.Session:
+        """獲取當前線程的會話（首次調用時創建，之後複用連接池）"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers, max_retries=0)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['User-Agent'] = 'ProxyValidator/1.0'
+            self._local.session = session
+        return session
         
     def load_proxies_from_csv(self, csv_file: str) -> list:
         """從CSV檔案載入代理列表"""
         proxies = []
         try:
-            df = pd.read_csv(csv_file)
-            for _, row in df.iterrows():
-                if 'ip' in row and 'port' in row:
+            with open(csv_file, newline='', encoding='utf-8-sig') as f:
+                for row in csv.DictReader(f):
+                    ip = (row.get('ip') or '').strip()
+                    try:
+                        port = int(row['port'])
+                    except (KeyError, TypeError, ValueError):
+                        continue
+                    if not ip:
+                        continue
+                    
                     # 如果類型是 Unknown，預設為 http
-                    proxy_type = 'http' if row.get('type', 'Unknown') == 'Unknown' else row['type'].lower()
+                    proxy_type = row.get('type') or 'Unknown'
+                    proxy_type = 'http' if proxy_type == 'Unknown' else proxy_type.lower()
                     
                     proxies.append({
-                        'ip': str(row['ip']).strip(),
-                        'port': int(row['port']),
+                        'ip': ip,
+                        'port': port,
                         'type': proxy_type,
-                        'country': row.get('country', 'Unknown'),
+                        'country': row.get('country') or 'Unknown',
                         'source': csv_file
                     })
         except Exception as e:
@@ -74,7 +107,7 @@ class SimpleProxyValidator:
             'is_working': False,
             'response_time_ms': None,
             'error': None,
-            'test_time': datetime.now().isoformat(),
+            'test_time': self._batch_ts or datetime.now().isoformat(),
             'status': 'Failed'
         }
         
@@ -84,22 +117,21 @@ class SimpleProxyValidator:
                 'https': proxy_url
             }
             
-            start_time = time.time()
+            start_time = time.perf_counter()
             
-            response = requests.get(
+            response = self._get_session().get(
                 self.test_url,
                 proxies=proxies_dict,
-                timeout=self.timeout,
-                headers={'User-Agent': 'ProxyValidator/1.0'}
+                timeout=(self.CONNECT_TIMEOUT, self.timeout)
             )
             
-            response_time = round((time.time() - start_time) * 1000, 2)
+            response_time = round((time.perf_counter() - start_time) * 1000, 2)
             
             if response.status_code == 200:
                 result['is_working'] = True
                 result['response_time_ms'] = response_time
                 result['status'] = 'Success'
-                logger.info(f"OK: {proxy['ip']}:{proxy['port']} ({response_time}ms)")
+                logger.debug("OK: %s:%s (%sms)", proxy['ip'], proxy['port'], response_time)
                 return result
             else:
                 result['error'] = f"HTTP {response.status_code}"
@@ -113,29 +145,99 @@ class SimpleProxyValidator:
         
         return result
     
-    def validate_proxies(self, proxies: list) -> list:
-        """批量驗證代理"""
-        logger.info(f"開始驗證 {len(proxies)} 個代理...")
+    async def _test_one(self, session: aiohttp.ClientSession, proxy: dict) -> dict:
+        """異步測試單個代理，結果格式與 test_single_proxy 相同"""
+        proxy_url = f"{proxy['type']}://{proxy['ip']}:{proxy['port']}"
+        
+        result = {
+            'ip': proxy['ip'],
+            'port': proxy['port'],
+            'type': proxy['type'],
+            'country': proxy['country'],
+            'is_working': False,
+            'response_time_ms': None,
+            'error': None,
+            'test_time': self._batch_ts or datetime.now().isoformat(),
+            'status': 'Failed'
+        }
         
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = [executor.submit(self.test_single_proxy, proxy) for proxy in proxies]
+        try:
+            start_time = time.perf_counter()
             
+            async with session.get(self.test_url, proxy=proxy_url) as response:
+                response_time = round((time.perf_counter() - start_time) * 1000, 2)
+                
+                if response.status == 200:
+                    result['is_working'] = True
+                    result['response_time_ms'] = response_time
+                    result['status'] = 'Success'
+                    logger.debug("OK: %s:%s (%sms)", proxy['ip'], proxy['port'], response_time)
+                    return result
+                else:
+                    result['error'] = f"HTTP {response.status}"
+                    
+        except asyncio.TimeoutError:
+            result['error'] = 'Timeout'
+        except aiohttp.ClientConnectionError:
+            result['error'] = 'Connection Error'
+        except Exception as e:
+            result['error'] = str(e)
+        
+        return result
+    
+    async def _validate_proxies_async(self, proxies: list) -> list:
+        """
+        在單個事件循環中並發驗證所有代理
+        
+        只保持固定數量的任務在途，完成一個補一個，記憶體佔用不隨代理總數增長。
+        """
+        limit = self.max_workers * self.ASYNC_CONCURRENCY_FACTOR
+        pending = iter(proxies)
+        inflight = set()
+        
+        async with aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=self.timeout, sock_connect=self.CONNECT_TIMEOUT),
+            connector=aiohttp.TCPConnector(limit=0),  # 併發由在途任務數控制
+            headers={'User-Agent': 'ProxyValidator/1.0'}
+        ) as session:
             results = []
             completed = 0
+            working_count = 0
+            # 約每完成 5% 報告一次進度
+            report_every = max(25, len(proxies) // 20)
             
-            for future in concurrent.futures.as_completed(futures):
-                try:
-                    result = future.result()
-                    results.append(result)
-                    completed += 1
-                    
-                    if completed % 10 == 0 or completed == len(proxies):
-                        working_count = sum(1 for r in results if r['is_working'])
-                        logger.info(f"進度: {completed}/{len(proxies)} - 有效: {working_count}")
+            while True:
+                for proxy in itertools.islice(pending, limit - len(inflight)):
+                    inflight.add(asyncio.create_task(self._test_one(session, proxy)))
+                if not inflight:
+                    break
+                
+                done, inflight = await asyncio.wait(inflight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        result = task.result()
+                        results.append(result)
+                        completed += 1
+                        working_count += result['is_working']
                         
-                except Exception as e:
-                    logger.error(f"代理測試異常: {e}")
-                    completed += 1
+                        if completed % report_every == 0 or completed == len(proxies):
+                            logger.info(f"進度: {completed}/{len(proxies)} - 有效: {working_count}")
+                            
+                    except Exception as e:
+                        logger.error(f"代理測試異常: {e}")
+                        completed += 1
+        
+        return results
+    
+    def validate_proxies(self, proxies: list) -> list:
+        """批量驗證代理"""
+        logger.info(f"開始驗證 {len(proxies)} 個代理...")
+        
+        self._batch_ts = datetime.now().isoformat()
+        try:
+            results = asyncio.run(self._validate_proxies_async(proxies))
+        finally:
+            self._batch_ts = None
         
         self.results = results
         return results
@@ -150,8 +252,11 @@ class SimpleProxyValidator:
         Path(output_file).parent.mkdir(parents=True, exist_ok=True)
         
         # 儲存為CSV
-        df = pd.DataFrame(results)
-        df.to_csv(output_file, index=False, encoding='utf-8')
+        fieldnames = list(dict.fromkeys(key for result in results for key in result))
+        with open(output_file, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, lineterminator='\n')
+            writer.writeheader()
+            writer.writerows(results)
         
         # 統計
         total_count = len(results)
@@ -0,0 +1,52 @@
+"""
+測試共用夾具
+"""
+
+import http.server
+import json
+import threading
+
+import pytest
+
+
+class _ProxyHandler(http.server.BaseHTTPRequestHandler):
+    """
+    本地假代理：對任何 GET（含代理形式的絕對 URL）返回 200 JSON，不支持 CONNECT
+
+    每個響應都帶 Set-Cookie，並記錄請求帶來的 Cookie 頭，用於檢查會話是否保存 cookie。
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.cookies_seen.append(self.headers.get('Cookie'))
+        body = json.dumps({'origin': '9.9.9.9'}).encode()
+        self.send_response(200)
+        self.send_header('Set-Cookie', 'tracker=1; Path=/')
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def proxy_httpd():
+    """啟動本地假代理，產出伺服器對象（cookies_seen 記錄每個請求的 Cookie 頭）"""
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _ProxyHandler)
+    server.cookies_seen = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def proxy_server(proxy_httpd):
+    """本地假代理的 (ip, port)"""
+    return proxy_httpd.server_address
@@ -0,0 +1,308 @@
+"""
+進階代理測試器測試
+"""
+
+import gzip
+import hashlib
+import http.server
+import json
+import threading
+import time
+from datetime import datetime
+from pathlib import PurePosixPath
+
+import pytest
+
+from proxy_management.testers import advanced_proxy_tester as apt
+from proxy_management.testers.advanced_proxy_tester import AdvancedProxyTester
+
+
+def make_proxies(n, source='http'):
+    return [{'ip': f'10.0.0.{i}', 'port': 8000 + i, 'type': 'http', 'source': source} for i in range(n)]
+
+
+@pytest.fixture
+def tester(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return AdvancedProxyTester()
+
+
+@pytest.fixture(params=['orjson', 'ujson', 'json'])
+def backend(request, monkeypatch):
+    """分別在三種 JSON 後端下運行（未安裝的後端跳過）"""
+    if request.param != 'json' and getattr(apt, request.param) is None:
+        pytest.skip(f'{request.param} 未安裝')
+    if request.param != 'orjson':
+        monkeypatch.setattr(apt, 'orjson', None)
+    if request.param == 'json':
+        monkeypatch.setattr(apt, 'ujson', None)
+    return request.param
+
+
+@pytest.fixture
+def client(tester, monkeypatch):
+    monkeypatch.setattr(apt, 'proxy_tester', tester)
+    monkeypatch.setattr(apt, '_serialized_responses', {})
+    return apt.app.test_client()
+
+
+def fake_fetch(tester, proxies, calls=None, delay=0.0):
+    """替代 _fetch_from_url：記錄調用次數並寫入快取"""
+    def fetch(url, source_type):
+        if calls is not None:
+            calls.append(source_type)
+        time.sleep(delay)
+        tester._set_cached(source_type, proxies)
+        return proxies
+    return fetch
+
+
+def test_cache_hit_within_ttl_and_expiry(tester, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(apt.time, 'monotonic', lambda: now[0])
+    calls = []
+    monkeypatch.setattr(tester, '_fetch_from_url', fake_fetch(tester, make_proxies(3), calls))
+
+    assert tester.fetch_proxies_by_type('http') == make_proxies(3)
+    now[0] += tester.PROXY_CACHE_TTL - 1
+    assert tester.fetch_proxies_by_type('http') == make_proxies(3)
+    assert calls == ['http']
+
+    # 過期後重新下載
+    now[0] += 2
+    tester.fetch_proxies_by_type('http')
+    assert calls == ['http', 'http']
+
+
+def test_cache_is_isolated_from_caller_mutation(tester, monkeypatch):
+    original = make_proxies(2)
+    monkeypatch.setattr(tester, '_fetch_from_url', fake_fetch(tester, original))
+
+    first = tester.fetch_proxies_by_type('http')
+    # 修改下載時返回的列表、以及快取命中時返回的副本
+    first.append({'ip': 'bad'})
+    original[0]['ip'] = 'bad'
+    hit = tester.fetch_proxies_by_type('http')
+    hit[1]['port'] = 1
+    hit.clear()
+
+    assert tester.fetch_proxies_by_type('http') == make_proxies(2)
+    assert isinstance(tester.get_cached_snapshot('http'), tuple)
+
+
+def test_fetch_once_coalesces_concurrent_requests(tester, monkeypatch):
+    calls = []
+    monkeypatch.setattr(tester, '_fetch_from_url', fake_fetch(tester, make_proxies(5), calls, delay=0.2))
+
+    results = []
+    barrier = threading.Barrier(8)
+
+    def worker():
+        barrier.wait()
+        results.append(tester.fetch_proxies_by_type('http'))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ['http']
+    assert len(results) == 8
+    assert all(result == make_proxies(5) for result in results)
+
+
+def test_fetch_once_followers_get_none_when_leader_fails(tester, monkeypatch):
+    started = threading.Event()
+
+    def failing_fetch(url, source_type):
+        started.set()
+        time.sleep(0.2)
+        return None
+
+    monkeypatch.setattr(tester, '_fetch_from_url', failing_fetch)
+    results = []
+    leader = threading.Thread(target=lambda: results.append(tester.fetch_proxies_by_type('http')))
+    leader.start()
+    started.wait()
+    results.append(tester.fetch_proxies_by_type('http'))
+    leader.join()
+
+    assert results == [None, None]
+
+
+def test_api_proxies_etag_and_304(client, tester, monkeypatch, backend):
+    monkeypatch.setattr(tester, '_fetch_from_url', fake_fetch(tester, make_proxies(3)))
+
+    first = client.get('/api/proxies?type=http')
+    assert first.status_code == 200
+    etag = first.headers['ETag'].strip('"')
+    assert etag == hashlib.blake2b(first.data, digest_size=16).hexdigest()
+    assert first.json['count'] == 3
+
+    again = client.get('/api/proxies?type=http', headers={'If-None-Match': f'"{etag}"'})
+    assert again.status_code == 304
+    assert again.data == b''
+
+
+def test_api_proxies_gzip_etag_matches_sent_bytes(client, tester, monkeypatch, backend):
+    monkeypatch.setattr(tester, '_fetch_from_url', fake_fetch(tester, make_proxies(50)))
+    headers = {'Accept-Encoding': 'gzip'}
+
+    first = client.get('/api/proxies?type=http', headers=headers)
+    assert first.headers['Content-Encoding'] == 'gzip'
+    etag = first.headers['ETag'].strip('"')
+    assert etag == hashlib.blake2b(first.data, digest_size=16).hexdigest()
+    assert json.loads(gzip.decompress(first.data))['count'] == 50
+
+    plain = client.get('/api/proxies?type=http')
+    assert plain.headers['ETag'].strip('"') != etag
+
+    again = client.get('/api/proxies?type=http', headers={**headers, 'If-None-Match': f'"{etag}"'})
+    assert again.status_code == 304
+
+
+def test_api_proxies_not_stale_after_mutation_or_refresh(client, tester, monkeypatch):
+    proxies = make_proxies(3)
+    monkeypatch.setattr(tester, '_fetch_from_url', fake_fetch(tester, proxies))
+
+    first = client.get('/api/proxies?type=http')
+    # 調用方就地修改拿到的列表，不影響已序列化的回應
+    tester.fetch_proxies_by_type('http').append({'ip': 'bad'})
+    proxies.append({'ip': 'bad'})
+    second = client.get('/api/proxies?type=http')
+    assert second.data == first.data
+    assert second.headers['ETag'] == first.headers['ETag']
+
+    # 快取刷新為新內容後，body 與 ETag 隨之更新
+    tester._set_cached('http', make_proxies(4))
+    third = client.get('/api/proxies?type=http')
+    assert third.json['count'] == 4
+    assert third.headers['ETag'] != first.headers['ETag']
+
+
+def test_api_proxies_cache_keys_ignore_unvalidated_params(client, tester, monkeypatch):
+    monkeypatch.setattr(tester, '_fetch_from_url', fake_fetch(tester, make_proxies(3)))
+
+    for junk in ('a', 'b', 'c', 'd', 'e'):
+        response = client.get(f'/api/proxies?country=US&type={junk}')
+        assert response.status_code == 200
+        assert response.json['type'] is None
+        assert response.json['country'] == 'US'
+    for junk in ('ZZ', 'QQ', 'XX'):
+        response = client.get(f'/api/proxies?type=http&country={junk}')
+        assert response.json['type'] == 'http'
+        assert response.json['country'] is None
+
+    assert set(apt._serialized_responses) == {('proxies', 'country-US'), ('proxies', 'http')}
+
+
+def test_api_proxies_rejects_unknown_type_without_caching(client, tester):
+    response = client.get('/api/proxies?type=junk')
+    assert response.json['success'] is False
+    assert apt._serialized_responses == {}
+
+
+def test_dumps_backends_write_identical_bytes(monkeypatch):
+    payload = {
+        'success': True,
+        'data': ({'ip': '10.0.0.1', 'port': 8080, 'country': '台灣', 'url': 'http://10.0.0.1:8080/'},),
+        'count': 1,
+        'avg': 0.5,
+        'country': None,
+        'fetched_at': datetime(2024, 1, 2, 3, 4, 5, 678000),
+        'path': PurePosixPath('/tmp/proxies.csv'),
+    }
+    outputs = {}
+    for backend in ('orjson', 'ujson', 'json'):
+        if backend != 'json' and getattr(apt, backend) is None:
+            continue
+        with monkeypatch.context() as m:
+            if backend != 'orjson':
+                m.setattr(apt, 'orjson', None)
+            if backend == 'json':
+                m.setattr(apt, 'ujson', None)
+            outputs[backend] = apt._dumps(payload)
+
+    assert len(set(outputs.values())) == 1, outputs
+    assert json.loads(outputs['json'])['fetched_at'] == '2024-01-02T03:04:05.678000'
+
+
+def test_json_response_uses_shared_serializer(client, monkeypatch):
+    monkeypatch.setattr(apt, 'orjson', None)
+    monkeypatch.setattr(apt, 'ujson', None)
+    response = client.get('/api/proxies?type=junk')
+    assert response.data == apt._dumps(response.json)
+
+
+class _CountryListHandler(http.server.BaseHTTPRequestHandler):
+    """假 Proxifly 國家列表：/<code>/data.txt 返回一行代理，並記錄請求路徑"""
+
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        body = f"http://{len(self.server.paths)}.1.1.1:80\n".encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def country_server(tester):
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _CountryListHandler)
+    server.paths = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    tester.country_base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_fetch_multiple_countries_serves_fresh_cache(tester, country_server):
+    cached = [{'ip': '9.9.9.9', 'port': 3128, 'type': 'http', 'source': 'country-US'}]
+    tester._set_cached('country-US', cached)
+
+    results = tester.fetch_multiple_countries(['US', 'JP'])
+
+    assert country_server.paths == ['/JP/data.txt']
+    assert results['US'] == cached
+    assert results['JP'][0]['ip'] == '1.1.1.1'
+    # 只有真正下載的國家計入統計
+    assert set(tester.history['country_stats']) == {'JP'}
+
+    results['US'].clear()
+    assert tester.get_cached_snapshot('country-US') == tuple(cached)
+    # 第二次全部命中快取
+    assert tester.fetch_multiple_countries(['JP', 'US'])['JP'] == results['JP']
+    assert country_server.paths == ['/JP/data.txt']
+
+
+def test_fetch_multiple_countries_joins_inflight_download(tester, country_server, monkeypatch):
+    started = threading.Event()
+    proxies = [{'ip': '8.8.8.8', 'port': 80, 'type': 'http', 'source': 'country-US'}]
+
+    def slow_fetch(url, source_type):
+        started.set()
+        time.sleep(0.3)
+        tester._set_cached(source_type, proxies)
+        return proxies
+
+    monkeypatch.setattr(tester, '_fetch_from_url', slow_fetch)
+    single = []
+    thread = threading.Thread(target=lambda: single.append(tester.fetch_proxies_by_country('US')))
+    thread.start()
+    started.wait()
+
+    # 同一請求中重複的國家也只下載一次
+    results = tester.fetch_multiple_countries(['US', 'KR', 'KR'])
+    thread.join()
+
+    assert results['US'] == proxies == single[0]
+    assert country_server.paths == ['/KR/data.txt']
+    assert tester._inflight == {}
@@ -0,0 +1,121 @@
+"""
+綜合代理管理系統測試
+"""
+
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from proxy_management.core import comprehensive_proxy_manager as cpm
+from proxy_management.core.comprehensive_proxy_manager import (
+    ComprehensiveProxyManager,
+    ProxyInfo,
+    ProxyStatus,
+)
+
+
+class Unserializable:
+    """回退序列化時 str() 失敗的對象，三種 JSON 後端都會在寫出中途拋錯"""
+
+    def __str__(self):
+        raise RuntimeError('cannot serialize')
+
+
+def make_proxy(i, status=ProxyStatus.VALID):
+    return ProxyInfo(
+        ip=f'10.0.0.{i}', port=8000 + i, protocol='http', country='TW',
+        response_time=0.5 + i, status=status,
+        last_tested=datetime(2024, 1, 2, 3, 4, i), source='test',
+    )
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return ComprehensiveProxyManager(data_dir=str(tmp_path / 'data'))
+
+
+@pytest.fixture
+def load_calls(monkeypatch):
+    """記錄實際讀取並解析的文件"""
+    calls = []
+    load_json = cpm._load_json
+
+    def counting_load(file_path):
+        calls.append(file_path.name)
+        return load_json(file_path)
+
+    monkeypatch.setattr(cpm, '_load_json', counting_load)
+    return calls
+
+
+def test_unchanged_file_is_parsed_once(manager, load_calls):
+    manager._save_proxies([make_proxy(1), make_proxy(2)], ProxyStatus.VALID)
+    manager._proxy_file_cache.clear()
+
+    first = manager._load_proxies(ProxyStatus.VALID)
+    second = manager._load_proxies(ProxyStatus.VALID)
+
+    assert load_calls == ['valid_proxies.json']
+    assert first == second == [make_proxy(1), make_proxy(2)]
+
+
+def test_write_populates_cache_with_same_result_as_disk(manager, tmp_path, load_calls):
+    proxies = [make_proxy(1), make_proxy(2, ProxyStatus.TEMP_INVALID)]
+    manager._save_proxies(proxies, ProxyStatus.VALID)
+
+    from_cache = manager._load_proxies(ProxyStatus.VALID)
+    from_disk = ComprehensiveProxyManager(data_dir=str(tmp_path / 'data'))._load_proxies(ProxyStatus.VALID)
+
+    assert load_calls == ['valid_proxies.json']
+    assert from_cache == from_disk == proxies
+
+
+def test_mutating_loaded_proxies_does_not_change_cache(manager):
+    manager._save_proxies([make_proxy(1)], ProxyStatus.VALID)
+
+    loaded = manager._load_proxies(ProxyStatus.VALID)
+    loaded[0].fail_count = 99
+    loaded[0].status = ProxyStatus.INVALID
+
+    assert manager._load_proxies(ProxyStatus.VALID) == [make_proxy(1)]
+
+
+def test_external_modification_invalidates_cache(manager, load_calls):
+    manager._save_proxies([make_proxy(1)], ProxyStatus.VALID)
+    path = manager.files['valid']
+    old_mtime_ns = path.stat().st_mtime_ns
+
+    # 其他進程改寫文件
+    path.write_text(json.dumps([make_proxy(7).to_dict()], default=cpm._json_default), encoding='utf-8')
+    os.utime(path, ns=(old_mtime_ns + 1_000_000, old_mtime_ns + 1_000_000))
+
+    assert manager._load_proxies(ProxyStatus.VALID) == [make_proxy(7)]
+    assert load_calls == ['valid_proxies.json']
+
+
+def test_dump_json_replaces_atomically(tmp_path):
+    path = tmp_path / 'state.json'
+    cpm._dump_json({'status': ProxyStatus.VALID, 'when': datetime(2024, 1, 2)}, path)
+
+    assert json.loads(path.read_text(encoding='utf-8')) == {'status': 'valid', 'when': '2024-01-02T00:00:00'}
+    assert b' ' not in path.read_bytes()
+    assert [p.name for p in tmp_path.iterdir()] == ['state.json']
+
+
+@pytest.mark.parametrize('backend', ['orjson', 'ujson', 'json'])
+def test_dump_json_failure_keeps_original_file(tmp_path, monkeypatch, backend):
+    if backend != 'orjson':
+        monkeypatch.setattr(cpm, 'orjson', None)
+    if backend == 'json':
+        monkeypatch.setattr(cpm, 'ujson', None)
+    path = tmp_path / 'state.json'
+    path.write_text('{"kept":true}', encoding='utf-8')
+
+    # orjson 把 default 拋出的異常包裝為 TypeError
+    with pytest.raises((RuntimeError, TypeError)):
+        cpm._dump_json({'ok': 1, 'bad': Unserializable()}, path)
+
+    assert path.read_text(encoding='utf-8') == '{"kept":true}'
+    assert [p.name for p in tmp_path.iterdir()] == ['state.json']
@@ -0,0 +1,135 @@
+"""
+綜合代理驗證器測試
+"""
+
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from proxy_management.testers import comprehensive_proxy_validator as cpv
+from proxy_management.testers.comprehensive_proxy_validator import (
+    AnonymityResult,
+    ComprehensiveProxyValidator,
+    ComprehensiveResult,
+    ConnectivityResult,
+    GeolocationResult,
+    PerformanceResult,
+    ProxyInfo,
+    ReliabilityResult,
+    _csv_escape,
+)
+
+
+def make_result(ip='1.2.3.4', port=8080, http_time=0.5, https_time=float('inf'),
+                country='TW', headers_leaked=(), recommendation='ok'):
+    """構造一個完整的綜合驗證結果"""
+    now = datetime(2024, 1, 2, 3, 4, 5)
+    proxy_str = f"{ip}:{port}"
+    return ComprehensiveResult(
+        proxy_info=ProxyInfo(ip=ip, port=port, country=country, anonymity='elite'),
+        connectivity=ConnectivityResult(proxy_str, True, False, http_time, https_time, [], now, 80.0),
+        performance=PerformanceResult(proxy_str, 0.1, 0.2, 0.3, 100.0, 200.5, 300.25, 90.0, 0.1, 70.0),
+        geolocation=GeolocationResult(proxy_str, 3, 1.0, 0.5, 0.0, (25.0, 121.5), 0.9, 60.0),
+        anonymity=AnonymityResult(proxy_str, list(headers_leaked), False, False, False, False,
+                                  'elite', len(headers_leaked), 100.0),
+        reliability=ReliabilityResult(proxy_str, 1.0, 0.9, 0.8, 99.5, 0.4, 95.0, 85.0),
+        overall_score=77.5,
+        grade='B',
+        recommendation=recommendation,
+        test_duration=12.5,
+        timestamp=now,
+        timestamp_iso=now.isoformat(),
+    )
+
+
+@pytest.fixture
+def validator():
+    return ComprehensiveProxyValidator()
+
+
+def test_jsonl_writes_null_for_non_finite(validator, tmp_path, monkeypatch):
+    monkeypatch.setattr(cpv, 'orjson', None)
+    path = tmp_path / 'results.jsonl'
+    validator.save_results_to_jsonl([make_result(), make_result(ip='5.6.7.8', http_time=float('nan'))], str(path))
+
+    rows = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    assert [row['ip'] for row in rows] == ['1.2.3.4', '5.6.7.8']
+    assert rows[0]['https_response_time'] is None
+    assert rows[0]['http_response_time'] == 0.5
+    assert rows[1]['http_response_time'] is None
+    assert list(rows[0]) == list(cpv.CSV_FIELDNAMES)
+
+
+def test_jsonl_backends_match(validator, tmp_path, monkeypatch):
+    pytest.importorskip('orjson')
+    results = [make_result(headers_leaked=['Via', 'X-Forwarded-For'], country='台灣')]
+    with_orjson = tmp_path / 'orjson.jsonl'
+    with_stdlib = tmp_path / 'stdlib.jsonl'
+
+    validator.save_results_to_jsonl(results, str(with_orjson))
+    monkeypatch.setattr(cpv, 'orjson', None)
+    validator.save_results_to_jsonl(results, str(with_stdlib))
+
+    assert with_orjson.read_bytes() == with_stdlib.read_bytes()
+    assert b'Infinity' not in with_stdlib.read_bytes()
+
+
+def test_jsonl_does_not_change_csv_values(validator):
+    result = make_result()
+    validator._result_to_json_row(result)
+    # CSV 仍按原樣寫出 inf
+    assert validator._result_to_row(result)['https_response_time'] == float('inf')
+
+
+def _dictwriter_csv(validator, results):
+    """用 csv.DictWriter 寫出的參考 CSV 文本"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=cpv.CSV_FIELDNAMES, lineterminator='\n')
+    writer.writeheader()
+    writer.writerows(validator._result_to_row(result) for result in results)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize('value', [
+    'plain', '', 'a,b', 'say "hi"', 'line\nbreak', '台灣', ' padded ', '"', ',,',
+])
+def test_csv_escape_matches_csv_module(value):
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='\n').writerow([value, 'x'])
+    assert _csv_escape(value) + ',x\n' == buffer.getvalue()
+
+
+def test_csv_escape_none_is_empty():
+    assert _csv_escape(None) == ''
+
+
+def test_csv_escape_quotes_carriage_return():
+    # csv 模組在 lineterminator='\n' 時不為 \r 加引號，讀回時會被當作換行；這裡始終加引號
+    escaped = _csv_escape('cr\rhere')
+    assert escaped == '"cr\rhere"'
+    assert next(csv.reader(io.StringIO(escaped + ',x\n', newline=''))) == ['cr\rhere', 'x']
+
+
+def test_csv_template_matches_dictwriter(validator, tmp_path):
+    results = [
+        make_result(),
+        make_result(ip='5.6.7.8', country=None, headers_leaked=['Via', 'X-Forwarded-For']),
+        make_result(ip='9.9.9.9', country='Taipei, "TW"', recommendation='line\nbreak'),
+    ]
+    path = tmp_path / 'results.csv'
+    validator.save_results_to_csv(results, str(path))
+
+    assert path.read_bytes().decode('utf-8') == _dictwriter_csv(validator, results)
+
+
+def test_csv_gzip_output(validator, tmp_path):
+    results = [make_result(), make_result(ip='5.6.7.8')]
+    path = tmp_path / 'results.csv.gz'
+    validator.save_results_to_csv(results, str(path))
+
+    with gzip.open(path, 'rt', encoding='utf-8', newline='') as f:
+        assert f.read() == _dictwriter_csv(validator, results)
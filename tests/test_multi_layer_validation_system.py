@@ -0,0 +1,383 @@
+"""
+多層次驗證系統測試
+"""
+
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass
+
+import aiohttp
+import numpy as np
+import pytest
+
+from proxy_management.testers import multi_layer_validation_system as mlvs
+from proxy_management.testers.multi_layer_validation_system import (
+    Layer1ConnectivityResult,
+    Layer2PerformanceResult,
+    MultiLayerValidationSystem,
+    ValidationConfig,
+)
+
+
+@dataclass
+class ProxyInfo:
+    ip: str
+    port: int
+    type: str = 'http'
+
+    def __str__(self):
+        return f"{self.ip}:{self.port}"
+
+
+def _system():
+    return MultiLayerValidationSystem(ValidationConfig(timeout=5, max_retries=1, concurrent_limit=10))
+
+
+async def test_validate_all_layers_without_context_manager(proxy_server):
+    system = _system()
+    results = await system.validate_all_layers(ProxyInfo(*proxy_server))
+
+    connectivity = results['connectivity']
+    assert connectivity is not None
+    assert connectivity.http_success
+    assert results['performance'] is not None
+    assert results['performance'].success
+    # 臨時會話在調用結束後關閉
+    assert system.session is None
+    assert all(v.session is None for v in system.validators.values())
+
+
+async def test_validate_single_layer_without_context_manager(proxy_server):
+    system = _system()
+    result = await system.validate_single_layer(ProxyInfo(*proxy_server), 'connectivity')
+    assert result.http_success
+    assert system.session is None
+
+
+async def test_context_manager_session_is_reused(proxy_server):
+    async with _system() as system:
+        session = system.session
+        await system.validate_all_layers(ProxyInfo(*proxy_server))
+        # async with 創建的會話不被單次調用關閉
+        assert system.session is session
+        assert not session.closed
+    assert session.closed
+
+
+def _results_with_inf():
+    connectivity = Layer1ConnectivityResult(
+        layer_name='Connectivity', proxy_str='1.2.3.4:80', success=True,
+        score=float('inf'), details={}, errors=[], execution_time=float('nan'),
+        timestamp=time.time_ns(), http_success=True,
+    )
+    performance = Layer2PerformanceResult(
+        layer_name='Performance', proxy_str='1.2.3.4:80', success=True,
+        score=42.5, details={}, errors=[], execution_time=0.25,
+        timestamp=time.time_ns(), jitter_coefficient=0.9,
+    )
+    return {'connectivity': connectivity, 'performance': performance}
+
+
+def test_summary_json_writes_null_for_non_finite(monkeypatch):
+    system = _system()
+    monkeypatch.setattr(mlvs, 'orjson', None)
+    data = json.loads(system.summary_json(_results_with_inf()))
+
+    assert data['layer_scores']['connectivity']['score'] is None
+    assert data['layer_scores']['connectivity']['execution_time'] is None
+    assert data['layer_scores']['performance']['score'] == 42.5
+    assert data['weighted_total_score'] is None
+
+
+def test_summary_json_backends_match_on_inf(monkeypatch):
+    pytest.importorskip('orjson')
+    system = _system()
+    results = _results_with_inf()
+    # 固定時間戳來源，兩次序列化的 summary 完全相同
+    with_orjson = system.summary_json(results)
+    monkeypatch.setattr(mlvs, 'orjson', None)
+    with_stdlib = system.summary_json(results)
+
+    assert with_orjson == with_stdlib
+    assert b'Infinity' not in with_stdlib and b'NaN' not in with_stdlib
+
+
+def _bucket(value, bounds, points):
+    """原始 if/elif 分檔：value <= bounds[i] 時得 points[i]，否則得最後一檔"""
+    for bound, point in zip(bounds, points):
+        if value <= bound:
+            return point
+    return points[-1]
+
+
+def reference_connectivity_score(http_time, https_time, dns_time, tcp_time):
+    score = 0.0
+    for t in (http_time, https_time):
+        if t != float('inf'):
+            score += _bucket(t, (1.0, 3.0, 5.0), (30.0, 25.0, 20.0, 15.0))
+    if dns_time != float('inf'):
+        score += _bucket(dns_time, (0.5, 1.0), (20.0, 15.0, 10.0))
+    if tcp_time != float('inf'):
+        score += _bucket(tcp_time, (0.3, 0.5), (20.0, 15.0, 10.0))
+    return min(100.0, score)
+
+
+def reference_performance_score(avg_speed, avg_time, consistency, jitter):
+    score = 0.0
+    if avg_speed > 0:
+        for bound, point in ((1000, 40.0), (500, 32.0), (100, 24.0), (50, 16.0)):
+            if avg_speed >= bound:
+                score += point
+                break
+        else:
+            score += 8.0
+    if avg_time != float('inf'):
+        score += _bucket(avg_time, (1.0, 3.0, 5.0), (30.0, 24.0, 18.0, 12.0))
+    score += consistency / 100 * 20.0
+    score += max(0, 1 - jitter) * 10.0
+    return min(100.0, score)
+
+
+def _times(rng, n, boundaries):
+    """隨機時間：混入分檔邊界值與 inf（失敗）"""
+    choices = list(boundaries) + [float('inf'), 0.0]
+    return [rng.choice(choices) if rng.random() < 0.4 else rng.uniform(0, 8) for _ in range(n)]
+
+
+def test_connectivity_score_batch_matches_scalar_reference():
+    rng = random.Random(7)
+    n = 500
+    http = _times(rng, n, (1.0, 3.0, 5.0))
+    https = _times(rng, n, (1.0, 3.0, 5.0))
+    dns = _times(rng, n, (0.5, 1.0))
+    tcp = _times(rng, n, (0.3, 0.5))
+
+    actual = mlvs.ConnectivityValidator.score_batch(http, https, dns, tcp)
+    expected = [reference_connectivity_score(*row) for row in zip(http, https, dns, tcp)]
+    assert actual.tolist() == expected
+
+
+def test_performance_score_batch_matches_scalar_reference():
+    rng = random.Random(11)
+    n = 500
+    speeds = [rng.choice([0.0, 50.0, 100.0, 500.0, 1000.0]) if rng.random() < 0.4
+              else rng.uniform(0, 2000) for _ in range(n)]
+    times = _times(rng, n, (1.0, 3.0, 5.0))
+    consistency = [rng.uniform(0, 100) for _ in range(n)]
+    jitter = [rng.uniform(0, 2) for _ in range(n)]
+
+    actual = mlvs.PerformanceValidator.score_batch(speeds, times, consistency, jitter)
+    expected = [reference_performance_score(*row) for row in zip(speeds, times, consistency, jitter)]
+    assert actual == pytest.approx(expected, abs=1e-12)
+
+
+def test_connectivity_score_uses_batch_for_single_result():
+    validator = mlvs.ConnectivityValidator(ValidationConfig())
+    results = {
+        'http_success': True, 'http_response_time': 1.0,
+        'https_success': False, 'https_response_time': 0.2,
+        'dns_resolution_time': 0.7, 'tcp_connection_time': float('inf'),
+    }
+    # HTTPS 失敗時即使有響應時間也不得分
+    assert validator._calculate_connectivity_score(results) == 45.0
+
+
+def reference_consistency(speeds):
+    valid = speeds[speeds > 0]
+    if valid.size < 2 or valid.mean() == 0:
+        return 0.0
+    return max(0.0, 1 - valid.std(ddof=1) / valid.mean()) * 100
+
+
+def reference_jitter(times):
+    valid = times[np.isfinite(times)]
+    if valid.size < 2 or valid.mean() == 0:
+        return 1.0
+    return valid.std(ddof=1) / valid.mean()
+
+
+def reference_stability(speeds):
+    valid = speeds[speeds > 0]
+    if valid.size < 2:
+        return 0.0
+    if valid.size >= 3 and valid.mean() > 0:
+        return max(0.0, 1 - abs(valid[-3:].mean() - valid.mean()) / valid.mean()) * 100
+    return 50.0
+
+
+RANDOM_CASES = [np.random.default_rng(seed).uniform(0.01, 2000, size=seed + 2) for seed in range(5)]
+# 速度：失敗的下載記為 0
+SPEED_CASES = [
+    np.array([]),
+    np.array([5.0]),
+    np.array([0.0, 0.0, 0.0]),
+    np.array([100.0, 0.0, 120.0]),
+    np.array([1.0, 2.0, 3.0, 4.0, 5.0]),
+    np.array([800.0, 900.0, 50.0, 1200.0, 700.0]),
+] + RANDOM_CASES
+# 響應時間：失敗的下載記為 inf
+TIME_CASES = [
+    np.array([]),
+    np.array([0.5]),
+    np.array([np.inf, np.inf]),
+    np.array([0.3, np.inf, 0.5, np.inf, 0.4]),
+    np.array([1.0, 2.0, 3.0, 4.0, 5.0]),
+] + RANDOM_CASES
+
+
+@pytest.mark.parametrize('kernel, reference, values', [
+    *((mlvs._consistency_kernel, reference_consistency, v) for v in SPEED_CASES),
+    *((mlvs._stability_kernel, reference_stability, v) for v in SPEED_CASES),
+    *((mlvs._jitter_kernel, reference_jitter, v) for v in TIME_CASES),
+])
+def test_kernels_match_numpy_reference_and_python_fallback(kernel, reference, values):
+    # 未安裝 numba 時內核本身就是普通函數
+    python_kernel = getattr(kernel, 'py_func', kernel)
+    expected = reference(values)
+
+    assert kernel(values) == pytest.approx(expected, rel=1e-9, abs=1e-12)
+    assert python_kernel(values) == pytest.approx(expected, rel=1e-9, abs=1e-12)
+
+
+class FakeValidator:
+    """按代理 IP 返回預設分數的驗證器；分數為 None 時拋出異常"""
+
+    def __init__(self, result_cls, layer_name, scores):
+        self.result_cls = result_cls
+        self.layer_name = layer_name
+        self.scores = scores
+        self.session = None
+
+    async def validate(self, proxy_info):
+        score = self.scores[proxy_info.ip]
+        if score is None:
+            raise RuntimeError('layer failed')
+        return self.result_cls(
+            layer_name=self.layer_name, proxy_str=str(proxy_info), success=score >= 50,
+            score=score, details={}, errors=[], execution_time=score / 100,
+            timestamp=time.time_ns(),
+        )
+
+
+async def test_validate_batch_builds_column_report():
+    system = _system()
+    system.validators = {
+        'connectivity': FakeValidator(Layer1ConnectivityResult, 'Connectivity',
+                                      {'1.1.1.1': 100.0, '2.2.2.2': 40.0, '3.3.3.3': None}),
+        'performance': FakeValidator(Layer2PerformanceResult, 'Performance',
+                                     {'1.1.1.1': 80.0, '2.2.2.2': None, '3.3.3.3': None}),
+    }
+    proxies = [ProxyInfo('1.1.1.1', 80), ProxyInfo('2.2.2.2', 80), ProxyInfo('3.3.3.3', 80)]
+
+    report = await system.validate_batch(proxies)
+
+    assert report.proxies == proxies
+    assert report.layer_order == tuple(system.layer_weights)
+    conn, perf = report.layer_order.index('connectivity'), report.layer_order.index('performance')
+    assert report.present[:, [conn, perf]].tolist() == [[True, True], [True, False], [False, False]]
+    assert report.present.sum() == 3
+    assert report.success[:, conn].tolist() == [True, False, False]
+    assert report.scores[0, perf] == 80.0
+    assert report.execution_times[0, conn] == pytest.approx(1.0)
+    # 只有產出結果的層參與加權；全部缺失得 0 分
+    expected_first = (100.0 * 0.25 + 80.0 * 0.20) / (0.25 + 0.20)
+    assert report.weighted_scores.tolist() == pytest.approx([expected_first, 40.0, 0.0])
+    assert report.grades.tolist() == ['A+', 'F', 'F']
+    assert report.grade_counts() == {'A+': 1, 'F': 2}
+    assert system.session is None
+
+
+def test_weighted_scores_batch_matches_single():
+    system = _system()
+    results = _results_with_inf()
+    results['connectivity'].score = 70.0
+    single = system.calculate_weighted_score(results)
+
+    scores = np.zeros((1, len(system._layer_order)))
+    mask = np.zeros_like(scores, dtype=bool)
+    for j, layer in enumerate(system._layer_order):
+        if layer in results:
+            scores[0, j] = results[layer].score
+            mask[0, j] = True
+    assert system.calculate_weighted_scores_batch(scores, mask)[0] == single
+    assert single == pytest.approx((70.0 * 0.25 + 42.5 * 0.20) / 0.45)
+
+
+def test_grades_match_comprehensive_validator_cutoffs():
+    from proxy_management.testers.comprehensive_proxy_validator import ComprehensiveProxyValidator
+
+    get_grade = ComprehensiveProxyValidator()._get_grade
+    scores = np.array([0.0, 49.9, 50.0, 59.99, 60.0, 70.0, 79.9, 80.0, 89.99, 90.0, 100.0])
+    grades = MultiLayerValidationSystem.GRADE_LABELS[
+        np.searchsorted(MultiLayerValidationSystem.GRADE_BUCKETS, scores, side='right')
+    ]
+    assert grades.tolist() == [get_grade(score) for score in scores.tolist()]
+
+
+class SessionRecordingValidator(FakeValidator):
+    """記錄驗證時使用的會話及其是否已關閉"""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.used = []
+
+    async def validate(self, proxy_info):
+        self.used.append((self.session, self.session.closed))
+        return await super().validate(proxy_info)
+
+
+async def test_call_during_temporary_session_close_gets_fresh_session(monkeypatch):
+    system = _system()
+    validator = SessionRecordingValidator(Layer1ConnectivityResult, 'Connectivity', {'1.1.1.1': 90.0})
+    system.validators = {'connectivity': validator}
+
+    closing = asyncio.Event()
+    close = aiohttp.ClientSession.close
+
+    async def slow_close(session):
+        closing.set()
+        await asyncio.sleep(0.05)
+        await close(session)
+
+    monkeypatch.setattr(aiohttp.ClientSession, 'close', slow_close)
+    proxy = ProxyInfo('1.1.1.1', 80)
+
+    first = asyncio.create_task(system.validate_single_layer(proxy, 'connectivity'))
+    # 第一個調用正在關閉臨時會話時發起第二個調用
+    await closing.wait()
+    await system.validate_all_layers(proxy)
+    await first
+
+    (first_session, first_closed), (second_session, second_closed) = validator.used
+    assert not first_closed and not second_closed
+    assert second_session is not first_session
+    assert first_session.closed and second_session.closed
+    assert system.session is None and validator.session is None
+
+
+async def test_temporary_session_adopted_by_context_manager_is_not_closed_early():
+    system = _system()
+    validator = SessionRecordingValidator(Layer1ConnectivityResult, 'Connectivity', {'1.1.1.1': 90.0})
+    system.validators = {'connectivity': validator}
+    proxy = ProxyInfo('1.1.1.1', 80)
+    entered = asyncio.Event()
+    release = asyncio.Event()
+
+    async def held_validate(proxy_info):
+        entered.set()
+        await release.wait()
+        return await SessionRecordingValidator.validate(validator, proxy_info)
+
+    validator.validate = held_validate
+    pending = asyncio.create_task(system.validate_single_layer(proxy, 'connectivity'))
+    await entered.wait()
+
+    async with system:
+        session = system.session
+        release.set()
+        await pending
+        # 臨時調用結束時不關閉已交給 async with 的會話
+        assert system.session is session and not session.closed
+    assert session.closed and system.session is None
@@ -0,0 +1,59 @@
+"""
+代理管理自動化調度器測試
+"""
+
+import logging
+import time
+
+import pytest
+
+from proxy_management.core.proxy_automation_scheduler import ProxyAutomationScheduler
+
+
+@pytest.fixture
+def scheduler(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    root_logger = logging.getLogger()
+    handlers = list(root_logger.handlers)
+    scheduler = ProxyAutomationScheduler()
+    # 不註冊真實任務，只測試調度循環本身
+    monkeypatch.setattr(scheduler, 'setup_schedules', lambda: None)
+    yield scheduler
+    scheduler.is_running = False
+    scheduler._stop_event.set()
+    # 還原調度器初始化時添加到根日誌的處理器
+    for handler in root_logger.handlers[len(handlers):]:
+        root_logger.removeHandler(handler)
+        handler.close()
+
+
+def test_stop_wakes_scheduler_loop(scheduler):
+    scheduler.start_scheduler()
+    # 等待調度線程進入 60 秒的等待
+    time.sleep(0.2)
+    assert scheduler.scheduler_thread.is_alive()
+
+    started = time.monotonic()
+    scheduler.stop_scheduler()
+
+    assert time.monotonic() - started < 2
+    assert not scheduler.scheduler_thread.is_alive()
+    assert not scheduler.is_running
+
+
+def test_stop_before_thread_runs_is_not_lost(scheduler, monkeypatch):
+    run_loop = scheduler._run_loop
+
+    def delayed_run_loop():
+        # 模擬調度線程啟動後遲遲未被調度，stop_scheduler 先於循環執行
+        time.sleep(0.3)
+        run_loop()
+
+    monkeypatch.setattr(scheduler, '_run_loop', delayed_run_loop)
+    scheduler.start_scheduler()
+    started = time.monotonic()
+    scheduler.stop_scheduler()
+
+    assert time.monotonic() - started < 2
+    assert not scheduler.scheduler_thread.is_alive()
+    assert not scheduler.is_running
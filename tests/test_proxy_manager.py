@@ -0,0 +1,131 @@
+"""
+代理管理工具測試
+"""
+
+import random
+import re
+
+import pytest
+
+from proxy_management.core import proxy_manager
+from proxy_management.core.proxy_manager import ProxyManager
+
+
+def reference_working_proxies(working, max_response_time=None, limit=None):
+    """逐個比較的參考實現：過濾後按響應時間穩定排序，缺失按 99999 處理"""
+    proxies = list(working)
+    if max_response_time:
+        proxies = [p for p in proxies if p.get('response_time_ms', 99999) <= max_response_time]
+    proxies.sort(key=lambda p: p.get('response_time_ms', 99999))
+    if limit:
+        proxies = proxies[:limit]
+    return proxies
+
+
+def make_proxy(i, response_time=None):
+    proxy = {'ip': f'10.0.0.{i}', 'port': 8000 + i, 'type': 'http'}
+    if response_time is not None:
+        proxy['response_time_ms'] = response_time
+    return proxy
+
+
+@pytest.fixture
+def manager():
+    return ProxyManager()
+
+
+def test_get_working_proxies_matches_reference_on_random_inputs(manager):
+    rng = random.Random(1234)
+    for _ in range(300):
+        n = rng.randint(0, 40)
+        # 取值範圍小，製造大量相同響應時間；部分代理沒有響應時間
+        manager.working_proxies = [
+            make_proxy(i, None if rng.random() < 0.2 else float(rng.randint(1, 8) * 100))
+            for i in range(n)
+        ]
+        max_response_time = rng.choice([None, 0, 300, 500, 800, 100000])
+        limit = rng.choice([None, 0, 1, 2, 5, n, n + 3])
+
+        actual = manager.get_working_proxies(max_response_time, limit)
+        expected = reference_working_proxies(manager.working_proxies, max_response_time, limit)
+        assert [id(p) for p in actual] == [id(p) for p in expected]
+
+
+def test_ties_at_limit_keep_original_order(manager):
+    manager.working_proxies = [make_proxy(i, 100.0) for i in range(5)] + [make_proxy(9, 50.0)]
+    result = manager.get_working_proxies(limit=3)
+    assert [p['ip'] for p in result] == ['10.0.0.9', '10.0.0.0', '10.0.0.1']
+
+
+def test_missing_response_time_ranks_last_and_is_filtered(manager):
+    manager.working_proxies = [make_proxy(0), make_proxy(1, 2000.0), make_proxy(2, 10.0)]
+
+    assert [p['ip'] for p in manager.get_working_proxies()] == ['10.0.0.2', '10.0.0.1', '10.0.0.0']
+    assert [p['ip'] for p in manager.get_working_proxies(max_response_time=5000)] == ['10.0.0.2', '10.0.0.1']
+
+
+def test_in_place_edit_is_reflected(manager):
+    manager.working_proxies = [make_proxy(0, 100.0), make_proxy(1, 200.0)]
+    assert manager.get_working_proxies()[0]['ip'] == '10.0.0.0'
+
+    # 長度不變的就地修改
+    manager.working_proxies[0] = make_proxy(5, 300.0)
+    assert [p['ip'] for p in manager.get_working_proxies()] == ['10.0.0.1', '10.0.0.5']
+    manager.working_proxies[1]['response_time_ms'] = 999.0
+    assert [p['ip'] for p in manager.get_working_proxies()] == ['10.0.0.5', '10.0.0.1']
+
+
+def test_benchmark_prints_one_dot_per_successful_probe(manager, proxy_server, capsys):
+    ip, port = proxy_server
+    working = [
+        {'ip': ip, 'port': port, 'type': 'http', 'response_time_ms': 10.0},
+        {'ip': '127.0.0.1', 'port': 1, 'type': 'http', 'response_time_ms': 20.0},
+    ]
+    manager.working_proxies = working
+    manager.benchmark_proxies(limit=2, test_count=3)
+
+    lines = capsys.readouterr().out.splitlines()
+    ok_line = next(line for line in lines if line.startswith('測試') and f':{port} ' in line)
+    failed_line = next(line for line in lines if line.startswith('測試') and ':1 ' in line)
+    # 成功三次打印三個點，失敗的代理不打印點
+    assert re.search(rf':{port} \.\.\. \d+ms \(3/3\)$', ok_line)
+    assert failed_line.endswith(':1  失敗')
+
+
+def test_save_working_proxies_leaves_missing_response_time_empty(manager, tmp_path):
+    source = tmp_path / 'results.csv'
+    source.write_text(
+        'ip,port,type,response_time_ms,country,is_working\n'
+        '1.1.1.1,80,http,120.5,TW,True\n'
+        '2.2.2.2,8080,socks5,,JP,True\n'
+        '3.3.3.3,3128,http,50,US,False\n',
+        encoding='utf-8',
+    )
+    manager.load_validation_results(str(source))
+    output = tmp_path / 'working.csv'
+    manager.save_working_proxies(str(output))
+
+    assert output.read_text(encoding='utf-8') == (
+        'ip,port,type,response_time_ms,country,proxy_url\n'
+        '1.1.1.1,80,http,120.5,TW,http://1.1.1.1:80\n'
+        '2.2.2.2,8080,socks5,,JP,socks5://2.2.2.2:8080\n'
+    )
+
+
+def test_speed_test_session_ignores_cookies(manager, proxy_httpd):
+    ip, port = proxy_httpd.server_address
+    proxy = {'ip': ip, 'port': port, 'type': 'http'}
+
+    assert manager.test_proxy_speed(proxy) is not None
+    assert manager.test_proxy_speed(proxy) is not None
+    # 伺服器每次都下發 cookie，但會話既不保存也不回送
+    assert len(proxy_manager._speed_test_session.cookies) == 0
+    assert proxy_httpd.cookies_seen == [None, None]
+
+
+def test_instances_do_not_register_exit_handlers(monkeypatch):
+    registered = []
+    monkeypatch.setattr(proxy_manager.atexit, 'register', registered.append)
+    for _ in range(3):
+        ProxyManager()
+    assert registered == []
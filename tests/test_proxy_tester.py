@@ -0,0 +1,170 @@
+"""
+代理測試器測試
+"""
+
+import json
+
+import pytest
+import requests
+
+from proxy_management.testers.proxy_tester import ProxyTester, _parse_origin
+
+
+@pytest.mark.parametrize('body, expected', [
+    (b'{"origin": "1.2.3.4"}', '1.2.3.4'),
+    (b'{\n  "origin": "1.2.3.4, 5.6.7.8"\n}\n', '1.2.3.4, 5.6.7.8'),
+    (b'{"origin":"1.2.3.4"}', '1.2.3.4'),
+])
+def test_parse_origin_fast_path(body, expected):
+    assert _parse_origin(body) == expected
+
+
+@pytest.mark.parametrize('body, expected', [
+    # 含轉義字符的值由 JSON 解析還原
+    (json.dumps({'origin': '1.2.3.4'}, ensure_ascii=True).replace('1', '\\u0031').encode(), '1.2.3.4'),
+    (b'{"origin": "a\\"b"}', 'a"b'),
+    # 非字符串的 origin
+    (b'{"origin": 1234}', '1234'),
+])
+def test_parse_origin_falls_back_to_json(body, expected):
+    assert _parse_origin(body) == expected
+
+
+@pytest.mark.parametrize('body', [
+    b'<html>blocked by proxy</html>',
+    b'{"ip": "1.2.3.4"}',
+    b'{"origin": null}',
+    b'["origin"]',
+    b'',
+])
+def test_parse_origin_rejects_bodies_without_origin(body):
+    with pytest.raises(ValueError):
+        _parse_origin(body)
+
+
+def test_dedupe_proxies_drops_duplicates_and_malformed_entries():
+    proxies = [
+        {'ip': '1.1.1.1', 'port': 80, 'type': 'http'},
+        {'ip': '1.1.1.1', 'port': '80', 'type': 'socks5'},   # 同一代理出現在另一協議列表
+        {'ip': '1.1.1.1', 'port': 8080, 'type': 'http'},
+        {'ip': '2.2.2.2', 'port': 'abc'},
+        {'ip': '3.3.3.3', 'port': None},
+        {'port': 80},
+        {'ip': '4.4.4.4'},
+        {'ip': '2.2.2.2', 'port': 3128},
+    ]
+    unique = ProxyTester._dedupe_proxies(proxies)
+    # 保留首次出現的條目及其原始順序
+    assert unique == [proxies[0], proxies[2], proxies[7]]
+
+
+@pytest.fixture
+def tester(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return ProxyTester()
+
+
+@pytest.mark.parametrize('ip, key', [
+    ('10.2.3.4', (10, 2)),
+    ('192.168.0.1', (192, 168)),
+    ('localhost', (256, 0)),
+    ('a.b.c.d', (256, 0)),
+    (None, (256, 0)),
+])
+def test_subnet_key(ip, key):
+    assert ProxyTester._subnet_key({'ip': ip}) == key
+
+
+def test_validate_proxies_batch_orders_by_subnet(tester, monkeypatch):
+    seen = []
+
+    async def fake_validate(proxies, max_workers, timeout=10):
+        seen.extend(proxies)
+        return [{'status': 'valid'} for _ in proxies]
+
+    monkeypatch.setattr(tester, '_validate_proxies_batch_async', fake_validate)
+    proxies = [
+        {'ip': '9.1.0.1', 'port': 80},
+        {'ip': 'bad-host', 'port': 80},
+        {'ip': '1.2.0.1', 'port': 80},
+        {'ip': '9.1.0.2', 'port': 80},
+        {'ip': '1.2.0.1', 'port': 80},
+        {'ip': '1.10.0.1', 'port': 80},
+        {'ip': '1.2.9.9', 'port': 80},
+    ]
+    results = tester.validate_proxies_batch(proxies)
+
+    # 按數值而非字串排序網段，同網段內保持原順序，無法解析的排在最後
+    assert [p['ip'] for p in seen] == ['1.2.0.1', '1.2.9.9', '1.10.0.1', '9.1.0.1', '9.1.0.2', 'bad-host']
+    assert len(results) == 6
+
+
+class FakeCdnSession:
+    """按順序返回預設響應的 CDN 會話，並記錄每次請求的頭"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, timeout=None, headers=None):
+        self.requests.append(dict(headers or {}))
+        return self.responses.pop(0)
+
+
+def cdn_response(status, body=b'', etag=None):
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    if etag:
+        response.headers['ETag'] = etag
+    return response
+
+
+CDN_BODY = json.dumps([{'ip': '1.1.1.1', 'port': 80}, {'ip': '2.2.2.2', 'port': 8080}]).encode()
+
+
+def test_fetch_proxies_sends_conditional_get_and_reuses_cache_on_304(tester, monkeypatch):
+    session = FakeCdnSession(cdn_response(200, CDN_BODY, etag='"v1"'), cdn_response(304))
+    monkeypatch.setattr(tester, '_cdn_session', session)
+
+    first = tester.fetch_proxies('http')
+    assert tester.last_fetch_changed
+    second = tester.fetch_proxies('http')
+
+    assert session.requests == [{}, {'If-None-Match': '"v1"'}]
+    assert second == first == json.loads(CDN_BODY)
+    assert not tester.last_fetch_changed
+    # 304 不記錄新的獲取
+    assert len(tester.history['fetch_times']) == 1
+
+    # 新實例沒有記憶體快取，從磁碟快照與保存的 ETag 恢復
+    restarted = ProxyTester()
+    session = FakeCdnSession(cdn_response(304))
+    monkeypatch.setattr(restarted, '_cdn_session', session)
+    assert restarted.fetch_proxies('http') == first
+    assert session.requests == [{'If-None-Match': '"v1"'}]
+    assert not restarted.last_fetch_changed
+
+
+def test_fetch_proxies_refetches_when_snapshot_is_unusable(tester, monkeypatch):
+    session = FakeCdnSession(cdn_response(200, CDN_BODY, etag='"v1"'))
+    monkeypatch.setattr(tester, '_cdn_session', session)
+    tester.fetch_proxies('http')
+
+    # 磁碟快照損壞且沒有記憶體快取時，304 後改發完整請求
+    tester._cdn_cache.clear()
+    tester._cdn_cache_file('http').write_bytes(b'not json')
+    session.responses = [cdn_response(304), cdn_response(200, CDN_BODY, etag='"v2"')]
+    assert tester.fetch_proxies('http') == json.loads(CDN_BODY)
+    assert session.requests[1:] == [{'If-None-Match': '"v1"'}, {}]
+    assert tester.last_fetch_changed
+    assert tester.history['cdn_validators']['http']['etag'] == '"v2"'
+
+
+def test_fetch_proxies_skips_conditional_headers_without_snapshot(tester, monkeypatch):
+    tester.history['cdn_validators']['http'] = {'etag': '"v1"', 'last_modified': None}
+    session = FakeCdnSession(cdn_response(200, CDN_BODY))
+    monkeypatch.setattr(tester, '_cdn_session', session)
+
+    assert tester.fetch_proxies('http') == json.loads(CDN_BODY)
+    assert session.requests == [{}]